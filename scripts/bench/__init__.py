@@ -0,0 +1,2 @@
+from .synthetic import PRESETS, SyntheticDota
+from .suite import BenchmarkSuite
@@ -0,0 +1,213 @@
+import os
+import json
+import time
+import shutil
+import platform
+import cv2
+import numpy as np
+from dota.classes import CLASS_NAMES
+from dota.converter import DotoYoloConverter
+from dota.tiler import YoloTiler
+from dota.splitter import TrainValSplitter
+from dota.datastats import DotaDatastats
+from dota.profiling import RunProfiler
+from .synthetic import PRESETS, SyntheticDota
+
+STAGES = ("convert", "tile", "split", "stats")
+
+
+def machine_info():
+    return {
+        "platform": platform.platform(),
+        "processor": platform.processor() or platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "opencv": cv2.__version__,
+    }
+
+
+class BenchmarkSuite:
+    """
+    Times the preprocessing pipeline on synthetic DOTA datasets.
+
+    For every preset (see bench.synthetic.PRESETS) the dataset is
+    generated once under work_dir/<preset>/data, then each repeat runs
+    convert -> tile -> split -> stats from a clean work_dir/<preset>/run
+    (size index, manifest and stats cache included, so every repeat is a
+    cold run). Stage metrics come from RunProfiler; the median wall time
+    over repeats is what compare() checks.
+    """
+    def __init__(
+        self,
+        work_dir: str,
+        presets=tuple(PRESETS),
+        repeats: int = 3,
+        workers: int = 1,
+        tile_size: int = 1024,
+        overlap: int = 200,
+        seed: int = 0,
+    ):
+        for name in presets:
+            assert name in PRESETS, f"preset must be one of {tuple(PRESETS)}"
+        self.work_dir = work_dir
+        self.presets = tuple(presets)
+        self.repeats = max(1, repeats)
+        self.workers = max(1, workers)
+        self.tile_size = tile_size
+        self.overlap = overlap
+        self.seed = seed
+
+    def _run_once(self, images_dir, dota_dir, run_dir, profiler):
+        labels_dir = os.path.join(run_dir, "labels")
+        tiles_dir = os.path.join(run_dir, "tiles")
+
+        DotoYoloConverter(
+            images_dir=images_dir,
+            dota_labels_dir=dota_dir,
+            output_labels_dir=labels_dir,
+            workers=self.workers,
+            size_index_path=os.path.join(run_dir, "image_sizes.json"),
+            profiler=profiler,
+        ).convert()
+
+        YoloTiler(
+            images_dir=images_dir,
+            labels_dir=labels_dir,
+            output_images_dir=os.path.join(tiles_dir, "images"),
+            output_labels_dir=os.path.join(tiles_dir, "labels"),
+            tile_size=self.tile_size,
+            overlap=self.overlap,
+            workers=self.workers,
+            profiler=profiler,
+        ).tile_all(force=True)
+
+        TrainValSplitter(
+            images_dir=os.path.join(tiles_dir, "images"),
+            labels_dir=os.path.join(tiles_dir, "labels"),
+            output_dir=os.path.join(run_dir, "dataset"),
+            workers=self.workers,
+            profiler=profiler,
+        ).split()
+
+        DotaDatastats(
+            image_dir=os.path.join(tiles_dir, "images"),
+            label_dir=os.path.join(tiles_dir, "labels"),
+            class_names=CLASS_NAMES,
+            workers=self.workers,
+            image_size=self.tile_size,
+            profiler=profiler,
+        ).compute()
+
+    def _run_preset(self, name):
+        images_dir, dota_dir = SyntheticDota.from_preset(
+            os.path.join(self.work_dir, name, "data"), name, seed=self.seed
+        ).generate()
+        run_dir = os.path.join(self.work_dir, name, "run")
+
+        records = {stage: [] for stage in STAGES}
+        for i in range(self.repeats):
+            print(f"[INFO] {name}: repeat {i + 1}/{self.repeats}")
+            shutil.rmtree(run_dir, ignore_errors=True)
+            profiler = RunProfiler(run_id=f"{name}-{i}")
+            self._run_once(images_dir, dota_dir, run_dir, profiler)
+            for r in profiler.records:
+                records[r["stage"]].append(r)
+        shutil.rmtree(run_dir, ignore_errors=True)
+
+        result = {}
+        for stage, runs in records.items():
+            walls = [r["wall_s"] for r in runs]
+            wall = float(np.median(walls))
+            result[stage] = {
+                "wall_s": wall,
+                "wall_s_min": min(walls),
+                "wall_s_max": max(walls),
+                "cpu_s": float(np.median([r["cpu_s"] for r in runs])),
+                "items": runs[-1]["items"],
+                "items_per_s": runs[-1]["items"] / wall if wall > 0 else 0.0,
+                "write_bytes": runs[-1]["write_bytes"],
+                "peak_rss_mb": max(max(r["peak_rss_mb"], r["worker_peak_rss_mb"]) for r in runs),
+            }
+        return result
+
+    def run(self):
+        params = {
+            "presets": {name: PRESETS[name] for name in self.presets},
+            "repeats": self.repeats,
+            "workers": self.workers,
+            "tile_size": self.tile_size,
+            "overlap": self.overlap,
+            "seed": self.seed,
+        }
+        results = {
+            "created": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "machine": machine_info(),
+            # JSON round trip (tuples -> lists) so params compare equal to a loaded baseline
+            "params": json.loads(json.dumps(params)),
+            "results": {name: self._run_preset(name) for name in self.presets},
+        }
+        self.print_results(results)
+        return results
+
+    @staticmethod
+    def print_results(results):
+        print(f"\n{'preset':<8} {'stage':<8} {'wall s':>8} {'min':>8} {'cpu s':>8} {'items':>7} {'items/s':>9} {'RSS MB':>7}")
+        for preset, stages in results["results"].items():
+            for stage, r in stages.items():
+                print(
+                    f"{preset:<8} {stage:<8} {r['wall_s']:>8.2f} {r['wall_s_min']:>8.2f} "
+                    f"{r['cpu_s']:>8.2f} {r['items']:>7} {r['items_per_s']:>9.1f} {r['peak_rss_mb']:>7.0f}"
+                )
+
+    @staticmethod
+    def save(results, path: str):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(results, f, indent=2)
+        os.replace(tmp_path, path)
+        print(f"[DONE] Benchmark results saved: {path}")
+
+    @staticmethod
+    def compare(baseline, current, tolerance: float = 0.10):
+        """
+        Compares median wall times of two results (dicts or JSON paths).
+        Returns the [(preset, stage, ratio)] that got slower by more than
+        tolerance. Only meaningful for results from the same machine and
+        params; mismatches are warned about.
+        """
+        loaded = []
+        for results in (baseline, current):
+            if isinstance(results, str):
+                with open(results, "r") as f:
+                    results = json.load(f)
+            loaded.append(results)
+        baseline, current = loaded
+
+        if baseline["params"] != current["params"]:
+            print("[WARN] Benchmark params differ from the baseline")
+        if baseline["machine"] != current["machine"]:
+            print("[WARN] Benchmark machine differs from the baseline")
+
+        regressions = []
+        print(f"\n{'preset':<8} {'stage':<8} {'base s':>8} {'now s':>8} {'ratio':>7}")
+        for preset, stages in current["results"].items():
+            for stage, r in stages.items():
+                base = baseline["results"].get(preset, {}).get(stage)
+                if base is None or base["wall_s"] <= 0:
+                    continue
+                ratio = r["wall_s"] / base["wall_s"]
+                flag = ""
+                if ratio > 1 + tolerance:
+                    flag = "  REGRESSION"
+                    regressions.append((preset, stage, ratio))
+                elif ratio < 1 - tolerance:
+                    flag = "  faster"
+                print(f"{preset:<8} {stage:<8} {base['wall_s']:>8.2f} {r['wall_s']:>8.2f} {ratio:>7.2f}{flag}")
+
+        if regressions:
+            print(f"[WARN] {len(regressions)} stage(s) slower than baseline by more than {tolerance:.0%}")
+        else:
+            print("[DONE] No regressions against baseline")
+        return regressions
@@ -0,0 +1,22 @@
+import os
+import sys
+from bench import BenchmarkSuite
+
+if __name__ == "__main__":
+    results_path = "/home/royalbrothers/open_source_yolo_project/bench/bench_results.json"
+    baseline_path = "/home/royalbrothers/open_source_yolo_project/bench/bench_baseline.json"
+
+    suite = BenchmarkSuite(
+        work_dir="/home/royalbrothers/open_source_yolo_project/bench/work",
+        presets=("sparse", "medium", "dense"),
+        repeats=3,
+        workers=8,
+    )
+    results = suite.run()
+    suite.save(results, results_path)
+
+    # First run on a machine becomes the baseline; later runs are checked against it
+    if not os.path.exists(baseline_path):
+        suite.save(results, baseline_path)
+    elif suite.compare(baseline_path, results, tolerance=0.10):
+        sys.exit(1)
@@ -0,0 +1,13 @@
+from train import CheckpointComparison
+
+if __name__ == "__main__":
+    comparison = CheckpointComparison(
+        checkpoints="/home/royalbrothers/open_source_yolo_project/scripts/runs/dota/*/weights/best.pt",
+        data_yaml="/home/royalbrothers/open_source_yolo_project/data/dataset.yaml",
+        imgsz=640,
+        batch=16,
+        workers=2,
+    )
+    comparison.run(
+        report_path="/home/royalbrothers/open_source_yolo_project/scripts/runs/dota/comparison.json"
+    )
@@ -1,10 +1,15 @@
 from dota.converter import DotoYoloConverter
+from dota.profiling import RunProfiler
 
 if __name__ == "__main__":
+    profiler = RunProfiler(report_path="/home/royalbrothers/open_source_yolo_project/run_report.jsonl")
     converter = DotoYoloConverter(
         images_dir="/home/royalbrothers/open_source_yolo_project/dataset_before_split/images",
         dota_labels_dir="/home/royalbrothers/open_source_yolo_project/dataset_before_split/labels",
         output_labels_dir="/home/royalbrothers/open_source_yolo_project/dataset_before_split/labels",
-        ignore_difficult=True
+        ignore_difficult=True,
+        workers=8,
+        profiler=profiler
     )
-    converter.convert()
\ No newline at end of file
+    converter.convert()
+    profiler.print_summary()
\ No newline at end of file
@@ -1,30 +1,88 @@
 import os
+import json
+import numpy as np
 from PIL import Image
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from .classes import DOTA_CLASSES
+from .profiling import StepTimer, profile_stage
+
+OUTPUT_FORMATS = ("hbb", "obb")
+
+
+_WORKER_CONVERTER = None
+
+
+def _init_worker(converter):
+    global _WORKER_CONVERTER
+    _WORKER_CONVERTER = converter
+
+
+def _convert_worker(job):
+    timer = StepTimer()
+    n_objects = _WORKER_CONVERTER._convert_single_file(*job, timer)
+    return n_objects, timer.report()
+
+
+def _read_size(path):
+    # PIL only parses the header here, pixels are never decoded
+    with Image.open(path) as img:
+        return img.size
+
 
 class DotoYoloConverter:
     """
     Converts DOTA v1.0 annotations (OBB) into YOLO format (HBB).
 
     - Keeps float precision
-    - Converts OBB -> HBB
+    - Converts OBB -> HBB ("cls xc yc w h"), or with output_format="obb"
+      keeps the polygon ("cls x1 y1 x2 y2 x3 y3 x4 y4", ultralytics OBB),
+      corners clipped to [0, 1] so the files are valid ultralytics labels
     - Ignores difficult objects by default
+
+    Image sizes are read from file headers once and cached in
+    image_sizes.json (next to the images folder); label files are parsed
+    in a process pool and the box math runs in batch per file.
+
+    With profiler (a RunProfiler), convert() is recorded as a stage with
+    headers / parse / convert / write sub-steps.
     """
 
-    def __init__(self, images_dir: str, dota_labels_dir: str, output_labels_dir: str, ignore_difficult: bool = True):
+    def __init__(
+        self,
+        images_dir: str,
+        dota_labels_dir: str,
+        output_labels_dir: str,
+        ignore_difficult: bool = True,
+        workers: int = 1,
+        size_index_path: str = None,
+        output_format: str = "hbb",
+        profiler=None,
+    ):
+        assert output_format in OUTPUT_FORMATS, f"output_format must be one of {OUTPUT_FORMATS}"
         self.images_dir = images_dir
         self.dota_labels_dir = dota_labels_dir
         self.output_labels_dir = output_labels_dir
         self.ignore_difficult = ignore_difficult
+        self.workers = max(1, workers)
+        self.output_format = output_format
+        self.size_index_path = size_index_path or os.path.join(
+            os.path.dirname(os.path.normpath(images_dir)), "image_sizes.json"
+        )
+
+        self.profiler = profiler
 
         os.makedirs(self.output_labels_dir, exist_ok=True)
-    
+
+    def __getstate__(self):
+        # Workers report step timings back; the profiler stays in the parent
+        return {**self.__dict__, "profiler": None}
+
     @staticmethod
     def _obb_to_hbb(coords):
-        xs = coords[0::2]
-        ys = coords[1::2]
-        return min(xs), min(ys), max(xs), max(ys)
-    
+        xs = coords[:, 0::2]
+        ys = coords[:, 1::2]
+        return xs.min(axis=1), ys.min(axis=1), xs.max(axis=1), ys.max(axis=1)
+
     @staticmethod
     def _hbb_to_yolo(xmin, ymin, xmax, ymax, img_w, img_h):
         xc = ((xmin + xmax) / 2) / img_w
@@ -32,26 +90,64 @@ class DotoYoloConverter:
         w = (xmax - xmin) / img_w
         h = (ymax - ymin) / img_h
         return xc, yc, w, h
-    
-    def _find_image(self, base_name):
-        for ext in (".png", ".jpg", ".jpeg"):
-            path = os.path.join(self.images_dir, base_name + ext)
-            if os.path.exists(path):
-                return path
-        return None
-    
-    def _convert_single_file(self, label_file):
-        base_name = os.path.splitext(label_file)[0]
-
-        img_path = self._find_image(base_name)
-        if img_path is None:
-            print(f"[WARN] Image not found for {base_name}")
-            return
-
-        img = Image.open(img_path)
-        img_w, img_h = img.size
-
-        yolo_lines = []
+
+    def _find_images(self):
+        """
+        Maps base name -> image file with a single listdir
+        (.png preferred over .jpg over .jpeg, as before).
+        """
+        priority = {".png": 0, ".jpg": 1, ".jpeg": 2}
+        found = {}
+        for f in os.listdir(self.images_dir):
+            base_name, ext = os.path.splitext(f)
+            if ext not in priority:
+                continue
+            current = found.get(base_name)
+            if current is None or priority[ext] < priority[os.path.splitext(current)[1]]:
+                found[base_name] = f
+        return found
+
+    def _image_sizes(self, image_files):
+        """
+        Returns {image file: (w, h)}, reusing cached sizes whose
+        file size and mtime still match.
+        """
+        cached = {}
+        if os.path.exists(self.size_index_path):
+            with open(self.size_index_path, "r") as f:
+                cached = json.load(f)
+
+        index, missing = {}, []
+        for img_file in image_files:
+            st = os.stat(os.path.join(self.images_dir, img_file))
+            entry = cached.get(img_file)
+            if entry and entry[2:] == [st.st_size, st.st_mtime_ns]:
+                index[img_file] = entry
+            else:
+                missing.append((img_file, [st.st_size, st.st_mtime_ns]))
+
+        if missing:
+            print(f"[INFO] Reading {len(missing)} image headers")
+            with ThreadPoolExecutor(max_workers=max(4, self.workers)) as pool:
+                sizes = pool.map(
+                    _read_size,
+                    [os.path.join(self.images_dir, f) for f, _ in missing],
+                )
+                for (img_file, stamp), size in zip(missing, sizes):
+                    index[img_file] = list(size) + stamp
+
+            tmp_path = self.size_index_path + ".tmp"
+            with open(tmp_path, "w") as f:
+                json.dump(index, f)
+            os.replace(tmp_path, self.size_index_path)
+
+        return {f: (entry[0], entry[1]) for f, entry in index.items()}
+
+    def _parse_dota_file(self, label_file):
+        """
+        Returns (coords (N, 8), class ids (N,)) of the kept objects.
+        """
+        coords, class_ids = [], []
 
         with open(os.path.join(self.dota_labels_dir, label_file), "r") as f:
             for line in f:
@@ -59,43 +155,107 @@ class DotoYoloConverter:
                 if len(parts) < 10:
                     continue
 
-                coords = list(map(float, parts[:8]))
-                class_name = parts[8]
-                difficult = int(parts[9])
-
-                if self.ignore_difficult and difficult == 1:
+                if self.ignore_difficult and int(parts[9]) == 1:
                     continue
 
-                if class_name not in DOTA_CLASSES:
+                class_id = DOTA_CLASSES.get(parts[8])
+                if class_id is None:
                     continue
 
-                class_id = DOTA_CLASSES[class_name]
+                coords.append(parts[:8])
+                class_ids.append(class_id)
 
-                xmin, ymin, xmax, ymax = self._obb_to_hbb(coords)
-                xc, yc, w, h = self._hbb_to_yolo(
-                    xmin, ymin, xmax, ymax, img_w, img_h
-                )
+        return (
+            np.array(coords, dtype=np.float64).reshape(-1, 8),
+            np.array(class_ids, dtype=np.int64),
+        )
 
-                if w <= 0 or h <= 0:
-                    continue
+    def _yolo_lines(self, label_file, img_size, timer: StepTimer = None):
+        """
+        YOLO label lines of one DOTA label file, or None if its image
+        was not found.
+        """
+        timer = timer or StepTimer()
+
+        if img_size is None:
+            print(f"[WARN] Image not found for {os.path.splitext(label_file)[0]}")
+            return None
+
+        img_w, img_h = img_size
+        with timer.step("parse"):
+            coords, class_ids = self._parse_dota_file(label_file)
 
-                yolo_lines.append(
-                    f"{class_id} {xc:.6f} {yc:.6f} {w:.6f} {h:.6f}"
+        with timer.step("convert", len(coords)):
+            xc, yc, w, h = self._hbb_to_yolo(*self._obb_to_hbb(coords), img_w, img_h)
+            keep = ~((w <= 0) | (h <= 0))
+
+            if self.output_format == "obb":
+                # DOTA corners can sit slightly outside the image
+                polys = np.clip(coords[keep] / np.tile([img_w, img_h], 4), 0.0, 1.0)
+                return [
+                    f"{c} " + " ".join(f"{v:.6f}" for v in poly)
+                    for c, poly in zip(class_ids[keep].tolist(), polys.tolist())
+                ]
+
+            return [
+                f"{c} {x:.6f} {y:.6f} {bw:.6f} {bh:.6f}"
+                for c, x, y, bw, bh in zip(
+                    class_ids[keep].tolist(),
+                    xc[keep].tolist(),
+                    yc[keep].tolist(),
+                    w[keep].tolist(),
+                    h[keep].tolist(),
                 )
+            ]
+
+    def _convert_single_file(self, label_file, img_size, timer: StepTimer = None):
+        timer = timer or StepTimer()
+        yolo_lines = self._yolo_lines(label_file, img_size, timer)
+        if not yolo_lines:
+            return 0
+
+        out_path = os.path.join(self.output_labels_dir, os.path.splitext(label_file)[0] + ".txt")
+        with timer.step("write"), open(out_path, "w") as f:
+            f.write("\n".join(yolo_lines))
+
+        return len(yolo_lines)
 
-        if yolo_lines:
-            out_path = os.path.join(self.output_labels_dir, base_name + ".txt")
-            with open(out_path, "w") as f:
-                f.write("\n".join(yolo_lines))
-    
     def convert(self):
+        with profile_stage(self.profiler, "convert") as stage:
+            self._convert(stage)
+
+    def _convert(self, stage):
         label_files = [
             f for f in os.listdir(self.dota_labels_dir) if f.endswith(".txt")
         ]
 
         print(f"[INFO] Converting {len(label_files)} annotation files")
 
-        for label_file in label_files:
-            self._convert_single_file(label_file)
+        with stage.step("headers", len(label_files)):
+            images = self._find_images()
+            sizes = self._image_sizes(
+                [images[os.path.splitext(f)[0]] for f in label_files
+                 if os.path.splitext(f)[0] in images]
+            )
+        jobs = [
+            (f, sizes.get(images.get(os.path.splitext(f)[0])))
+            for f in label_files
+        ]
+
+        if self.workers > 1 and len(jobs) > 1:
+            with ProcessPoolExecutor(
+                max_workers=self.workers,
+                initializer=_init_worker,
+                initargs=(self,),
+            ) as pool:
+                n_objects = 0
+                for n, report in pool.map(_convert_worker, jobs, chunksize=16):
+                    n_objects += n
+                    stage.add_report(report)
+        else:
+            n_objects = sum(self._convert_single_file(*job, stage.timer) for job in jobs)
+
+        stage.items = len(jobs)
 
+        print(f"[INFO] Wrote {n_objects} objects")
         print("[DONE] DOTA → YOLO conversion complete")
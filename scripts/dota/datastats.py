@@ -1,81 +1,203 @@
 import os
-from collections import defaultdict
+import zlib
+import pickle
 import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from .labelstore import LabelStore, read_yolo_files
+from .profiling import profile_stage
+from .statsengine import SIZE_BUCKETS, StatsAccumulator
+from .tilecodec import TILE_EXTS
+
+
+def _scan_chunk(label_dir, images, num_classes, image_size):
+    stems = [os.path.splitext(img)[0] for img in images]
+    rows, counts, _ = read_yolo_files(
+        [os.path.join(label_dir, stem + ".txt") for stem in stems]
+    )
+    acc = StatsAccumulator(num_classes, image_size)
+    acc.add_images(images, counts, rows)
+    return acc
+
+
+def chunk_bounds(names, chunk_size):
+    """
+    Content-defined chunks of sorted names: a chunk ends after every name
+    whose crc32 is 0 modulo chunk_size, so chunks hold chunk_size names on
+    average and adding / removing a name only changes its own chunk.
+    Returns [(start, end)].
+    """
+    cuts = [i + 1 for i, name in enumerate(names) if zlib.crc32(name.encode()) % chunk_size == 0]
+    if not cuts or cuts[-1] != len(names):
+        cuts.append(len(names))
+    return list(zip([0] + cuts[:-1], cuts))
+
 
 class DotaDatastats:
     """
     Computes dataset statistics for YOLO-formatted labels:
     - per class counts
     - per class image counts
-    - bbox sizes and aspect ratios
-    - image-level object density
+    - bbox sizes and aspect ratios (means, percentiles, histograms)
+    - object size buckets (tiny / small / medium / large)
+    - image-level object density distribution
     - empty image identification
+
+    Label files are scanned in chunks by a process pool and folded into a
+    streaming StatsAccumulator, so memory stays bounded however many
+    tiles there are. image_size (tile side in px) converts normalized
+    boxes to pixels for the size buckets.
+
+    With label_store (a LabelStore directory), boxes come from the packed
+    store instead of the .txt files in label_dir.
+
+    Each chunk's StatsAccumulator is cached in cache_path with the names
+    and label size / mtime of its files. Chunks are content-defined (see
+    chunk_bounds, about chunk_size files each), so a re-run only re-parses
+    the chunks holding a changed, added or removed file and merges the
+    cached partials. The cache holds one fixed-size partial per chunk,
+    never the boxes themselves.
+
+    With profiler (a RunProfiler), compute() is recorded as a stage with
+    fingerprint / parse / merge sub-steps.
     """
-    def __init__(self, image_dir: str, label_dir: str, class_names: dict):
+    def __init__(
+        self,
+        image_dir: str,
+        label_dir: str,
+        class_names: dict,
+        label_store: str = None,
+        workers: int = 1,
+        image_size: int = 1024,
+        chunk_size: int = 1024,
+        cache_path: str = None,
+        profiler=None,
+    ):
         self.image_dir = image_dir
         self.label_dir = label_dir
         self.class_names = class_names
+        self.label_store = LabelStore.load(label_store) if label_store else None
+        self.workers = max(1, workers)
+        self.image_size = image_size
+        self.chunk_size = chunk_size
+        self.num_classes = max(class_names) + 1 if class_names else 1
+        self.cache_path = cache_path or os.path.join(
+            os.path.dirname(os.path.normpath(label_dir)), "stats_cache.pkl"
+        )
+        self.profiler = profiler
+
+    def _cache_key(self):
+        return {
+            "num_classes": self.num_classes,
+            "image_size": self.image_size,
+            "chunk_size": self.chunk_size,
+            "label_dir": os.path.abspath(self.label_dir),
+        }
 
-        # Stats containers
-        self.class_counts = defaultdict(int)
-        self.image_counts = defaultdict(int)
-        self.bbox_widths = defaultdict(list)
-        self.bbox_heights = defaultdict(list)
-        self.aspect_ratios = defaultdict(list)
-        self.objects_per_image = defaultdict(int)
-        self.empty_images = []
-
-    def _load_label(self, path):
+    def _load_cache(self):
+        if not os.path.exists(self.cache_path):
+            return {}
         try:
-            with open(path, "r") as f:
-                lines = [l.strip() for l in f.readlines() if l.strip()]
-            return lines
-        except:
-            return []
-    
-    def compute(self):
-        images = [f for f in os.listdir(self.image_dir) if f.lower().endswith(".jpg")]
-        total_images = len(images)
-
-        for img in images:
-            stem = img.replace(".jpg", "")
-            label_path = os.path.join(self.label_dir, stem + ".txt")
-
-            if not os.path.exists(label_path):
-                self.empty_images.append(img)
-                continue
-
-            lines = self._load_label(label_path)
-            if not lines:
-                self.empty_images.append(img)
-                continue
-
-            for line in lines:
-                cls, xc, yc, w, h = line.split()
-                cls = int(cls)
-                w, h = float(w), float(h)
-
-                self.class_counts[cls] += 1
-                self.image_counts[cls] += 1
-                self.objects_per_image[img] += 1
+            with open(self.cache_path, "rb") as f:
+                cache = pickle.load(f)
+        except Exception:
+            print("[WARN] Unreadable stats cache, rebuilding")
+            return {}
+        if cache.get("key") != self._cache_key():
+            return {}
+        return cache["chunks"]
+
+    def _save_cache(self, chunks):
+        tmp_path = self.cache_path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            pickle.dump(
+                {"key": self._cache_key(), "chunks": chunks}, f, protocol=pickle.HIGHEST_PROTOCOL
+            )
+        os.replace(tmp_path, self.cache_path)
+
+    def _label_stamps(self, images):
+        """
+        (n, 2) label size and mtime per image; -1, -1 without a label.
+        """
+        label_stats = {}
+        with os.scandir(self.label_dir) as it:
+            for entry in it:
+                if entry.name.endswith(".txt"):
+                    st = entry.stat()
+                    label_stats[entry.name] = (st.st_size, st.st_mtime_ns)
+        return np.array(
+            [label_stats.get(os.path.splitext(img)[0] + ".txt", (-1, -1)) for img in images],
+            dtype=np.int64,
+        ).reshape(-1, 2)
 
-                # Store bbox stats
-                self.bbox_widths[cls].append(w)
-                self.bbox_heights[cls].append(h)
-                self.aspect_ratios[cls].append(w / h if h > 0 else 0)
+    def compute(self):
+        with profile_stage(self.profiler, "stats") as stage:
+            return self._compute(stage)
+
+    def _compute(self, stage):
+        images = sorted(f for f in os.listdir(self.image_dir) if f.lower().endswith(TILE_EXTS))
+        stage.items = len(images)
+        bounds = chunk_bounds(images, self.chunk_size)
+        acc = StatsAccumulator(self.num_classes, self.image_size)
+
+        if self.label_store is not None:
+            with stage.step("parse", len(images)):
+                for start, end in bounds:
+                    chunk = images[start:end]
+                    acc.add_images(
+                        chunk,
+                        *self.label_store.gather([os.path.splitext(img)[0] for img in chunk]),
+                    )
+            return acc.summary()
+
+        with stage.step("fingerprint", len(images)):
+            stamps = self._label_stamps(images)
+            cached = self._load_cache()
+
+        # Chunks keyed by their first name: (names, stamps, partial)
+        chunks, stale = {}, []
+        for start, end in bounds:
+            names = images[start:end]
+            entry = cached.get(names[0])
+            if (
+                entry is not None and entry[0] == names
+                and np.array_equal(entry[1], stamps[start:end])
+            ):
+                chunks[names[0]] = entry
+            else:
+                stale.append((start, end))
+
+        n_stale = sum(end - start for start, end in stale)
+        print(
+            f"[INFO] Stats: re-parsing {len(stale)} of {len(bounds)} chunks "
+            f"({n_stale} of {len(images)} label files)"
+        )
+
+        with stage.step("parse", n_stale):
+            for (start, end), part in zip(stale, self._scan([images[s:e] for s, e in stale])):
+                chunks[images[start]] = (images[start:end], stamps[start:end], part)
+
+        with stage.step("merge", len(images)):
+            for start, _ in bounds:
+                acc.merge(chunks[images[start]][2])
+
+        if stale or len(cached) != len(chunks):
+            self._save_cache(chunks)
+        return acc.summary()
+
+    def _scan(self, chunks):
+        """
+        Yields one StatsAccumulator per chunk of image names, in order.
+        """
+        args = (self.num_classes, self.image_size)
+        if self.workers > 1 and len(chunks) > 1:
+            with ProcessPoolExecutor(max_workers=self.workers) as pool:
+                futures = [pool.submit(_scan_chunk, self.label_dir, chunk, *args) for chunk in chunks]
+                for future in futures:
+                    yield future.result()
+        else:
+            for chunk in chunks:
+                yield _scan_chunk(self.label_dir, chunk, *args)
 
-        return {
-            "total_images": total_images,
-            "total_objects": sum(self.class_counts.values()),
-            "class_counts": dict(self.class_counts),
-            "image_counts": dict(self.image_counts),
-            "bbox_width_avg": {c: float(np.mean(vals)) for c, vals in self.bbox_widths.items()},
-            "bbox_height_avg": {c: float(np.mean(vals)) for c, vals in self.bbox_heights.items()},
-            "aspect_ratio_avg": {c: float(np.mean(vals)) for c, vals in self.aspect_ratios.items()},
-            "objects_per_image": dict(self.objects_per_image),
-            "empty_images": self.empty_images,
-        }
-    
     def print_summary(self):
         stats = self.compute()
 
@@ -86,21 +208,35 @@ class DotaDatastats:
 
         print("\n--- Per-Class Object Counts ---")
         for cls, count in stats["class_counts"].items():
-            print(f"{cls} ({self.class_names.get(cls, 'Unknown')}): {count}")
+            print(f"{cls} ({self.class_names.get(cls, 'Unknown')}): {count} in {stats['image_counts'][cls]} images")
 
         print("\n--- Avg BBox Width/Height (Normalized) ---")
         for cls in stats["bbox_width_avg"]:
             print(f"{cls}: W={stats['bbox_width_avg'][cls]:.4f}, H={stats['bbox_height_avg'][cls]:.4f}")
 
+        print("\n--- BBox Width Percentiles (Normalized) ---")
+        for cls, pct in stats["bbox_width_percentiles"].items():
+            print(f"{cls}: " + ", ".join(f"{k}={v:.4f}" for k, v in pct.items()))
+
         print("\n--- Avg Aspect Ratio ---")
         for cls, ar in stats["aspect_ratio_avg"].items():
             print(f"{cls}: AR={ar:.4f}")
 
+        print(f"\n--- Object Sizes ({'/'.join(SIZE_BUCKETS)}) ---")
+        for cls, buckets in stats["size_buckets"].items():
+            print(f"{cls}: " + " / ".join(str(buckets[b]) for b in SIZE_BUCKETS))
+
+        density = stats["objects_per_image"]
+        print("\n--- Object Density ---")
+        print(
+            f"mean={density['mean']:.2f}, max={density['max']}, "
+            + ", ".join(f"{k}={v}" for k, v in density.items() if k.startswith("p"))
+        )
+
         print("\n--- Object Density (Top 10 images) ---")
-        densest = sorted(stats["objects_per_image"].items(), key=lambda x: x[1], reverse=True)[:10]
-        for img, count in densest:
+        for img, count in stats["densest_images"]:
             print(f"{img}: {count} objects")
 
         print("\n===== END OF DATASET SUMMARY =====\n")
 
-        return stats
\ No newline at end of file
+        return stats
@@ -0,0 +1,162 @@
+import os
+import json
+import hashlib
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+
+
+def _read_text(path):
+    try:
+        with open(path, "r") as f:
+            return f.read()
+    except FileNotFoundError:
+        return None
+
+
+def read_yolo_files(paths, workers: int = 4):
+    """
+    Bulk-parses YOLO .txt label files.
+    Returns (rows (N, 5) of class, xc, yc, w, h, per-file box counts,
+    per-file found flags). Lines without exactly 5 fields are skipped.
+    """
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        texts = list(pool.map(_read_text, paths))
+
+    tokens, counts = [], []
+    for text in texts:
+        n = 0
+        for line in (text or "").splitlines():
+            parts = line.split()
+            if len(parts) == 5:
+                tokens.extend(parts)
+                n += 1
+        counts.append(n)
+
+    return (
+        np.array(tokens, dtype=np.float64).reshape(-1, 5),
+        np.array(counts, dtype=np.int64),
+        np.array([text is not None for text in texts], dtype=bool),
+    )
+
+
+class LabelStore:
+    """
+    Packed YOLO labels for a whole dataset.
+
+    - boxes: (N, 6) float64 rows of image_id, class, xc, yc, w, h
+    - offsets: (n_images + 1,) int64, image i owns boxes[offsets[i]:offsets[i + 1]]
+    - names: label stems (file name without .txt), image_id = position
+
+    Saved as a directory (boxes.npy, offsets.npy, names.json) and loaded
+    memory-mapped, so readers never parse text. Pickling a loaded store
+    only sends its path; workers re-open the memory map.
+    """
+
+    def __init__(self, names, boxes, offsets, path: str = None):
+        self.names = list(names)
+        self.boxes = boxes
+        self.offsets = offsets
+        self.path = path
+        self._ids = {name: i for i, name in enumerate(self.names)}
+
+    def __len__(self):
+        return len(self.names)
+
+    def __contains__(self, name):
+        return name in self._ids
+
+    def __getstate__(self):
+        if self.path is not None:
+            return {"path": self.path}
+        return self.__dict__
+
+    def __setstate__(self, state):
+        if set(state) == {"path"}:
+            state = LabelStore.load(state["path"]).__dict__
+        self.__dict__.update(state)
+
+    @classmethod
+    def from_yolo_dir(cls, labels_dir: str, workers: int = 4):
+        """
+        Bulk import of a folder of YOLO .txt labels.
+        Lines without exactly 5 fields are skipped, as in the readers.
+        """
+        files = sorted(f for f in os.listdir(labels_dir) if f.endswith(".txt"))
+        rows, counts, _ = read_yolo_files(
+            [os.path.join(labels_dir, f) for f in files], workers
+        )
+
+        offsets = np.zeros(len(files) + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum(counts)
+        image_ids = np.repeat(np.arange(len(files)), counts).astype(np.float64)
+        boxes = np.column_stack([image_ids, rows])
+
+        names = [os.path.splitext(f)[0] for f in files]
+        print(f"[INFO] Packed {len(boxes)} boxes from {len(names)} label files")
+        return cls(names, boxes, offsets)
+
+    def save(self, path: str):
+        os.makedirs(path, exist_ok=True)
+        np.save(os.path.join(path, "boxes.npy"), self.boxes)
+        np.save(os.path.join(path, "offsets.npy"), self.offsets)
+        with open(os.path.join(path, "names.json"), "w") as f:
+            json.dump(self.names, f)
+        self.path = path
+
+    @classmethod
+    def load(cls, path: str):
+        with open(os.path.join(path, "names.json"), "r") as f:
+            names = json.load(f)
+        return cls(
+            names,
+            np.load(os.path.join(path, "boxes.npy"), mmap_mode="r"),
+            np.load(os.path.join(path, "offsets.npy"), mmap_mode="r"),
+            path=path,
+        )
+
+    def get(self, name):
+        """
+        (k, 5) array of class, xc, yc, w, h for one label stem,
+        or None if the store has no label file for it.
+        """
+        i = self._ids.get(name)
+        if i is None:
+            return None
+        return self.boxes[self.offsets[i]:self.offsets[i + 1], 1:]
+
+    def gather(self, names):
+        """
+        Boxes of many stems at once: (per-name counts, (sum(counts), 5)
+        rows of class, xc, yc, w, h). Unknown names count as 0 boxes.
+        """
+        ids = np.array([self._ids.get(name, -1) for name in names], dtype=np.int64)
+        found = ids >= 0
+        starts = np.where(found, self.offsets[ids], 0)
+        counts = np.where(found, self.offsets[ids + 1] - starts, 0)
+
+        rows = np.repeat(starts - np.cumsum(counts) + counts, counts)
+        rows += np.arange(len(rows))
+        return counts, np.asarray(self.boxes[rows, 1:])
+
+    def fingerprint(self, name):
+        boxes = self.get(name)
+        if boxes is None:
+            return None
+        return hashlib.sha1(np.ascontiguousarray(boxes).tobytes()).hexdigest()
+
+    def write_yolo(self, name, out_path):
+        boxes = self.get(name)
+        lines = [
+            f"{int(c)} {xc:.6f} {yc:.6f} {w:.6f} {h:.6f}"
+            for c, xc, yc, w, h in boxes.tolist()
+        ]
+        with open(out_path, "w") as f:
+            f.write("\n".join(lines))
+
+    def to_yolo_dir(self, out_dir: str, names=None):
+        """
+        Bulk export back to YOLO .txt files (all stems, or only names).
+        """
+        os.makedirs(out_dir, exist_ok=True)
+        for name in self.names if names is None else names:
+            self.write_yolo(name, os.path.join(out_dir, name + ".txt"))
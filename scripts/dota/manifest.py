@@ -0,0 +1,96 @@
+import os
+import json
+import hashlib
+
+
+def file_hash(path: str, chunk_size: int = 1 << 20):
+    """
+    SHA-1 of a file's content, or None if it does not exist.
+    """
+    if not os.path.exists(path):
+        return None
+
+    h = hashlib.sha1()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+class TilingManifest:
+    """
+    Records which scenes have been tiled, keyed by the content hash of
+    the source image and label plus the tiling parameters.
+
+    - <name>.json is a compacted snapshot (params + scenes)
+    - <name>.jsonl is a journal with one line per finished scene, so a
+      run that crashes part way resumes after the last completed scene
+    - If the parameters differ from the snapshot, every scene is stale
+    """
+
+    def __init__(self, path: str, params: dict):
+        self.path = path
+        self.journal_path = os.path.splitext(path)[0] + ".jsonl"
+        self.params = params
+        self.scenes = {}
+        self._load()
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+
+        with open(self.path, "r") as f:
+            snapshot = json.load(f)
+
+        if snapshot.get("params") != self.params:
+            print("[INFO] Tiling parameters changed, every scene is stale")
+            return
+
+        self.scenes = snapshot.get("scenes", {})
+
+        if os.path.exists(self.journal_path):
+            with open(self.journal_path, "r") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        # Last line of a crashed run may be cut short
+                        continue
+                    scene = entry.pop("scene")
+                    if entry.get("deleted"):
+                        self.scenes.pop(scene, None)
+                    else:
+                        self.scenes[scene] = entry
+
+    def is_current(self, scene, image_hash, label_hash):
+        entry = self.scenes.get(scene)
+        return (
+            entry is not None
+            and entry["image_hash"] == image_hash
+            and entry["label_hash"] == label_hash
+        )
+
+    def _append(self, entry):
+        with open(self.journal_path, "a") as f:
+            f.write(json.dumps(entry) + "\n")
+
+    def record(self, scene, image_hash, label_hash, n_tiles):
+        entry = {"image_hash": image_hash, "label_hash": label_hash, "tiles": n_tiles}
+        self.scenes[scene] = entry
+        self._append({"scene": scene, **entry})
+
+    def forget(self, scene):
+        if self.scenes.pop(scene, None) is not None:
+            self._append({"scene": scene, "deleted": True})
+
+    def save(self):
+        """
+        Writes the snapshot atomically and truncates the journal.
+        """
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"params": self.params, "scenes": self.scenes}, f)
+        os.replace(tmp_path, self.path)
+
+        if os.path.exists(self.journal_path):
+            os.remove(self.journal_path)
@@ -0,0 +1,225 @@
+import numpy as np
+from .tilegrid import grid_steps
+
+# Clip edges of a window (x0, y0, x1, y1): (axis, window column, keep >= bound)
+_CLIP_EDGES = ((0, 0, True), (0, 2, False), (1, 1, True), (1, 3, False))
+
+
+def _ring_next(counts, k):
+    """
+    (N, k) index of the next vertex in each polygon ring of counts[i] vertices.
+    """
+    i = np.arange(k)[None, :]
+    return np.where(i + 1 < counts[:, None], i + 1, 0)
+
+
+def clip_polygons(verts, counts, windows):
+    """
+    Sutherland-Hodgman clipping of N convex polygons, each against its own
+    axis-aligned window, in batch.
+
+    - verts: (N, K, 2), polygon i uses verts[i, :counts[i]]
+    - windows: (N, 4) x0, y0, x1, y1
+
+    Returns (verts, counts) of the clipped polygons; a quadrilateral
+    clipped by a rectangle has at most 8 vertices, and fully clipped
+    polygons get count 0. Unused vertex slots repeat vertex 0.
+    """
+    verts = np.asarray(verts, dtype=np.float64)
+    counts = np.asarray(counts, dtype=np.int64)
+    windows = np.asarray(windows, dtype=np.float64)
+    rows = np.arange(len(verts))[:, None]
+
+    for axis, col, keep_greater in _CLIP_EDGES:
+        k = verts.shape[1]
+        valid = np.arange(k)[None, :] < counts[:, None]
+        prev = np.where(np.arange(k)[None, :] == 0, counts[:, None] - 1, np.arange(k)[None, :] - 1)
+        prev = np.maximum(prev, 0)
+
+        cur_v = verts
+        prev_v = verts[rows, prev]
+        bound = windows[:, col][:, None]
+        if keep_greater:
+            cur_in, prev_in = cur_v[..., axis] >= bound, prev_v[..., axis] >= bound
+        else:
+            cur_in, prev_in = cur_v[..., axis] <= bound, prev_v[..., axis] <= bound
+
+        # Crossing point of edge prev -> cur with the clip line
+        d = cur_v[..., axis] - prev_v[..., axis]
+        t = np.divide(bound - prev_v[..., axis], d, out=np.zeros_like(d), where=d != 0)
+        cross = prev_v + t[..., None] * (cur_v - prev_v)
+        cross[..., axis] = np.broadcast_to(bound, cross[..., axis].shape)
+
+        # Each edge emits [crossing, current]: crossing if it crosses the
+        # line, current if it is inside
+        out = np.stack([cross, cur_v], axis=2).reshape(len(verts), 2 * k, 2)
+        emit = np.stack([valid & (cur_in != prev_in), valid & cur_in], axis=2).reshape(len(verts), 2 * k)
+
+        order = np.argsort(~emit, axis=1, kind="stable")[:, :k + 1]
+        verts = out[rows, order]
+        counts = emit.sum(axis=1)
+
+    # Repeat vertex 0 in unused slots so extents / areas ignore them
+    unused = np.arange(verts.shape[1])[None, :] >= counts[:, None]
+    verts = np.where(unused[..., None], verts[:, :1], verts)
+    return verts, counts
+
+
+def polygon_area(verts, counts):
+    """
+    (N,) shoelace areas of polygons in the clip_polygons layout.
+    """
+    k = verts.shape[1]
+    nxt = verts[np.arange(len(verts))[:, None], _ring_next(counts, k)]
+    cross = verts[..., 0] * nxt[..., 1] - nxt[..., 0] * verts[..., 1]
+    cross = np.where(np.arange(k)[None, :] < counts[:, None], cross, 0.0)
+    return np.abs(cross.sum(axis=1)) / 2
+
+
+def min_area_rect(verts, counts, windows=None):
+    """
+    (N, 4, 2) corners of the minimum-area rectangle around each convex
+    polygon. One side of that rectangle lies on a polygon edge, so every
+    edge direction is tried at once and the smallest box is kept.
+
+    With windows ((N, 4) x0, y0, x1, y1), only rectangles lying inside
+    their window are kept; a polygon clipped by its window always has the
+    axis-aligned box as a fallback (it has an edge on the window border).
+    Polygons with no such rectangle get NaN corners.
+    """
+    n, k = verts.shape[:2]
+    rows = np.arange(n)[:, None]
+    edges = verts[rows, _ring_next(counts, k)] - verts
+    length = np.linalg.norm(edges, axis=2)
+    u = np.divide(edges, length[..., None], out=np.zeros_like(edges), where=length[..., None] > 1e-9)
+    v = np.stack([-u[..., 1], u[..., 0]], axis=2)
+
+    # (N, edges, vertices) projections
+    pu = np.einsum("nek,nvk->nev", u, verts)
+    pv = np.einsum("nek,nvk->nev", v, verts)
+    umin, umax = pu.min(axis=2), pu.max(axis=2)
+    vmin, vmax = pv.min(axis=2), pv.max(axis=2)
+    area = (umax - umin) * (vmax - vmin)
+    usable = (np.arange(k)[None, :] < counts[:, None]) & (length > 1e-9)
+
+    # (N, edges, 4 corners, 2) candidate rectangles
+    candidates = np.stack([
+        umin[..., None] * u + vmin[..., None] * v,
+        umax[..., None] * u + vmin[..., None] * v,
+        umax[..., None] * u + vmax[..., None] * v,
+        umin[..., None] * u + vmax[..., None] * v,
+    ], axis=2)
+    if windows is not None:
+        lo = windows[:, None, None, :2]
+        hi = windows[:, None, None, 2:]
+        usable &= ((candidates >= lo) & (candidates <= hi)).all(axis=(2, 3))
+
+    best = np.where(usable, area, np.inf).argmin(axis=1)
+    corners = candidates[np.arange(n), best]
+    corners[~usable.any(axis=1)] = np.nan
+    return corners
+
+
+def _tile_range(lo, hi, n_steps, tile_size, stride):
+    """
+    First tile step and number of steps whose window overlaps [lo, hi].
+    Tile k spans [k * stride, k * stride + tile_size]; a pair lost to
+    float rounding would only touch the window, and clip to zero area.
+    """
+    first = np.clip(np.floor((lo - tile_size) / stride).astype(np.int64) + 1, 0, n_steps)
+    last = np.clip(np.ceil(hi / stride).astype(np.int64) - 1, -1, n_steps - 1)
+    return first, np.maximum(last - first + 1, 0)
+
+
+def plan_obb_tiles(
+    stem,
+    rows,
+    img_w,
+    img_h,
+    tile_size,
+    stride,
+    min_box_size,
+    min_area_ratio: float = 0.5,
+    ext: str = ".jpg",
+):
+    """
+    OBB counterpart of YoloTiler._plan_tiles for rows of
+    "cls x1 y1 x2 y2 x3 y3 x4 y4" (normalized to the scene).
+
+    Every (polygon, tile) pair of the scene is clipped in one batch.
+    A polygon is kept in a tile when the clipped part keeps at least
+    min_area_ratio of its area and its extent is at least min_box_size
+    on both axes. Untouched polygons keep their 4 corners; truncated ones
+    are replaced by the smallest rectangle around the clipped part that
+    fits in the tile (corners are never clamped, which would distort it).
+    Returns [(tile_name, window, label_lines, 1.0)].
+    """
+    rows = np.asarray(rows, dtype=np.float64).reshape(-1, 9)
+    cls = rows[:, 0].astype(np.int64)
+    polys = rows[:, 1:].reshape(-1, 4, 2) * [img_w, img_h]
+
+    x_steps, y_steps = (max(s, 0) for s in grid_steps(img_w, img_h, tile_size, stride))
+    if not len(polys) or not x_steps or not y_steps:
+        return []
+
+    # Every candidate (polygon, tile) pair from the polygons' extents
+    xf, xn = _tile_range(polys[..., 0].min(1), polys[..., 0].max(1), x_steps, tile_size, stride)
+    yf, yn = _tile_range(polys[..., 1].min(1), polys[..., 1].max(1), y_steps, tile_size, stride)
+    per_poly = xn * yn
+    pid = np.repeat(np.arange(len(polys)), per_poly)
+    local = np.arange(len(pid)) - np.repeat(np.cumsum(per_poly) - per_poly, per_poly)
+    xi = xf[pid] + local % np.maximum(xn[pid], 1)
+    yi = yf[pid] + local // np.maximum(xn[pid], 1)
+
+    x0, y0 = xi * stride, yi * stride
+    windows = np.stack(
+        [x0, y0, np.minimum(x0 + tile_size, img_w), np.minimum(y0 + tile_size, img_h)], axis=1
+    ).astype(np.float64)
+    ok = (windows[:, 2] > windows[:, 0]) & (windows[:, 3] > windows[:, 1])
+    pid, xi, yi, windows = pid[ok], xi[ok], yi[ok], windows[ok]
+
+    # Polygons wholly inside their tile keep their 4 corners; only the
+    # cut ones are clipped, and replaced by a rectangle if they are kept
+    inside = (
+        (polys[pid, :, 0] >= windows[:, None, 0]) & (polys[pid, :, 0] <= windows[:, None, 2])
+        & (polys[pid, :, 1] >= windows[:, None, 1]) & (polys[pid, :, 1] <= windows[:, None, 3])
+    ).all(axis=1)
+    cut = np.flatnonzero(~inside)
+    verts, counts = clip_polygons(polys[pid[cut]], np.full(len(cut), 4), windows[cut])
+    # Interpolated crossings can overshoot the window by an ulp
+    verts = np.clip(verts, windows[cut, None, :2], windows[cut, None, 2:])
+    full_area = polygon_area(polys, np.full(len(polys), 4))
+
+    corners = polys[pid]
+    extent = corners.max(axis=1) - corners.min(axis=1)
+    extent[cut] = verts.max(axis=1) - verts.min(axis=1)
+    keep = (extent[:, 0] >= min_box_size) & (extent[:, 1] >= min_box_size)
+    keep[cut] &= (counts >= 3) & (
+        polygon_area(verts, counts) >= min_area_ratio * np.maximum(full_area[pid[cut]], 1e-9)
+    )
+    kept_cut = cut[keep[cut]]
+    corners[kept_cut] = min_area_rect(verts[keep[cut]], counts[keep[cut]], windows[kept_cut])
+    keep[kept_cut] &= ~np.isnan(corners[kept_cut]).any(axis=(1, 2))
+    pid, xi, yi, windows, corners = pid[keep], xi[keep], yi[keep], windows[keep], corners[keep]
+    size = windows[:, 2:] - windows[:, :2]
+    corners = (corners - windows[:, None, :2]) / size[:, None, :]
+
+    # Row-major tiles, label file order inside each tile
+    order = np.lexsort((pid, xi, yi))
+    pid, xi, yi, windows, corners = pid[order], xi[order], yi[order], windows[order], corners[order]
+    tile_key = yi * x_steps + xi
+    starts = np.flatnonzero(np.r_[True, tile_key[1:] != tile_key[:-1]])
+    ends = np.r_[starts[1:], len(tile_key)]
+
+    fmt = "{} " + " ".join(["{:.6f}"] * 8)
+    label_rows = [fmt.format(c, *v) for c, v in zip(cls[pid].tolist(), corners.reshape(-1, 8).tolist())]
+    plan = []
+    for s, e in zip(starts.tolist(), ends.tolist()):
+        lines = label_rows[s:e]
+        plan.append((
+            f"{stem}_x{xi[s]}_y{yi[s]}{ext}",
+            tuple(int(v) for v in windows[s]),
+            lines,
+            1.0,
+        ))
+    return plan
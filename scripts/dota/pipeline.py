@@ -0,0 +1,209 @@
+import os
+import json
+import hashlib
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+
+def _is_within(path, root):
+    return path == root or path.startswith(root.rstrip(os.sep) + os.sep)
+
+
+def path_fingerprint(path: str):
+    """
+    SHA-1 over (relative path, size, mtime) of a file or of every file
+    under a directory; "missing" if the path does not exist. Stat only,
+    file contents are never read.
+    """
+    if not os.path.exists(path):
+        return "missing"
+
+    h = hashlib.sha1()
+    if os.path.isfile(path):
+        st = os.stat(path)
+        h.update(f"{st.st_size}:{st.st_mtime_ns}".encode())
+        return h.hexdigest()
+
+    stack = [path]
+    entries = []
+    while stack:
+        with os.scandir(stack.pop()) as it:
+            for entry in it:
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(entry.path)
+                else:
+                    st = entry.stat()
+                    entries.append(f"{os.path.relpath(entry.path, path)}:{st.st_size}:{st.st_mtime_ns}")
+    for line in sorted(entries):
+        h.update(line.encode() + b"\n")
+    return h.hexdigest()
+
+
+class PipelineStage:
+    """
+    One step of a Pipeline.
+
+    - run: callable without arguments doing the work
+    - inputs / outputs: files or directories it reads / writes
+    - params: JSON-serializable settings that change its result
+
+    A stage depends on every stage whose outputs contain, or sit inside,
+    one of its inputs.
+    """
+    def __init__(self, name: str, run, inputs=(), outputs=(), params: dict = None):
+        self.name = name
+        self.run = run
+        self.inputs = [os.path.abspath(p) for p in inputs]
+        self.outputs = [os.path.abspath(p) for p in outputs]
+        self.params = params or {}
+
+    def fingerprint(self):
+        h = hashlib.sha1(json.dumps(self.params, sort_keys=True, default=str).encode())
+        for path in self.inputs:
+            h.update(f"{path}:{path_fingerprint(path)}\n".encode())
+        return h.hexdigest()
+
+    def outputs_fingerprint(self):
+        return {path: path_fingerprint(path) for path in self.outputs}
+
+
+class Pipeline:
+    """
+    Runs PipelineStages as a DAG, make style.
+
+    - Each stage is fingerprinted from its params and the stat of its
+      inputs (upstream outputs included) once its upstream stages are done
+    - A stage is skipped when its fingerprint matches the last successful
+      run in state_path and its outputs are unchanged since then
+    - Stages whose upstream stages are done run concurrently in a thread
+      pool of max_parallel (the stages themselves use process pools)
+    - A failed stage stops its downstream stages only; the others finish
+      and the error is raised at the end
+
+    Stages stay incremental inside: a relabel re-runs convert, and the
+    tiler manifest / stats cache then only redo the affected scenes.
+    """
+    def __init__(self, stages, state_path: str, max_parallel: int = 2):
+        self.stages = {s.name: s for s in stages}
+        assert len(self.stages) == len(stages), "stage names must be unique"
+        self.state_path = state_path
+        self.max_parallel = max(1, max_parallel)
+        self.deps = self._resolve_deps()
+        self.state = self._load_state()
+        self._lock = threading.Lock()
+
+    def _resolve_deps(self):
+        deps = {}
+        for name, stage in self.stages.items():
+            deps[name] = {
+                other.name
+                for other in self.stages.values()
+                if other is not stage and any(
+                    _is_within(i, o) or _is_within(o, i)
+                    for i in stage.inputs for o in other.outputs
+                )
+            }
+
+        # Cycle check (Kahn)
+        remaining = {name: set(d) for name, d in deps.items()}
+        while remaining:
+            ready = [name for name, d in remaining.items() if not d]
+            assert ready, f"pipeline has a cycle between {sorted(remaining)}"
+            for name in ready:
+                del remaining[name]
+            for d in remaining.values():
+                d.difference_update(ready)
+        return deps
+
+    def _load_state(self):
+        if os.path.exists(self.state_path):
+            with open(self.state_path, "r") as f:
+                return json.load(f)
+        return {}
+
+    def _save_state(self):
+        os.makedirs(os.path.dirname(os.path.abspath(self.state_path)), exist_ok=True)
+        tmp_path = self.state_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self.state, f, indent=2)
+        os.replace(tmp_path, self.state_path)
+
+    def _run_stage(self, stage, force):
+        fingerprint = stage.fingerprint()
+        previous = self.state.get(stage.name, {})
+        if (
+            not force
+            and previous.get("fingerprint") == fingerprint
+            and previous.get("outputs") == stage.outputs_fingerprint()
+        ):
+            print(f"[INFO] {stage.name}: up to date, skipped")
+            return "skipped"
+
+        print(f"[INFO] {stage.name}: running")
+        t0 = time.perf_counter()
+        stage.run()
+        wall = time.perf_counter() - t0
+
+        with self._lock:
+            self.state[stage.name] = {
+                "fingerprint": fingerprint,
+                "outputs": stage.outputs_fingerprint(),
+                "wall_s": wall,
+                "finished": time.strftime("%Y-%m-%d %H:%M:%S"),
+            }
+            self._save_state()
+        print(f"[INFO] {stage.name}: done in {wall:.1f}s")
+        return "ran"
+
+    def run(self, only=None, force=()):
+        """
+        Runs every stage (or only those named, plus their upstream
+        stages) and returns {stage: "ran" | "skipped" | "failed" |
+        "blocked"}. Stages named in force run even when up to date.
+        """
+        wanted = set(self.stages)
+        if only:
+            wanted, todo = set(), list(only)
+            while todo:
+                name = todo.pop()
+                if name not in wanted:
+                    wanted.add(name)
+                    todo.extend(self.deps[name])
+
+        status, errors, running = {}, {}, {}
+        with ThreadPoolExecutor(max_workers=self.max_parallel) as pool:
+            while len(status) < len(wanted):
+                for name in sorted(wanted):
+                    if name in status or name in running.values():
+                        continue
+                    deps = self.deps[name] & wanted
+                    if any(status.get(d) in ("failed", "blocked") for d in deps):
+                        status[name] = "blocked"
+                    elif all(status.get(d) in ("ran", "skipped") for d in deps):
+                        future = pool.submit(self._run_stage, self.stages[name], name in force)
+                        running[future] = name
+
+                if not running:
+                    continue
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    try:
+                        status[name] = future.result()
+                    except Exception as e:
+                        status[name] = "failed"
+                        errors[name] = e
+                        print(f"[WARN] {name}: failed ({type(e).__name__}: {e})")
+
+        print("\n===== PIPELINE =====")
+        for name in sorted(wanted, key=list(self.stages).index):
+            print(f"{name:<10} {status[name]}")
+
+        if errors:
+            name, error = next(iter(errors.items()))
+            raise RuntimeError(f"pipeline stage {name} failed") from error
+        print("[DONE] Pipeline complete")
+
+        return status
@@ -0,0 +1,144 @@
+import math
+import zlib
+import numpy as np
+from .tilegrid import SceneBoxes, format_yolo_lines, grid_steps, tile_windows
+
+
+class TilePlanner:
+    """
+    Chooses which tiles YoloTiler emits from a per-scene density map
+    (kept boxes per grid tile), instead of every tile that has a box.
+
+    - Sparse tiles (at most dense_objects boxes) are all kept
+    - Dense tiles are picked greedily, the one with the most boxes not
+      yet in a kept tile first, while a tile still brings at least
+      min_new_fraction unseen boxes and until dense_keep of them are
+      kept; a packed parking lot yields a few representative tiles
+      instead of every overlapping one
+    - background_ratio x (kept object tiles) empty tiles are sampled per
+      scene, deterministic for a seed and scene, and written with empty
+      label files so training sees background
+    - pyramid_scales (e.g. (0.5,)) add downscaled levels: windows of
+      tile_size / scale resized to tile_size, kept only where they fully
+      hold a box whose long side is at least large_object x tile_size,
+      i.e. objects a base tile would cut. They are named
+      <stem>_x{xi}_y{yi}_s{percent}<ext>
+
+    plan() returns [(tile_name, (x0, y0, x1, y1), label_lines, scale)]
+    in scene coordinates, base level first, each level row-major.
+    """
+    def __init__(
+        self,
+        background_ratio: float = 0.1,
+        dense_objects: int = 50,
+        dense_keep: float = 0.5,
+        min_new_fraction: float = 0.25,
+        pyramid_scales=(),
+        large_object: float = 0.5,
+        seed: int = 0,
+    ):
+        assert background_ratio >= 0, "background_ratio must be >= 0"
+        assert 0 < dense_keep <= 1, "dense_keep must be in (0, 1]"
+        for scale in pyramid_scales:
+            assert 0 < scale < 1, "pyramid scales must be in (0, 1)"
+        self.background_ratio = background_ratio
+        self.dense_objects = dense_objects
+        self.dense_keep = dense_keep
+        self.min_new_fraction = min_new_fraction
+        self.pyramid_scales = tuple(pyramid_scales)
+        self.large_object = large_object
+        self.seed = seed
+
+    def params(self):
+        # Part of the tiling manifest params: changing them re-tiles
+        return {
+            "background_ratio": self.background_ratio,
+            "dense_objects": self.dense_objects,
+            "dense_keep": self.dense_keep,
+            "min_new_fraction": self.min_new_fraction,
+            "pyramid_scales": list(self.pyramid_scales),
+            "large_object": self.large_object,
+            "seed": self.seed,
+        }
+
+    @staticmethod
+    def _grid(scene, img_w, img_h, tile_size, stride, min_box_size):
+        """
+        [(xi, yi, window, box ids, label lines)] for every grid tile.
+        """
+        tiles = []
+        for xi, yi, x0, y0, x1, y1 in tile_windows(img_w, img_h, tile_size, stride):
+            if x1 <= x0 or y1 <= y0:
+                continue
+            ids, xc, yc, w, h = scene.assign_ids(xi, yi, x0, y0, x1, y1, min_box_size)
+            tiles.append((xi, yi, (x0, y0, x1, y1), ids, format_yolo_lines(scene.cls[ids], xc, yc, w, h)))
+        return tiles
+
+    def density_map(self, boxes, img_w, img_h, tile_size, stride, min_box_size):
+        """
+        (y_steps, x_steps) count of boxes kept in each grid tile.
+        """
+        scene = SceneBoxes(boxes, img_w, img_h, tile_size, stride)
+        x_steps, y_steps = grid_steps(img_w, img_h, tile_size, stride)
+        density = np.zeros((max(y_steps, 0), max(x_steps, 0)), dtype=np.int64)
+        for xi, yi, _, ids, _ in self._grid(scene, img_w, img_h, tile_size, stride, min_box_size):
+            density[yi, xi] = len(ids)
+        return density
+
+    def _select(self, stem, tiles):
+        counts = [len(ids) for _, _, _, ids, _ in tiles]
+        keep = {i for i, n in enumerate(counts) if 0 < n <= self.dense_objects}
+        seen = set()
+        for i in keep:
+            seen.update(tiles[i][3].tolist())
+
+        dense = {i: set(tiles[i][3].tolist()) for i, n in enumerate(counts) if n > self.dense_objects}
+        budget = math.ceil(self.dense_keep * len(dense))
+        while dense and budget:
+            best = max(dense, key=lambda i: (len(dense[i] - seen), -i))
+            if len(dense[best] - seen) < self.min_new_fraction * len(dense[best]):
+                break
+            keep.add(best)
+            seen |= dense.pop(best)
+            budget -= 1
+
+        empty = [i for i, n in enumerate(counts) if n == 0]
+        n_background = min(len(empty), round(self.background_ratio * len(keep)))
+        if n_background:
+            rng = np.random.default_rng([self.seed, zlib.crc32(stem.encode())])
+            keep.update(empty[j] for j in rng.choice(len(empty), n_background, replace=False))
+
+        return sorted(keep)
+
+    def plan(self, stem, boxes, img_w, img_h, tile_size, stride, min_box_size, ext=".jpg"):
+        scene = SceneBoxes(boxes, img_w, img_h, tile_size, stride)
+        tiles = self._grid(scene, img_w, img_h, tile_size, stride, min_box_size)
+        plan = [
+            (f"{stem}_x{xi}_y{yi}{ext}", window, lines, 1.0)
+            for xi, yi, window, _, lines in (tiles[i] for i in self._select(stem, tiles))
+        ]
+
+        long_side = np.maximum(scene.xmax - scene.xmin, scene.ymax - scene.ymin)
+        large = long_side >= self.large_object * tile_size
+        if not large.any():
+            return plan
+
+        for scale in self.pyramid_scales:
+            level_size, level_stride = round(tile_size / scale), round(stride / scale)
+            level = SceneBoxes(boxes, img_w, img_h, level_size, level_stride)
+            for xi, yi, (x0, y0, x1, y1), ids, lines in self._grid(
+                level, img_w, img_h, level_size, level_stride, min_box_size / scale
+            ):
+                inside = (
+                    (level.xmin[ids] >= x0) & (level.ymin[ids] >= y0)
+                    & (level.xmax[ids] <= x1) & (level.ymax[ids] <= y1)
+                )
+                if (large[ids] & inside).any():
+                    plan.append((
+                        f"{stem}_x{xi}_y{yi}_s{round(scale * 100)}{ext}",
+                        (x0, y0, x1, y1),
+                        lines,
+                        scale,
+                    ))
+
+        return plan
@@ -0,0 +1,210 @@
+import os
+import json
+import time
+import cProfile
+import resource
+from contextlib import contextmanager
+
+
+def proc_status_kb(field):
+    """
+    A kB field of /proc/self/status (VmRSS, VmHWM, ...), 0 if unavailable.
+    """
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith(field + ":"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return 0
+
+
+def reset_peak_rss():
+    # Linux: resets VmHWM to the current RSS
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+    except OSError:
+        pass
+
+
+def proc_io():
+    """
+    (bytes read, bytes written) by this process through read/write
+    calls, page cache included (/proc/self/io rchar / wchar).
+    """
+    try:
+        with open("/proc/self/io") as f:
+            fields = dict(line.split(": ") for line in f.read().splitlines())
+        return int(fields["rchar"]), int(fields["wchar"])
+    except (OSError, KeyError, ValueError):
+        return 0, 0
+
+
+def _rusage():
+    self_, children = (
+        resource.getrusage(resource.RUSAGE_SELF),
+        resource.getrusage(resource.RUSAGE_CHILDREN),
+    )
+    return {
+        "cpu_s": sum(r.ru_utime + r.ru_stime for r in (self_, children)),
+        # Block I/O that reached the device, in 512-byte units
+        "disk_read_bytes": sum(r.ru_inblock for r in (self_, children)) * 512,
+        "disk_write_bytes": sum(r.ru_oublock for r in (self_, children)) * 512,
+    }
+
+
+class StepTimer:
+    """
+    Wall time and item counts per named sub-step.
+
+    Cheap enough to create per task in a pool worker; report() returns a
+    plain dict the parent merges into its Stage.
+    """
+    def __init__(self):
+        self.steps = {}
+
+    @contextmanager
+    def step(self, name, items: int = 1):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - t0, items)
+
+    def add(self, name, seconds, items: int = 1):
+        entry = self.steps.setdefault(name, [0.0, 0])
+        entry[0] += seconds
+        entry[1] += items
+
+    def report(self):
+        return {"steps": self.steps, "peak_rss_kb": proc_status_kb("VmHWM")}
+
+
+class Stage:
+    """
+    Metrics of one pipeline stage being run. Code under measurement
+    times its sub-steps with step(), counts items, and merges the
+    StepTimer reports returned by pool workers with add_report().
+    Worker step times are summed, so they can exceed the stage wall time.
+    """
+    def __init__(self, name):
+        self.name = name
+        self.items = 0
+        self.timer = StepTimer()
+        self.worker_peak_kb = 0
+
+    def step(self, name, items: int = 1):
+        return self.timer.step(name, items)
+
+    def add_report(self, report):
+        if not report:
+            return
+        for name, (seconds, items) in report["steps"].items():
+            self.timer.add(name, seconds, items)
+        self.worker_peak_kb = max(self.worker_peak_kb, report["peak_rss_kb"])
+
+
+@contextmanager
+def profile_stage(profiler, name):
+    """
+    profiler.stage(name) or, without a profiler, a Stage nobody reads,
+    so instrumented code needs no branches.
+    """
+    if profiler is None:
+        yield Stage(name)
+    else:
+        with profiler.stage(name) as stage:
+            yield stage
+
+
+class RunProfiler:
+    """
+    Per-stage instrumentation shared by the preprocessing pipeline.
+
+    For every stage:
+    - wall and CPU time (this process + finished worker processes)
+    - bytes read / written through read / write calls, page cache
+      included, and block I/O that reached the disk; Linux adds the I/O
+      of pool workers to this process once the pool has shut down
+    - items processed and items / s
+    - peak RSS of this process and of its workers
+    - sub-steps (e.g. decode / assign / encode / write in the tiler)
+
+    Each finished stage is appended as one JSON line to report_path and
+    kept in self.records. With profile_dir, each stage also runs under
+    cProfile (main process only) and is dumped to <profile_dir>/<stage>.prof.
+    """
+    def __init__(self, report_path: str = None, profile_dir: str = None, run_id: str = None):
+        self.report_path = report_path
+        self.profile_dir = profile_dir
+        self.run_id = run_id or time.strftime("%Y%m%d-%H%M%S")
+        self.records = []
+
+    @contextmanager
+    def stage(self, name):
+        stage = Stage(name)
+        reset_peak_rss()
+        usage0 = _rusage()
+        io0 = proc_io()
+
+        profiler = None
+        if self.profile_dir:
+            profiler = cProfile.Profile()
+            profiler.enable()
+
+        t0 = time.perf_counter()
+        error = None
+        try:
+            yield stage
+        except BaseException as e:
+            error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            wall = time.perf_counter() - t0
+            if profiler is not None:
+                profiler.disable()
+                os.makedirs(self.profile_dir, exist_ok=True)
+                profiler.dump_stats(os.path.join(self.profile_dir, f"{name}.prof"))
+
+            usage = _rusage()
+            io = proc_io()
+            record = {
+                "run": self.run_id,
+                "stage": name,
+                "wall_s": wall,
+                "cpu_s": usage["cpu_s"] - usage0["cpu_s"],
+                "items": stage.items,
+                "items_per_s": stage.items / wall if wall > 0 else 0.0,
+                "read_bytes": io[0] - io0[0],
+                "write_bytes": io[1] - io0[1],
+                "disk_read_bytes": usage["disk_read_bytes"] - usage0["disk_read_bytes"],
+                "disk_write_bytes": usage["disk_write_bytes"] - usage0["disk_write_bytes"],
+                "peak_rss_mb": proc_status_kb("VmHWM") / 1024,
+                "worker_peak_rss_mb": stage.worker_peak_kb / 1024,
+                "steps": {
+                    step: {"seconds": seconds, "items": items}
+                    for step, (seconds, items) in stage.timer.steps.items()
+                },
+                "error": error,
+            }
+            self.records.append(record)
+
+            if self.report_path:
+                os.makedirs(os.path.dirname(os.path.abspath(self.report_path)), exist_ok=True)
+                with open(self.report_path, "a") as f:
+                    f.write(json.dumps(record) + "\n")
+
+    def print_summary(self):
+        print(f"\n===== RUN PROFILE {self.run_id} =====")
+        for r in self.records:
+            print(
+                f"{r['stage']}: {r['wall_s']:.2f}s wall, {r['cpu_s']:.2f}s cpu, "
+                f"{r['items']} items ({r['items_per_s']:.1f}/s), "
+                f"read {r['read_bytes'] / 1e6:.1f} MB, wrote {r['write_bytes'] / 1e6:.1f} MB, "
+                f"peak RSS {max(r['peak_rss_mb'], r['worker_peak_rss_mb']):.0f} MB"
+            )
+            for step, s in r["steps"].items():
+                print(f"  {step:<10} {s['seconds']:8.2f}s  x{s['items']}")
+        print("===== END OF RUN PROFILE =====\n")
@@ -0,0 +1,95 @@
+import os
+import cv2
+import numpy as np
+
+
+class FullSceneReader:
+    """
+    Decodes the whole scene with cv2.imread and serves row bands as views.
+    """
+
+    def __init__(self, img_path: str):
+        self.image = cv2.imread(img_path)
+        self.shape = None if self.image is None else self.image.shape
+
+    def read_band(self, y0, y1):
+        return self.image[y0:y1]
+
+    def close(self):
+        self.image = None
+
+
+class CachedSceneReader:
+    """
+    Reads row bands from an uncompressed .npy copy of the scene.
+
+    - The cache is written once per scene (the only full decode) and
+      rebuilt when the source image is newer
+    - Each band is read with a plain seek + read, so only
+      (y1 - y0) x width x channels bytes are resident at a time
+    """
+
+    def __init__(self, img_path: str, cache_dir: str):
+        stem = os.path.splitext(os.path.basename(img_path))[0]
+        self.cache_path = os.path.join(cache_dir, stem + ".npy")
+        self.shape = None
+        self._file = None
+
+        if not self._cache_valid(img_path) and not self._build(img_path):
+            return
+
+        self._file = open(self.cache_path, "rb")
+        if np.lib.format.read_magic(self._file) == (1, 0):
+            header = np.lib.format.read_array_header_1_0(self._file)
+        else:
+            header = np.lib.format.read_array_header_2_0(self._file)
+        self.shape, _, self.dtype = header
+        self._data_offset = self._file.tell()
+        self._row_bytes = int(np.prod(self.shape[1:])) * self.dtype.itemsize
+
+    def _cache_valid(self, img_path):
+        return (
+            os.path.exists(self.cache_path)
+            and os.path.getmtime(self.cache_path) >= os.path.getmtime(img_path)
+        )
+
+    def _build(self, img_path):
+        image = cv2.imread(img_path)
+        if image is None:
+            return False
+
+        os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+        tmp_path = self.cache_path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            np.save(f, image)
+        os.replace(tmp_path, self.cache_path)
+        return True
+
+    def read_band(self, y0, y1):
+        self._file.seek(self._data_offset + y0 * self._row_bytes)
+        count = (y1 - y0) * self._row_bytes // self.dtype.itemsize
+        band = np.fromfile(self._file, dtype=self.dtype, count=count)
+        return band.reshape((y1 - y0,) + tuple(self.shape[1:]))
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+def open_scene(img_path: str, read_mode: str = "full", cache_dir: str = None):
+    """
+    Returns a scene reader, or None if the image cannot be decoded.
+    read_mode: "full" (cv2.imread) or "windowed" (banded cache reads).
+    """
+    if read_mode == "full":
+        reader = FullSceneReader(img_path)
+    elif read_mode == "windowed":
+        reader = CachedSceneReader(img_path, cache_dir)
+    else:
+        raise ValueError(f"Unknown read_mode: {read_mode}")
+
+    if reader.shape is None:
+        reader.close()
+        return None
+    return reader
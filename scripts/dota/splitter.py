@@ -1,49 +1,203 @@
 import os
+import json
+import fcntl
 import random
 import shutil
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from .labelstore import LabelStore
+from .profiling import profile_stage
+from .tilecodec import TILE_EXTS
+
+SPLIT_MODES = ("copy", "hardlink", "reflink", "list")
+
+# Linux ioctl that clones a file's extents (btrfs, xfs, ...)
+FICLONE = 0x40049409
+
+
+def _reflink(src, dst):
+    with open(src, "rb") as fsrc, open(dst, "wb") as fdst:
+        fcntl.ioctl(fdst.fileno(), FICLONE, fsrc.fileno())
+    shutil.copystat(src, dst)
+
+
+def _set_yaml_keys(path, values):
+    """
+    Rewrites the top-level "key: value" lines of a YAML file for the keys
+    in values, appending missing keys; every other line (comments,
+    names, path) is kept as is.
+    """
+    with open(path, "r") as f:
+        lines = f.read().splitlines()
+
+    # A JSON string is a valid double-quoted YAML scalar for any path
+    def entry(key, value):
+        return f"{key}: {json.dumps(value)}"
+
+    pending = dict(values)
+    for i, line in enumerate(lines):
+        key = line.split(":", 1)[0]
+        if key in pending and ":" in line:
+            lines[i] = entry(key, pending.pop(key))
+    lines.extend(entry(key, value) for key, value in pending.items())
+
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        f.write("\n".join(lines) + "\n")
+    os.replace(tmp_path, path)
+
+
+def split_names(names, val_ratio: float, seed: int):
+    """
+    (train, val) lists of names. Names are sorted before the seeded
+    shuffle, so the split does not depend on directory listing order.
+    """
+    names = sorted(names)
+    random.Random(seed).shuffle(names)
+    split_idx = int(len(names) * (1 - val_ratio))
+    return names[:split_idx], names[split_idx:]
+
 
 class TrainValSplitter:
     """
     Splits a YOLO tiled dataset into train / val sets.
+
+    mode:
+    - "copy": copies images / labels (shutil.copy2)
+    - "hardlink" / "reflink": links or clones them, falling back to a
+      copy where the filesystem does not support it
+    - "list": writes only train.txt / val.txt image lists (ultralytics
+      finds labels by swapping /images/ for /labels/), and points the
+      train / val lines of data_yaml at them if given (other lines and
+      comments are kept)
+
+    Copies and links run in a thread pool. Materialized splits are
+    cleared first, so re-splitting with another seed / ratio never
+    leaves a tile in both sets.
+
+    With label_store (a LabelStore directory), split labels are exported
+    from the packed store instead of copied from labels_dir. List mode
+    has no split labels to export, so it cannot take a label_store.
+
+    With profiler (a RunProfiler), split() is recorded as a stage with
+    list / clear / place sub-steps.
     """
-    def __init__(self, images_dir: str, labels_dir: str, output_dir: str, val_ratio: float = 0.2, seed: int = 42):
+    def __init__(
+        self,
+        images_dir: str,
+        labels_dir: str,
+        output_dir: str,
+        val_ratio: float = 0.2,
+        seed: int = 42,
+        label_store: str = None,
+        mode: str = "copy",
+        workers: int = 1,
+        data_yaml: str = None,
+        profiler=None,
+    ):
         assert 0 < val_ratio < 1, "val_ratio must be between 0 and 1"
+        assert mode in SPLIT_MODES, f"mode must be one of {SPLIT_MODES}"
+        assert not (label_store and mode == "list"), \
+            "list mode reads labels from labels_dir, export the label_store first"
         self.images_dir = images_dir
         self.labels_dir = labels_dir
+        self.label_store = LabelStore.load(label_store) if label_store else None
         self.output_dir = output_dir
         self.val_ratio = val_ratio
         self.seed = seed
+        self.mode = mode
+        self.workers = max(1, workers)
+        self.data_yaml = data_yaml
+        self.profiler = profiler
 
         self.train_img_dir = os.path.join(output_dir, "images/train")
         self.val_img_dir = os.path.join(output_dir, "images/val")
         self.train_lbl_dir = os.path.join(output_dir, "labels/train")
         self.val_lbl_dir = os.path.join(output_dir, "labels/val")
 
-        for d in [self.train_img_dir, self.val_img_dir, self.train_lbl_dir, self.val_lbl_dir]:
-            os.makedirs(d, exist_ok=True)
+        if mode == "list":
+            os.makedirs(output_dir, exist_ok=True)
+        else:
+            for d in [self.train_img_dir, self.val_img_dir, self.train_lbl_dir, self.val_lbl_dir]:
+                os.makedirs(d, exist_ok=True)
     
     def split(self):
-        images = [
-            f for f in os.listdir(self.images_dir)
-            if f.lower().endswith((".jpg", ".png"))
-        ]
+        with profile_stage(self.profiler, "split") as stage:
+            self._split(stage)
 
-        random.seed(self.seed)
-        random.shuffle(images)
-
-        split_idx = int(len(images) * (1 - self.val_ratio))
-        train_images = images[:split_idx]
-        val_images = images[split_idx:]
+    def _split(self, stage):
+        with stage.step("list"):
+            images = [
+                f for f in os.listdir(self.images_dir)
+                if f.lower().endswith(TILE_EXTS)
+            ]
+            train_images, val_images = split_names(images, self.val_ratio, self.seed)
 
         print(f"[INFO] Total tiles: {len(images)}")
         print(f"[INFO] Train: {len(train_images)} | Val: {len(val_images)}")
 
-        self._copy_pairs(train_images, train=True)
-        self._copy_pairs(val_images, train=False)
+        stage.items = len(images)
+        if self.mode == "list":
+            with stage.step("lists", len(images)):
+                self._write_lists(train_images, val_images)
+        else:
+            with stage.step("clear"):
+                self._clear_splits()
+            placed = Counter()
+            with stage.step("place", len(images)):
+                placed.update(self._copy_pairs(train_images, train=True))
+                placed.update(self._copy_pairs(val_images, train=False))
+            print("[INFO] " + ", ".join(f"{n} {how}" for how, n in placed.items()))
 
         print("[DONE] Train/Val split completed")
-    
+
+    def _clear_splits(self):
+        for d in [self.train_img_dir, self.val_img_dir, self.train_lbl_dir, self.val_lbl_dir]:
+            for f in os.listdir(d):
+                if f.lower().endswith(TILE_EXTS + (".txt",)):
+                    os.remove(os.path.join(d, f))
+
+    def _write_lists(self, train_images, val_images):
+        lists = {}
+        for name, image_list in (("train", train_images), ("val", val_images)):
+            lists[name] = os.path.abspath(os.path.join(self.output_dir, f"{name}.txt"))
+            with open(lists[name], "w") as f:
+                f.write("\n".join(
+                    os.path.abspath(os.path.join(self.images_dir, img)) for img in image_list
+                ))
+            print(f"[INFO] Wrote {lists[name]}")
+
+        if self.data_yaml:
+            _set_yaml_keys(self.data_yaml, lists)
+            print(f"[INFO] Updated train/val in {self.data_yaml}")
+
+    def _place(self, src, dst):
+        """
+        Materializes src at dst according to mode; returns how it was done.
+        """
+        # Never write through an old hardlink into the source tile
+        if os.path.lexists(dst):
+            os.remove(dst)
+
+        if self.mode == "hardlink":
+            try:
+                os.link(src, dst)
+                return "hardlinked"
+            except OSError:
+                pass
+        elif self.mode == "reflink":
+            try:
+                _reflink(src, dst)
+                return "reflinked"
+            except OSError:
+                if os.path.lexists(dst):
+                    os.remove(dst)
+
+        shutil.copy2(src, dst)
+        return "copied"
+
     def _copy_pairs(self, image_list, train: bool):
+        jobs = []
         for img_name in image_list:
             src_img = os.path.join(self.images_dir, img_name)
             src_lbl = os.path.join(
@@ -63,7 +217,35 @@ class TrainValSplitter:
                     os.path.splitext(img_name)[0] + ".txt",
                 )
 
-            shutil.copy2(src_img, dst_img)
+            jobs.append((src_img, dst_img))
+
+            if self.label_store is not None:
+                stem = os.path.splitext(img_name)[0]
+                if stem in self.label_store:
+                    self.label_store.write_yolo(stem, dst_lbl)
+            elif os.path.exists(src_lbl):
+                jobs.append((src_lbl, dst_lbl))
+
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            return list(pool.map(lambda job: self._place(*job), jobs))
+
+    def split_index(self, index_path: str):
+        """
+        Splits a virtual tile index (YoloTiler.build_index) into
+        <output_dir>/tiles_index_train.json and tiles_index_val.json.
+        """
+        with open(index_path, "r") as f:
+            index = json.load(f)
+
+        # Same assignment as split() on the materialized tiles
+        tiles = {t["name"]: t for t in index["tiles"]}
+        train_names, val_names = split_names(tiles, self.val_ratio, self.seed)
+        print(f"[INFO] Total virtual tiles: {len(tiles)}")
+        print(f"[INFO] Train: {len(train_names)} | Val: {len(val_names)}")
+
+        for name, names in (("train", train_names), ("val", val_names)):
+            part = [tiles[n] for n in names]
+            with open(os.path.join(self.output_dir, f"tiles_index_{name}.json"), "w") as f:
+                json.dump({**index, "tiles": part}, f)
 
-            if os.path.exists(src_lbl):
-                shutil.copy2(src_lbl, dst_lbl)
+        print("[DONE] Virtual tile index split completed")
@@ -0,0 +1,207 @@
+import heapq
+import numpy as np
+
+
+# Object size buckets on sqrt(box area) in pixels: tiny < 16 <= small < 32
+# <= medium < 96 <= large (COCO small / medium / large plus a tiny bucket)
+SIZE_BUCKETS = ("tiny", "small", "medium", "large")
+SIZE_THRESHOLDS = np.array([16.0, 32.0, 96.0])
+
+# Log-spaced histogram edges: normalized box sides and aspect ratios
+SIDE_EDGES = np.logspace(-4, 0, 201)
+RATIO_EDGES = np.logspace(-2, 2, 201)
+
+# Objects-per-image histogram is exact up to this count (last bin = overflow)
+MAX_DENSITY = 4096
+
+PERCENTILES = (5, 25, 50, 75, 95)
+
+
+def _bin_index(values, edges):
+    return np.clip(np.searchsorted(edges, values, side="right") - 1, 0, len(edges) - 2)
+
+
+def _hist_percentiles(counts, edges):
+    """
+    Percentiles from a histogram, at the geometric centre of the bin
+    that holds each rank (edges are log-spaced).
+    """
+    total = counts.sum()
+    if total == 0:
+        return {}
+    centres = np.sqrt(edges[:-1] * edges[1:])
+    cum = np.cumsum(counts)
+    idx = np.searchsorted(cum, [total * p / 100 for p in PERCENTILES])
+    return {f"p{p}": float(centres[i]) for p, i in zip(PERCENTILES, idx)}
+
+
+class StatsAccumulator:
+    """
+    Streaming, mergeable aggregates over YOLO labels.
+
+    Every field is a fixed-size array (classes x bins), so memory does not
+    grow with the number of boxes or images. Workers fill one accumulator
+    per chunk of files and the parent merges them.
+
+    Only the names of empty images are kept as a list.
+    """
+
+    def __init__(self, num_classes: int, image_size: int = 1024, top_k: int = 10):
+        self.image_size = image_size
+        self.top_k = top_k
+
+        self.n_images = 0
+        self.empty_images = []
+        self.densest = []  # min-heap of (count, name)
+
+        self.class_counts = np.zeros(num_classes, dtype=np.int64)
+        self.image_counts = np.zeros(num_classes, dtype=np.int64)
+        self.sums = np.zeros((3, num_classes))  # width, height, aspect ratio
+        self.width_hist = np.zeros((num_classes, len(SIDE_EDGES) - 1), dtype=np.int64)
+        self.height_hist = np.zeros_like(self.width_hist)
+        self.ratio_hist = np.zeros((num_classes, len(RATIO_EDGES) - 1), dtype=np.int64)
+        self.size_buckets = np.zeros((num_classes, len(SIZE_BUCKETS)), dtype=np.int64)
+        self.density_hist = np.zeros(MAX_DENSITY + 1, dtype=np.int64)
+
+    @property
+    def num_classes(self):
+        return len(self.class_counts)
+
+    def _grow(self, num_classes):
+        pad = num_classes - self.num_classes
+        for name in ("class_counts", "image_counts"):
+            setattr(self, name, np.pad(getattr(self, name), (0, pad)))
+        self.sums = np.pad(self.sums, ((0, 0), (0, pad)))
+        for name in ("width_hist", "height_hist", "ratio_hist", "size_buckets"):
+            setattr(self, name, np.pad(getattr(self, name), ((0, pad), (0, 0))))
+
+    def _class_bincount(self, cls, bins, n_bins):
+        return np.bincount(
+            cls * n_bins + bins, minlength=self.num_classes * n_bins
+        ).reshape(self.num_classes, n_bins)
+
+    def _push_densest(self, item):
+        # Keeps the top_k largest (count, name), the same for any merge order
+        if len(self.densest) < self.top_k:
+            heapq.heappush(self.densest, item)
+        elif item > self.densest[0]:
+            heapq.heapreplace(self.densest, item)
+
+    def add_images(self, names, counts, boxes):
+        """
+        names: image names of the chunk
+        counts: objects per image (0 for missing / empty labels)
+        boxes: (sum(counts), 5) rows of class, xc, yc, w, h in image order
+        """
+        counts = np.asarray(counts, dtype=np.int64)
+        self.n_images += len(names)
+        self.empty_images.extend(n for n, c in zip(names, counts.tolist()) if c == 0)
+        self.density_hist += np.bincount(
+            np.minimum(counts, MAX_DENSITY), minlength=MAX_DENSITY + 1
+        )
+
+        # Every image tied with the chunk's top_k-th count is a candidate,
+        # so ties resolve by name whatever the chunking
+        if len(counts):
+            kth = np.sort(counts)[::-1][min(self.top_k, len(counts)) - 1]
+            for i in np.flatnonzero(counts >= max(kth, 1)):
+                self._push_densest((int(counts[i]), names[i]))
+
+        if len(boxes) == 0:
+            return
+
+        cls = boxes[:, 0].astype(np.int64)
+        if cls.max() >= self.num_classes:
+            self._grow(int(cls.max()) + 1)
+        w, h = boxes[:, 3], boxes[:, 4]
+        ratio = np.divide(w, h, out=np.zeros_like(w), where=h > 0)
+
+        self.class_counts += np.bincount(cls, minlength=self.num_classes)
+
+        image_ids = np.repeat(np.arange(len(counts)), counts)
+        present = np.unique(image_ids * self.num_classes + cls) % self.num_classes
+        self.image_counts += np.bincount(present, minlength=self.num_classes)
+
+        for row, values in enumerate((w, h, ratio)):
+            self.sums[row] += np.bincount(cls, weights=values, minlength=self.num_classes)
+
+        n_side = len(SIDE_EDGES) - 1
+        self.width_hist += self._class_bincount(cls, _bin_index(w, SIDE_EDGES), n_side)
+        self.height_hist += self._class_bincount(cls, _bin_index(h, SIDE_EDGES), n_side)
+        self.ratio_hist += self._class_bincount(
+            cls, _bin_index(ratio, RATIO_EDGES), len(RATIO_EDGES) - 1
+        )
+
+        side_px = np.sqrt(np.maximum(w * h, 0)) * self.image_size
+        buckets = np.searchsorted(SIZE_THRESHOLDS, side_px, side="right")
+        self.size_buckets += self._class_bincount(cls, buckets, len(SIZE_BUCKETS))
+
+    def merge(self, other):
+        if other.num_classes > self.num_classes:
+            self._grow(other.num_classes)
+        elif other.num_classes < self.num_classes:
+            other._grow(self.num_classes)
+
+        self.n_images += other.n_images
+        self.empty_images.extend(other.empty_images)
+        for item in other.densest:
+            self._push_densest(item)
+
+        for name in (
+            "class_counts", "image_counts", "sums", "width_hist", "height_hist",
+            "ratio_hist", "size_buckets", "density_hist",
+        ):
+            setattr(self, name, getattr(self, name) + getattr(other, name))
+        return self
+
+    def summary(self):
+        present = [c for c in range(self.num_classes) if self.class_counts[c] > 0]
+        means = self.sums[:, present] / self.class_counts[present]
+
+        density = self.density_hist
+        n_objects = np.arange(MAX_DENSITY + 1)
+        cum = np.cumsum(density)
+        density_pct = {}
+        if self.n_images:
+            idx = np.searchsorted(cum, [self.n_images * p / 100 for p in PERCENTILES])
+            density_pct = {f"p{p}": int(i) for p, i in zip(PERCENTILES, idx)}
+
+        return {
+            "total_images": self.n_images,
+            "total_objects": int(self.class_counts.sum()),
+            "class_counts": {c: int(self.class_counts[c]) for c in present},
+            "image_counts": {c: int(self.image_counts[c]) for c in present},
+            "bbox_width_avg": {c: float(m) for c, m in zip(present, means[0])},
+            "bbox_height_avg": {c: float(m) for c, m in zip(present, means[1])},
+            "aspect_ratio_avg": {c: float(m) for c, m in zip(present, means[2])},
+            "bbox_width_percentiles": {
+                c: _hist_percentiles(self.width_hist[c], SIDE_EDGES) for c in present
+            },
+            "bbox_height_percentiles": {
+                c: _hist_percentiles(self.height_hist[c], SIDE_EDGES) for c in present
+            },
+            "aspect_ratio_percentiles": {
+                c: _hist_percentiles(self.ratio_hist[c], RATIO_EDGES) for c in present
+            },
+            "histograms": {
+                "side_edges": SIDE_EDGES.tolist(),
+                "ratio_edges": RATIO_EDGES.tolist(),
+                "bbox_width": {c: self.width_hist[c].tolist() for c in present},
+                "bbox_height": {c: self.height_hist[c].tolist() for c in present},
+                "aspect_ratio": {c: self.ratio_hist[c].tolist() for c in present},
+            },
+            "size_buckets": {
+                c: dict(zip(SIZE_BUCKETS, self.size_buckets[c].tolist())) for c in present
+            },
+            "objects_per_image": {
+                "mean": float((density * n_objects).sum() / self.n_images) if self.n_images else 0.0,
+                "max": int(n_objects[density > 0].max()) if self.n_images else 0,
+                **density_pct,
+                "histogram": density[: int(n_objects[density > 0].max()) + 1].tolist()
+                if self.n_images else [],
+            },
+            "densest_images": [
+                (name, count) for count, name in sorted(self.densest, reverse=True)
+            ],
+            "empty_images": self.empty_images,
+        }
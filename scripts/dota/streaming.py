@@ -0,0 +1,272 @@
+import os
+import cv2
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from .converter import DotoYoloConverter
+from .tiler import YoloTiler, crop_tile
+from .splitter import split_names
+from .scenereader import open_scene
+from .tilecodec import TILE_EXTS, TileWriterPool
+from .profiling import StepTimer, profile_stage
+
+
+_WORKER_STREAM = None
+
+
+def _init_worker(stream):
+    global _WORKER_STREAM
+    _WORKER_STREAM = stream
+    # One process per core already; keep OpenCV from oversubscribing it
+    cv2.setNumThreads(1)
+
+
+def _plan_worker(job):
+    timer = StepTimer()
+    return _WORKER_STREAM._plan_scene(*job, timer), timer.report()
+
+
+def _tile_worker(job):
+    timer = StepTimer()
+    try:
+        return job[0], _WORKER_STREAM._tile_scene(*job, timer), None, timer.report()
+    except Exception as e:
+        return job[0], 0, f"{type(e).__name__}: {e}", timer.report()
+
+
+class StreamingPipeline:
+    """
+    Fused DOTA -> tiles -> train / val split, without intermediate files.
+
+    - Plan pass: DOTA labels are converted in memory and assigned to
+      tiles from the image header size; no pixels are read
+    - Split: tile names are split exactly as TrainValSplitter does
+      (sorted, then seeded shuffle)
+    - Tile pass: every scene is decoded once, in a process pool with
+      workers > 1, and its tiles go through a TileWriterPool
+      (encoder_threads, bounded to queue_size pending tiles) straight
+      into <output_dir>/images|labels/train|val, encoded with codec
+      (a TileCodec, default JPEG)
+
+    Output matches DotoYoloConverter -> YoloTiler -> TrainValSplitter
+    (mode="copy") with the same parameters (planner included), byte for
+    byte.
+
+    With profiler (a RunProfiler), run() is recorded as a "stream" stage
+    with headers / parse / convert / plan / clear / decode / encode /
+    write sub-steps.
+    """
+    def __init__(
+        self,
+        images_dir: str,
+        dota_labels_dir: str,
+        output_dir: str,
+        tile_size: int = 1024,
+        overlap: int = 200,
+        min_box_size: int = 10,
+        ignore_difficult: bool = True,
+        val_ratio: float = 0.2,
+        seed: int = 42,
+        workers: int = 1,
+        encoder_threads: int = 4,
+        queue_size: int = 16,
+        read_mode: str = "full",
+        planner=None,
+        output_format: str = "hbb",
+        min_area_ratio: float = 0.5,
+        codec=None,
+        profiler=None,
+    ):
+        assert 0 < val_ratio < 1, "val_ratio must be between 0 and 1"
+        self.images_dir = images_dir
+        self.output_dir = output_dir
+        self.val_ratio = val_ratio
+        self.seed = seed
+        self.workers = max(1, workers)
+        self.encoder_threads = max(1, encoder_threads)
+        self.queue_size = queue_size
+        self.profiler = profiler
+
+        self.split_dirs = {
+            split: (
+                os.path.join(output_dir, "images", split),
+                os.path.join(output_dir, "labels", split),
+            )
+            for split in ("train", "val")
+        }
+        for dirs in self.split_dirs.values():
+            for d in dirs:
+                os.makedirs(d, exist_ok=True)
+
+        # Reused for label conversion and tile planning only; nothing is
+        # written to their output folders
+        self.converter = DotoYoloConverter(
+            images_dir,
+            dota_labels_dir,
+            output_dir,
+            ignore_difficult=ignore_difficult,
+            workers=workers,
+            output_format=output_format,
+        )
+        self.tiler = YoloTiler(
+            images_dir,
+            dota_labels_dir,
+            *self.split_dirs["train"],
+            tile_size=tile_size,
+            overlap=overlap,
+            min_box_size=min_box_size,
+            read_mode=read_mode,
+            planner=planner,
+            label_format=output_format,
+            min_area_ratio=min_area_ratio,
+            codec=codec,
+            scene_cache_dir=os.path.join(
+                os.path.dirname(os.path.normpath(output_dir)), "scene_cache"
+            ),
+        )
+
+    def __getstate__(self):
+        # Workers report step timings back; the profiler stays in the parent
+        return {**self.__dict__, "profiler": None}
+
+    def _plan_scene(self, image_name, label_file, img_size, timer: StepTimer = None):
+        timer = timer or StepTimer()
+        lines = self.converter._yolo_lines(label_file, img_size, timer)
+        if not lines:
+            return image_name, []
+
+        with timer.step("plan"):
+            # Parsed back from the formatted lines, as YoloTiler reads them
+            boxes = np.array([line.split() for line in lines], dtype=np.float64)
+            return image_name, self.tiler._plan_tiles(image_name, boxes, *img_size)
+
+    def _tile_scene(self, image_name, tiles, timer: StepTimer = None):
+        timer = timer or StepTimer()
+        with timer.step("decode", 0):
+            reader = open_scene(
+                os.path.join(self.images_dir, image_name),
+                self.tiler.read_mode,
+                self.tiler.scene_cache_dir,
+            )
+        if reader is None:
+            raise ValueError(f"cannot decode {image_name}")
+
+        writer = TileWriterPool(self.encoder_threads, self.queue_size, self.tiler.codec)
+        try:
+            band_rows = None
+            for tile_name, (x0, y0, x1, y1), lines, scale, split in tiles:
+                # Plan is row-major: every tile in a row shares one band
+                if band_rows != (y0, y1):
+                    with timer.step("decode"):
+                        band, band_rows = reader.read_band(y0, y1), (y0, y1)
+
+                images_dir, labels_dir = self.split_dirs[split]
+                writer.submit(
+                    os.path.join(images_dir, tile_name),
+                    crop_tile(band, x0, x1, scale),
+                    os.path.join(labels_dir, os.path.splitext(tile_name)[0] + ".txt"),
+                    lines,
+                )
+        finally:
+            # Tiles may still view the reader's pixels until the writers
+            # finish; the reader is closed even if a write failed
+            try:
+                writer.close(timer)
+            finally:
+                reader.close()
+
+        return len(tiles)
+
+    def _clear_splits(self):
+        for dirs in self.split_dirs.values():
+            for d in dirs:
+                for f in os.listdir(d):
+                    if f.lower().endswith(TILE_EXTS + (".txt",)):
+                        os.remove(os.path.join(d, f))
+
+    def run(self):
+        with profile_stage(self.profiler, "stream") as stage:
+            self._run(stage)
+
+    def _run(self, stage):
+        label_files = sorted(
+            f for f in os.listdir(self.converter.dota_labels_dir) if f.endswith(".txt")
+        )
+
+        with stage.step("headers", len(label_files)):
+            images = self.converter._find_images()
+            sizes = self.converter._image_sizes(
+                [images[os.path.splitext(f)[0]] for f in label_files
+                 if os.path.splitext(f)[0] in images]
+            )
+        jobs = []
+        for f in label_files:
+            image_name = images.get(os.path.splitext(f)[0])
+            if image_name is None:
+                print(f"[WARN] Image not found for {os.path.splitext(f)[0]}")
+                continue
+            jobs.append((image_name, f, sizes[image_name]))
+
+        print(f"[INFO] Planning tiles of {len(jobs)} scenes")
+        plans = {}
+        if self.workers > 1 and len(jobs) > 1:
+            with ProcessPoolExecutor(
+                max_workers=self.workers,
+                initializer=_init_worker,
+                initargs=(self,),
+            ) as pool:
+                for (image_name, plan), report in pool.map(_plan_worker, jobs, chunksize=16):
+                    plans[image_name] = plan
+                    stage.add_report(report)
+        else:
+            for job in jobs:
+                image_name, plan = self._plan_scene(*job, stage.timer)
+                plans[image_name] = plan
+
+        train_tiles, val_tiles = split_names(
+            [tile[0] for plan in plans.values() for tile in plan],
+            self.val_ratio,
+            self.seed,
+        )
+        val_tiles = set(val_tiles)
+        print(f"[INFO] Total tiles: {len(train_tiles) + len(val_tiles)}")
+        print(f"[INFO] Train: {len(train_tiles)} | Val: {len(val_tiles)}")
+
+        with stage.step("clear"):
+            self._clear_splits()
+
+        tile_jobs = [
+            (
+                image_name,
+                [
+                    (name, window, lines, scale, "val" if name in val_tiles else "train")
+                    for name, window, lines, scale in plan
+                ],
+            )
+            for image_name, plan in plans.items()
+            if plan
+        ]
+
+        failures = []
+        if self.workers > 1 and len(tile_jobs) > 1:
+            with ProcessPoolExecutor(
+                max_workers=min(self.workers, len(tile_jobs)),
+                initializer=_init_worker,
+                initargs=(self,),
+            ) as pool:
+                futures = [pool.submit(_tile_worker, job) for job in tile_jobs]
+                for done, future in enumerate(as_completed(futures), start=1):
+                    image_name, n_tiles, error, report = future.result()
+                    stage.add_report(report)
+                    if error is not None:
+                        failures.append((image_name, error))
+                        print(f"[WARN] {image_name} failed: {error}")
+                        continue
+                    stage.items += n_tiles
+                    print(f"[INFO] [{done}/{len(tile_jobs)}] {image_name} -> {n_tiles} tiles")
+        else:
+            for job in tile_jobs:
+                stage.items += self._tile_scene(*job, stage.timer)
+
+        if failures:
+            print(f"[WARN] {len(failures)} scene(s) failed to tile")
+        print("[DONE] Streaming convert → tile → split complete")
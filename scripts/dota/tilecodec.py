@@ -0,0 +1,126 @@
+import queue
+import threading
+import cv2
+from .profiling import StepTimer
+
+
+CODECS = ("jpg", "png", "webp")
+# Every extension a tile image can have, for the stages that list tiles
+TILE_EXTS = tuple(f".{codec}" for codec in CODECS)
+
+
+class TileCodec:
+    """
+    Image format of written tiles.
+
+    - "jpg": quality 0-100
+    - "png": lossless, compression level 0-9 (higher: smaller, slower)
+    - "webp": quality 1-100, above 100 lossless
+
+    Settings left at None use the OpenCV default, so TileCodec() writes
+    the same bytes as cv2.imencode(".jpg", tile).
+    """
+    def __init__(self, codec: str = "jpg", quality: int = None, compression: int = None):
+        assert codec in CODECS, f"codec must be one of {CODECS}"
+        assert quality is None or codec != "png", "png is lossless, use compression"
+        assert compression is None or codec == "png", "compression applies to png only"
+        self.codec = codec
+        self.quality = quality
+        self.compression = compression
+
+        self.ext = f".{codec}"
+        self.params = []
+        if quality is not None:
+            flag = cv2.IMWRITE_JPEG_QUALITY if codec == "jpg" else cv2.IMWRITE_WEBP_QUALITY
+            self.params = [flag, int(quality)]
+        if compression is not None:
+            self.params = [cv2.IMWRITE_PNG_COMPRESSION, int(compression)]
+
+    @property
+    def name(self):
+        # jpg, jpg-q90, png-c3, webp-q80
+        if self.quality is not None:
+            return f"{self.codec}-q{self.quality}"
+        if self.compression is not None:
+            return f"{self.codec}-c{self.compression}"
+        return self.codec
+
+    def settings(self):
+        return {"codec": self.codec, "quality": self.quality, "compression": self.compression}
+
+    def encode(self, pixels):
+        ok, buf = cv2.imencode(self.ext, pixels, self.params)
+        if not ok:
+            raise ValueError(f"cannot encode tile as {self.name}")
+        return buf
+
+
+class TileWriterPool:
+    """
+    Encodes and writes tiles on a few threads fed through a bounded queue.
+
+    submit() blocks once max_pending tiles are waiting, so the decoder
+    never runs more than max_pending tiles ahead of the encoders.
+    cv2.imencode releases the GIL, so the threads encode in parallel.
+    Tiles are encoded with codec (a TileCodec, default TileCodec());
+    bytes_written counts the encoded image bytes.
+    The first encode / write error is raised from submit() or close().
+    """
+    def __init__(self, threads: int = 4, max_pending: int = 16, codec: TileCodec = None):
+        self.codec = codec or TileCodec()
+        self.queue = queue.Queue(maxsize=max(1, max_pending))
+        self.timers = [StepTimer() for _ in range(max(1, threads))]
+        self.sizes = [0] * len(self.timers)
+        self.errors = []
+        self.threads = [
+            threading.Thread(target=self._run, args=(i,), daemon=True)
+            for i in range(len(self.timers))
+        ]
+        for t in self.threads:
+            t.start()
+
+    @property
+    def bytes_written(self):
+        return sum(self.sizes)
+
+    def _run(self, i):
+        timer = self.timers[i]
+        while True:
+            job = self.queue.get()
+            if job is None:
+                return
+            if self.errors:
+                # Keep draining so submit() never blocks forever
+                continue
+
+            img_path, pixels, label_path, lines = job
+            try:
+                with timer.step("encode"):
+                    buf = self.codec.encode(pixels)
+                with timer.step("write"):
+                    with open(img_path, "wb") as f:
+                        f.write(buf.tobytes())
+                    with open(label_path, "w") as f:
+                        f.write("\n".join(lines))
+                self.sizes[i] += buf.nbytes
+            except Exception as e:
+                self.errors.append(e)
+
+    def submit(self, img_path, pixels, label_path, lines):
+        if self.errors:
+            raise self.errors[0]
+        self.queue.put((img_path, pixels, label_path, lines))
+
+    def close(self, timer: StepTimer = None):
+        for _ in self.threads:
+            self.queue.put(None)
+        for t in self.threads:
+            t.join()
+
+        if timer is not None:
+            for t in self.timers:
+                for name, (seconds, items) in t.steps.items():
+                    timer.add(name, seconds, items)
+
+        if self.errors:
+            raise self.errors[0]
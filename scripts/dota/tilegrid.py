@@ -0,0 +1,136 @@
+import math
+import numpy as np
+
+
+def grid_steps(img_w, img_h, tile_size, stride):
+    x_steps = math.ceil((img_w - tile_size) / stride) + 1
+    y_steps = math.ceil((img_h - tile_size) / stride) + 1
+    return x_steps, y_steps
+
+
+def tile_windows(img_w, img_h, tile_size, stride):
+    """
+    Yields (xi, yi, x0, y0, x1, y1) for every tile of a scene, row by row.
+    """
+    x_steps, y_steps = grid_steps(img_w, img_h, tile_size, stride)
+
+    for yi in range(y_steps):
+        for xi in range(x_steps):
+            x0 = xi * stride
+            y0 = yi * stride
+            x1 = min(x0 + tile_size, img_w)
+            y1 = min(y0 + tile_size, img_h)
+            yield xi, yi, x0, y0, x1, y1
+
+
+def format_yolo_lines(cls, xc, yc, w, h):
+    return [
+        f"{c} {x:.6f} {y:.6f} {bw:.6f} {bh:.6f}"
+        for c, x, y, bw, bh in zip(
+            cls.tolist(), xc.tolist(), yc.tolist(), w.tolist(), h.tolist()
+        )
+    ]
+
+
+def _axis_index(lo, hi, n_steps, tile_size, stride):
+    """
+    CSR index of the boxes overlapping each tile column (or row).
+
+    Box i can only land in tiles whose origin k * stride lies in
+    (lo_i - tile_size, hi_i); the range is widened by one step on each
+    side so float rounding never drops a candidate. Exact filtering
+    happens later when boxes are clipped.
+    """
+    first = np.floor((lo - tile_size) / stride).astype(np.int64)
+    last = np.ceil(hi / stride).astype(np.int64)
+    first = np.clip(first, 0, n_steps)
+    last = np.clip(last, -1, n_steps - 1)
+    counts = np.maximum(last - first + 1, 0)
+
+    box_ids = np.repeat(np.arange(len(lo)), counts)
+    starts = np.repeat(np.cumsum(counts) - counts, counts)
+    steps = np.repeat(first, counts) + np.arange(len(box_ids)) - starts
+
+    # Stable sort keeps box ids ascending (= label file order) per step
+    order = np.argsort(steps, kind="stable")
+    offsets = np.zeros(n_steps + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum(np.bincount(steps, minlength=n_steps))
+    return box_ids[order], offsets
+
+
+class SceneBoxes:
+    """
+    Holds a scene's YOLO boxes as one NumPy array and assigns them to tiles.
+
+    - Boxes are converted to pixel corners once per scene
+    - A per-column / per-row interval index gives each tile only the boxes
+      that can intersect it
+    - Clipping, min-size filtering and normalization run in batch
+    """
+
+    def __init__(self, boxes, img_w, img_h, tile_size, stride):
+        boxes = np.asarray(boxes, dtype=np.float64).reshape(-1, 5)
+        self.cls = boxes[:, 0].astype(np.int64)
+
+        box_w = boxes[:, 3] * img_w
+        box_h = boxes[:, 4] * img_h
+        x_center = boxes[:, 1] * img_w
+        y_center = boxes[:, 2] * img_h
+
+        self.xmin = x_center - box_w / 2
+        self.ymin = y_center - box_h / 2
+        self.xmax = x_center + box_w / 2
+        self.ymax = y_center + box_h / 2
+
+        x_steps, y_steps = grid_steps(img_w, img_h, tile_size, stride)
+        x_steps, y_steps = max(x_steps, 0), max(y_steps, 0)
+        self._cols = _axis_index(self.xmin, self.xmax, x_steps, tile_size, stride)
+        self._rows = _axis_index(self.ymin, self.ymax, y_steps, tile_size, stride)
+
+    def __len__(self):
+        return len(self.cls)
+
+    def candidates(self, xi, yi):
+        col_ids, col_off = self._cols
+        row_ids, row_off = self._rows
+        return np.intersect1d(
+            col_ids[col_off[xi]:col_off[xi + 1]],
+            row_ids[row_off[yi]:row_off[yi + 1]],
+            assume_unique=True,
+        )
+
+    def assign(self, xi, yi, x0, y0, x1, y1, min_box_size):
+        """
+        Returns (cls, xc, yc, w, h) arrays of the boxes kept in one tile,
+        normalized to the tile, in label file order.
+        """
+        idx, xc, yc, w, h = self.assign_ids(xi, yi, x0, y0, x1, y1, min_box_size)
+        return self.cls[idx], xc, yc, w, h
+
+    def assign_ids(self, xi, yi, x0, y0, x1, y1, min_box_size):
+        """
+        Same as assign, with the kept boxes' indices in place of classes.
+        """
+        idx = self.candidates(xi, yi)
+
+        xmin = np.maximum(self.xmin[idx], x0)
+        ymin = np.maximum(self.ymin[idx], y0)
+        xmax = np.minimum(self.xmax[idx], x1)
+        ymax = np.minimum(self.ymax[idx], y1)
+
+        keep = ~((xmax - xmin < min_box_size) | (ymax - ymin < min_box_size))
+        idx = idx[keep]
+        xmin = xmin[keep] - x0
+        ymin = ymin[keep] - y0
+        xmax = xmax[keep] - x0
+        ymax = ymax[keep] - y0
+
+        tile_w = x1 - x0
+        tile_h = y1 - y0
+        xc = ((xmin + xmax) / 2) / tile_w
+        yc = ((ymin + ymax) / 2) / tile_h
+        w = (xmax - xmin) / tile_w
+        h = (ymax - ymin) / tile_h
+
+        keep = ~((w <= 0) | (h <= 0))
+        return idx[keep], xc[keep], yc[keep], w[keep], h[keep]
@@ -1,6 +1,72 @@
 import os
+import re
 import cv2
-import math
+import json
+import time
+import tempfile
+import multiprocessing
+import numpy as np
+from PIL import Image
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from .labelstore import LabelStore
+from .manifest import TilingManifest, file_hash
+from .obb import plan_obb_tiles
+from .profiling import StepTimer, profile_stage, proc_status_kb, reset_peak_rss
+from .scenereader import open_scene
+from .tilecodec import TileCodec, TileWriterPool
+from .tilegrid import SceneBoxes, format_yolo_lines, tile_windows
+
+
+_WORKER_TILER = None
+LABEL_FORMATS = ("hbb", "obb")
+_TILE_NAME = re.compile(r"^(.+)_x\d+_y\d+(?:_s\d+)?\.\w+$")
+
+
+def _init_worker(tiler):
+    global _WORKER_TILER
+    _WORKER_TILER = tiler
+    # One process per core already; keep OpenCV from oversubscribing it
+    cv2.setNumThreads(1)
+
+
+def _tile_worker(image_name):
+    timer = StepTimer()
+    try:
+        n_tiles = _WORKER_TILER.tile_single(image_name, timer)
+        return os.getpid(), image_name, n_tiles, None, timer.report()
+    except Exception as e:
+        return os.getpid(), image_name, 0, f"{type(e).__name__}: {e}", timer.report()
+
+
+def _cache_scene(img_path, cache_dir):
+    reader = open_scene(img_path, "windowed", cache_dir)
+    if reader is None:
+        return False
+    reader.close()
+    return True
+
+
+def crop_tile(band, x0, x1, scale: float = 1.0):
+    """
+    Tile pixels from a row band; pyramid tiles (scale < 1) are resized.
+    """
+    tile = band[:, x0:x1]
+    if scale != 1.0:
+        h, w = tile.shape[:2]
+        tile = cv2.resize(
+            tile, (max(1, round(w * scale)), max(1, round(h * scale))), interpolation=cv2.INTER_AREA
+        )
+    return tile
+
+
+def _peak_rss_worker(tiler, image_name):
+    # Reset the RSS high-water mark (Linux) so VmHWM covers tile_single only
+    reset_peak_rss()
+    baseline_kb = proc_status_kb("VmRSS")
+    tiler.tile_single(image_name)
+    peak_kb = proc_status_kb("VmHWM")
+    return baseline_kb, peak_kb
 
 
 class YoloTiler:
@@ -11,6 +77,43 @@ class YoloTiler:
     - Image -> tiles
     - Adjust bounding boxes per tile
     - Drop tiny / invalid boxes
+
+    Box assignment is vectorized per scene (see tilegrid.SceneBoxes).
+
+    With workers > 1, tile_all spreads scenes over a process pool.
+    Tile names and labels are the same as in the serial path.
+
+    read_mode="windowed" reads one row band of tiles at a time from an
+    uncompressed scene cache, so peak memory follows tile_size x width
+    instead of the full scene.
+
+    tile_all is incremental: a manifest keyed by image / label content
+    hash and the tiling parameters lets re-runs skip unchanged scenes,
+    drop tiles of deleted scenes and resume after a crash.
+
+    build_index is the "virtual" alternative to tile_all: it writes only
+    the tile windows and their boxes, and train.VirtualTileDataset crops
+    the pixels from cached scenes at load time.
+
+    With label_store (a LabelStore directory), boxes are read from the
+    packed store instead of parsing labels_dir.
+
+    label_format="obb" tiles DotoYoloConverter(output_format="obb")
+    labels: polygons are clipped to each tile in batch (dota.obb) and
+    dropped when less than min_area_ratio of their area is left.
+
+    With planner (a dota.planner.TilePlanner), the planner picks the
+    tiles (dense-area pruning, background tiles, pyramid levels) instead
+    of keeping every tile that has a box.
+
+    Tiles are encoded with codec (a dota.tilecodec.TileCodec: JPEG
+    quality, PNG compression or WebP; default JPEG as before) on
+    encoder_threads threads fed through a bounded queue of queue_size
+    tiles, so encoding and writes overlap the band decode.
+    codec_report() compares codecs on sample scenes.
+
+    With profiler (a RunProfiler), tile_all / build_index are recorded as
+    stages, tile_single split into decode / assign / encode / write.
     """
 
     def __init__(
@@ -22,145 +125,487 @@ class YoloTiler:
         tile_size: int = 1024,
         overlap: int = 200,
         min_box_size: int = 10,
+        workers: int = 1,
+        read_mode: str = "full",
+        scene_cache_dir: str = None,
+        manifest_path: str = None,
+        label_store: str = None,
+        planner=None,
+        label_format: str = "hbb",
+        min_area_ratio: float = 0.5,
+        codec: TileCodec = None,
+        encoder_threads: int = 2,
+        queue_size: int = 16,
+        profiler=None,
     ):
+        assert label_format in LABEL_FORMATS, f"label_format must be one of {LABEL_FORMATS}"
+        assert label_format == "hbb" or (planner is None and label_store is None), \
+            "OBB tiling supports neither a planner nor a label store"
         self.images_dir = images_dir
         self.labels_dir = labels_dir
+        self.label_store = LabelStore.load(label_store) if label_store else None
         self.output_images_dir = output_images_dir
         self.output_labels_dir = output_labels_dir
 
         self.tile_size = tile_size
         self.stride = tile_size - overlap
         self.min_box_size = min_box_size
+        self.workers = max(1, workers)
 
-        os.makedirs(self.output_images_dir, exist_ok=True)
-        os.makedirs(self.output_labels_dir, exist_ok=True)
+        self.read_mode = read_mode
+        self.scene_cache_dir = scene_cache_dir or os.path.join(
+            os.path.dirname(os.path.normpath(output_images_dir)), "scene_cache"
+        )
 
-    def _yolo_to_pixel(self, xc, yc, w, h, img_w, img_h):
-        box_w = w * img_w
-        box_h = h * img_h
-        x_center = xc * img_w
-        y_center = yc * img_h
-
-        xmin = x_center - box_w / 2
-        ymin = y_center - box_h / 2
-        xmax = x_center + box_w / 2
-        ymax = y_center + box_h / 2
-
-        return xmin, ymin, xmax, ymax
-
-    def _pixel_to_yolo(self, xmin, ymin, xmax, ymax, tile_w, tile_h):
-        xc = ((xmin + xmax) / 2) / tile_w
-        yc = ((ymin + ymax) / 2) / tile_h
-        w = (xmax - xmin) / tile_w
-        h = (ymax - ymin) / tile_h
-        return xc, yc, w, h
-
-    def _clip_box(self, xmin, ymin, xmax, ymax, x0, y0, x1, y1):
-        xmin = max(xmin, x0)
-        ymin = max(ymin, y0)
-        xmax = min(xmax, x1)
-        ymax = min(ymax, y1)
-        return xmin, ymin, xmax, ymax
-
-    def tile_single(self, image_name: str):
-        img_path = os.path.join(self.images_dir, image_name)
-        label_path = os.path.join(
-            self.labels_dir, os.path.splitext(image_name)[0] + ".txt"
+        self.manifest_path = manifest_path or os.path.join(
+            os.path.dirname(os.path.normpath(output_images_dir)), "tiles_manifest.json"
         )
 
-        image = cv2.imread(img_path)
-        if image is None:
-            return
+        self.planner = planner
+        self.label_format = label_format
+        self.min_area_ratio = min_area_ratio
+        self.codec = codec or TileCodec()
+        self.encoder_threads = max(1, encoder_threads)
+        self.queue_size = queue_size
+        self.profiler = profiler
+
+        os.makedirs(self.output_images_dir, exist_ok=True)
+        os.makedirs(self.output_labels_dir, exist_ok=True)
 
-        img_h, img_w = image.shape[:2]
+    def __getstate__(self):
+        # Workers report step timings back; the profiler stays in the parent
+        return {**self.__dict__, "profiler": None}
 
-        boxes = []
+    def _load_boxes(self, image_name):
+        if self.label_store is not None:
+            boxes = self.label_store.get(os.path.splitext(image_name)[0])
+            return np.empty((0, 5)) if boxes is None else np.asarray(boxes)
+
+        label_path = self._label_path(image_name)
+        n_cols = 9 if self.label_format == "obb" else 5
+        rows = []
         if os.path.exists(label_path):
             with open(label_path, "r") as f:
                 for line in f:
                     parts = line.strip().split()
-                    if len(parts) != 5:
+                    if len(parts) != n_cols:
                         continue
-                    cid, xc, yc, w, h = map(float, parts)
-                    boxes.append((int(cid), xc, yc, w, h))
-
-        x_steps = math.ceil((img_w - self.tile_size) / self.stride) + 1
-        y_steps = math.ceil((img_h - self.tile_size) / self.stride) + 1
-
-        for yi in range(y_steps):
-            for xi in range(x_steps):
-                x0 = xi * self.stride
-                y0 = yi * self.stride
-                x1 = min(x0 + self.tile_size, img_w)
-                y1 = min(y0 + self.tile_size, img_h)
-
-                tile = image[y0:y1, x0:x1]
-                if tile.size == 0:
+                    rows.append(parts)
+
+        return np.array(rows, dtype=np.float64).reshape(-1, n_cols)
+
+    def _plan_tiles(self, image_name, boxes, img_w, img_h):
+        """
+        Assigns boxes to tiles without touching pixels. Returns
+        [(tile_name, (x0, y0, x1, y1), label_lines, scale)] for kept tiles.
+        """
+        stem = os.path.splitext(image_name)[0]
+        if self.label_format == "obb":
+            return plan_obb_tiles(
+                stem, boxes, img_w, img_h, self.tile_size, self.stride,
+                self.min_box_size, self.min_area_ratio, self.codec.ext,
+            )
+        if self.planner is not None:
+            return self.planner.plan(
+                stem, boxes, img_w, img_h, self.tile_size, self.stride,
+                self.min_box_size, self.codec.ext,
+            )
+
+        scene = SceneBoxes(boxes, img_w, img_h, self.tile_size, self.stride)
+        plan = []
+
+        for xi, yi, x0, y0, x1, y1 in tile_windows(
+            img_w, img_h, self.tile_size, self.stride
+        ):
+            if x1 <= x0 or y1 <= y0:
+                continue
+
+            tile_boxes = format_yolo_lines(
+                *scene.assign(xi, yi, x0, y0, x1, y1, self.min_box_size)
+            )
+            if not tile_boxes:
+                continue
+
+            plan.append((f"{stem}_x{xi}_y{yi}{self.codec.ext}", (x0, y0, x1, y1), tile_boxes, 1.0))
+
+        return plan
+
+    def tile_single(self, image_name: str, timer: StepTimer = None):
+        timer = timer or StepTimer()
+        img_path = os.path.join(self.images_dir, image_name)
+        with timer.step("decode", 0):
+            reader = open_scene(img_path, self.read_mode, self.scene_cache_dir)
+        if reader is None:
+            return 0
+
+        img_h, img_w = reader.shape[:2]
+        with timer.step("assign"):
+            boxes = self._load_boxes(image_name)
+            plan = self._plan_tiles(image_name, boxes, img_w, img_h)
+
+        writer = TileWriterPool(self.encoder_threads, self.queue_size, self.codec)
+        try:
+            band_rows = None
+            for tile_name, (x0, y0, x1, y1), tile_boxes, scale in plan:
+                # Plan is row-major: every tile in a row shares one band
+                if band_rows != (y0, y1):
+                    with timer.step("decode"):
+                        band, band_rows = reader.read_band(y0, y1), (y0, y1)
+
+                writer.submit(
+                    os.path.join(self.output_images_dir, tile_name),
+                    crop_tile(band, x0, x1, scale),
+                    os.path.join(self.output_labels_dir, os.path.splitext(tile_name)[0] + ".txt"),
+                    tile_boxes,
+                )
+        finally:
+            # Tiles may still view the reader's pixels until the writers
+            # finish; the reader is closed even if a write failed
+            try:
+                writer.close(timer)
+            finally:
+                reader.close()
+
+        return len(plan)
+
+    def memory_report(self, image_name: str):
+        """
+        Tiles one scene in "full" and "windowed" mode, each in a fresh
+        process, and prints the peak RSS of both.
+        """
+        img_path = os.path.join(self.images_dir, image_name)
+        ctx = multiprocessing.get_context("spawn")
+        report = {}
+
+        with tempfile.TemporaryDirectory() as tmp:
+            # Warm the scene cache first so windowed mode is measured
+            # in steady state, not while it decodes the scene once
+            open_scene(img_path, "windowed", self.scene_cache_dir).close()
+
+            for mode in ("full", "windowed"):
+                tiler = YoloTiler(
+                    self.images_dir,
+                    self.labels_dir,
+                    os.path.join(tmp, mode, "images"),
+                    os.path.join(tmp, mode, "labels"),
+                    tile_size=self.tile_size,
+                    overlap=self.tile_size - self.stride,
+                    min_box_size=self.min_box_size,
+                    read_mode=mode,
+                    scene_cache_dir=self.scene_cache_dir,
+                    label_store=self.label_store and self.label_store.path,
+                    planner=self.planner,
+                    label_format=self.label_format,
+                    min_area_ratio=self.min_area_ratio,
+                    codec=self.codec,
+                    encoder_threads=self.encoder_threads,
+                    queue_size=self.queue_size,
+                )
+                with ProcessPoolExecutor(max_workers=1, mp_context=ctx) as pool:
+                    baseline_kb, peak_kb = pool.submit(
+                        _peak_rss_worker, tiler, image_name
+                    ).result()
+                report[mode] = {
+                    "peak_rss_mb": peak_kb / 1024,
+                    "tiling_rss_mb": (peak_kb - baseline_kb) / 1024,
+                }
+
+        reader = open_scene(img_path, "windowed", self.scene_cache_dir)
+        img_h, img_w, channels = reader.shape
+        reader.close()
+        report["scene_mb"] = img_h * img_w * channels / 1024 ** 2
+        report["band_mb"] = min(self.tile_size, img_h) * img_w * channels / 1024 ** 2
+
+        print(f"\n===== MEMORY REPORT: {image_name} ({img_w}x{img_h}) =====")
+        print(f"Decoded scene: {report['scene_mb']:.1f} MB")
+        print(f"One tile row band: {report['band_mb']:.1f} MB")
+        for mode in ("full", "windowed"):
+            print(
+                f"{mode:>8}: peak RSS {report[mode]['peak_rss_mb']:.1f} MB "
+                f"(+{report[mode]['tiling_rss_mb']:.1f} MB during tiling)"
+            )
+
+        return report
+
+    def codec_report(self, image_names, codecs, report_path: str = None):
+        """
+        Tiles the sample scenes once per codec (TileCodec list) into a
+        temporary folder and prints, per codec, encode time, tiles / s,
+        size on disk and the time to decode the tiles back, i.e. what a
+        training data loader pays for every tile, every epoch.
+        """
+        if self.read_mode == "windowed":
+            # Warm the scene cache so the first codec is not charged for it
+            for image_name in image_names:
+                reader = open_scene(
+                    os.path.join(self.images_dir, image_name), "windowed", self.scene_cache_dir
+                )
+                if reader is not None:
+                    reader.close()
+
+        report = {}
+        with tempfile.TemporaryDirectory() as tmp:
+            for codec in codecs:
+                tiler = YoloTiler(
+                    self.images_dir,
+                    self.labels_dir,
+                    os.path.join(tmp, codec.name, "images"),
+                    os.path.join(tmp, codec.name, "labels"),
+                    tile_size=self.tile_size,
+                    overlap=self.tile_size - self.stride,
+                    min_box_size=self.min_box_size,
+                    read_mode=self.read_mode,
+                    scene_cache_dir=self.scene_cache_dir,
+                    label_store=self.label_store and self.label_store.path,
+                    planner=self.planner,
+                    label_format=self.label_format,
+                    min_area_ratio=self.min_area_ratio,
+                    codec=codec,
+                    encoder_threads=self.encoder_threads,
+                    queue_size=self.queue_size,
+                )
+                timer = StepTimer()
+                t0 = time.perf_counter()
+                n_tiles = sum(tiler.tile_single(image_name, timer) for image_name in image_names)
+                wall = time.perf_counter() - t0
+
+                tiles = [
+                    os.path.join(tiler.output_images_dir, f)
+                    for f in os.listdir(tiler.output_images_dir)
+                ]
+                disk_bytes = sum(os.path.getsize(f) for f in tiles)
+                t0 = time.perf_counter()
+                for f in tiles:
+                    cv2.imread(f)
+                decode = time.perf_counter() - t0
+
+                report[codec.name] = {
+                    **codec.settings(),
+                    "tiles": n_tiles,
+                    "wall_s": wall,
+                    "encode_s": timer.steps.get("encode", (0.0, 0))[0],
+                    "tiles_per_s": n_tiles / wall if wall > 0 else 0.0,
+                    "disk_mb": disk_bytes / 1024 ** 2,
+                    "kb_per_tile": disk_bytes / 1024 / max(n_tiles, 1),
+                    "decode_ms_per_tile": 1000 * decode / max(n_tiles, 1),
+                }
+
+        print(f"\n===== CODEC REPORT: {len(image_names)} scene(s), {self.encoder_threads} encoder thread(s) =====")
+        print(f"{'codec':<12} {'tiles':>6} {'tiles/s':>8} {'encode s':>9} {'MB':>8} {'KB/tile':>8} {'decode ms':>10}")
+        for name, r in report.items():
+            print(
+                f"{name:<12} {r['tiles']:>6} {r['tiles_per_s']:>8.1f} {r['encode_s']:>9.2f} "
+                f"{r['disk_mb']:>8.1f} {r['kb_per_tile']:>8.1f} {r['decode_ms_per_tile']:>10.2f}"
+            )
+
+        if report_path:
+            with open(report_path, "w") as f:
+                json.dump(report, f, indent=2)
+            print(f"[DONE] Codec report saved: {report_path}")
+
+        return report
+
+    def _tile_parallel(self, images, on_done, stage):
+        total = len(images)
+        per_worker = defaultdict(lambda: [0, 0])
+        failures = []
+
+        with ProcessPoolExecutor(
+            max_workers=min(self.workers, total),
+            initializer=_init_worker,
+            initargs=(self,),
+        ) as pool:
+            futures = [pool.submit(_tile_worker, img) for img in images]
+
+            for done, future in enumerate(as_completed(futures), start=1):
+                pid, image_name, n_tiles, error, report = future.result()
+                stage.add_report(report)
+                if error is not None:
+                    failures.append((image_name, error))
+                    print(f"[WARN] worker {pid} failed on {image_name}: {error}")
                     continue
 
-                tile_boxes = []
-
-                for cid, xc, yc, w, h in boxes:
-                    xmin, ymin, xmax, ymax = self._yolo_to_pixel(
-                        xc, yc, w, h, img_w, img_h
-                    )
-
-                    xmin, ymin, xmax, ymax = self._clip_box(
-                        xmin, ymin, xmax, ymax, x0, y0, x1, y1
-                    )
-
-                    bw = xmax - xmin
-                    bh = ymax - ymin
-
-                    if bw < self.min_box_size or bh < self.min_box_size:
-                        continue
+                on_done(image_name, n_tiles)
+                per_worker[pid][0] += 1
+                per_worker[pid][1] += n_tiles
+                print(
+                    f"[INFO] [{done}/{total}] worker {pid}: "
+                    f"{image_name} -> {n_tiles} tiles"
+                )
 
-                    xmin -= x0
-                    ymin -= y0
-                    xmax -= x0
-                    ymax -= y0
+        for pid, (n_images, n_tiles) in sorted(per_worker.items()):
+            print(f"[INFO] worker {pid}: {n_images} images, {n_tiles} tiles")
 
-                    xc_n, yc_n, w_n, h_n = self._pixel_to_yolo(
-                        xmin, ymin, xmax, ymax, x1 - x0, y1 - y0
-                    )
+        return failures
 
-                    if w_n <= 0 or h_n <= 0:
-                        continue
+    def _label_path(self, image_name):
+        return os.path.join(
+            self.labels_dir, os.path.splitext(image_name)[0] + ".txt"
+        )
 
-                    tile_boxes.append(
-                        f"{cid} {xc_n:.6f} {yc_n:.6f} {w_n:.6f} {h_n:.6f}"
-                    )
+    def _scene_hashes(self, images):
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            image_hashes = pool.map(
+                file_hash, [os.path.join(self.images_dir, f) for f in images]
+            )
+            if self.label_store is not None:
+                label_hashes = [
+                    self.label_store.fingerprint(os.path.splitext(f)[0])
+                    for f in images
+                ]
+            else:
+                label_hashes = pool.map(
+                    file_hash, [self._label_path(f) for f in images]
+                )
+            return dict(zip(images, zip(image_hashes, label_hashes)))
+
+    def _remove_tiles(self, stems):
+        """
+        Removes every tile (image + label) whose scene stem is in stems.
+        """
+        removed = 0
+        for out_dir in (self.output_images_dir, self.output_labels_dir):
+            for f in os.listdir(out_dir):
+                match = _TILE_NAME.match(f)
+                if match and match.group(1) in stems:
+                    os.remove(os.path.join(out_dir, f))
+                    removed += out_dir == self.output_images_dir
+        return removed
+
+    def tile_all(self, force: bool = False):
+        with profile_stage(self.profiler, "tile") as stage:
+            self._tile_all(stage, force)
+
+    def _tile_all(self, stage, force):
+        images = [
+            f for f in os.listdir(self.images_dir)
+            if f.lower().endswith((".jpg", ".png"))
+        ]
 
-                if not tile_boxes:
-                    continue
+        params = {
+            "tile_size": self.tile_size,
+            "stride": self.stride,
+            "min_box_size": self.min_box_size,
+        }
+        if self.planner is not None:
+            params["planner"] = self.planner.params()
+        if self.label_format == "obb":
+            params["obb_min_area_ratio"] = self.min_area_ratio
+        if self.codec.settings() != TileCodec().settings():
+            params["codec"] = self.codec.settings()
+        manifest = TilingManifest(self.manifest_path, params)
+        if force:
+            manifest.scenes = {}
+        manifest.save()
+
+        with stage.step("hash", len(images)):
+            hashes = self._scene_hashes(images)
+        todo = [f for f in images if not manifest.is_current(f, *hashes[f])]
+
+        current = {os.path.splitext(f)[0] for f in images}
+        deleted = [f for f in manifest.scenes if f not in hashes]
+        for f in deleted:
+            manifest.forget(f)
+
+        # Stale tiles: scenes about to be re-tiled, and anything on disk
+        # that no longer belongs to a source scene
+        stale = {os.path.splitext(f)[0] for f in todo}
+        stale |= {
+            m.group(1)
+            for m in map(_TILE_NAME.match, os.listdir(self.output_images_dir))
+            if m and m.group(1) not in current
+        }
+        with stage.step("cleanup", len(stale)):
+            removed = self._remove_tiles(stale) if stale else 0
+
+        print(
+            f"[INFO] Tiling {len(todo)} of {len(images)} images "
+            f"({len(images) - len(todo)} up to date, {len(deleted)} deleted, "
+            f"{removed} stale tiles removed) with {self.workers} worker(s)"
+        )
 
-                tile_name = (
-                    f"{os.path.splitext(image_name)[0]}"
-                    f"_x{xi}_y{yi}.jpg"
-                )
+        def on_done(image_name, n_tiles):
+            manifest.record(image_name, *hashes[image_name], n_tiles)
+            stage.items += n_tiles
 
-                cv2.imwrite(
-                    os.path.join(self.output_images_dir, tile_name), tile
-                )
+        if self.workers > 1 and len(todo) > 1:
+            failures = self._tile_parallel(todo, on_done, stage)
+            if failures:
+                print(f"[WARN] {len(failures)} image(s) failed to tile")
+        else:
+            for img in todo:
+                on_done(img, self.tile_single(img, stage.timer))
 
-                with open(
-                    os.path.join(
-                        self.output_labels_dir,
-                        tile_name.replace(".jpg", ".txt"),
-                    ),
-                    "w",
-                ) as f:
-                    f.write("\n".join(tile_boxes))
+        manifest.save()
+        print("[DONE] Tiling complete")
 
-    def tile_all(self):
+    def build_index(self, index_path: str, cache_scenes: bool = True):
+        """
+        Writes a virtual tile index instead of tile images / labels.
+
+        Each entry is (name, scene, window=[x0, y0, x1, y1], boxes) with
+        boxes as [class, xc, yc, w, h] normalized to the tile, exactly as
+        tile_all would write them. Scene sizes come from the image header,
+        so re-indexing with another overlap takes seconds.
+        With cache_scenes, the uncompressed scene cache the dataset crops
+        from is built as well (in parallel when workers > 1).
+        """
+        with profile_stage(self.profiler, "index") as stage:
+            self._build_index(stage, index_path, cache_scenes)
+
+    def _build_index(self, stage, index_path, cache_scenes):
+        assert self.label_format == "hbb", "virtual tiles support HBB labels only"
         images = [
             f for f in os.listdir(self.images_dir)
             if f.lower().endswith((".jpg", ".png"))
         ]
 
-        print(f"[INFO] Tiling {len(images)} images")
+        print(f"[INFO] Indexing {len(images)} images")
 
+        tiles = []
         for img in images:
-            self.tile_single(img)
-
-        print("[DONE] Tiling complete")
+            with stage.step("header"):
+                with Image.open(os.path.join(self.images_dir, img)) as im:
+                    img_w, img_h = im.size
+
+            with stage.step("assign"):
+                boxes = self._load_boxes(img)
+                plan = self._plan_tiles(img, boxes, img_w, img_h)
+
+            for tile_name, window, tile_boxes, scale in plan:
+                tiles.append({
+                    "name": tile_name,
+                    "scene": img,
+                    "window": list(window),
+                    "scale": scale,
+                    "boxes": [
+                        [float(v) for v in line.split()] for line in tile_boxes
+                    ],
+                })
+
+        stage.items = len(tiles)
+
+        if cache_scenes:
+            paths = [os.path.join(self.images_dir, f) for f in images]
+            with stage.step("cache", len(paths)), ProcessPoolExecutor(max_workers=self.workers) as pool:
+                cached = pool.map(
+                    _cache_scene, paths, [self.scene_cache_dir] * len(paths)
+                )
+                n_failed = len(paths) - sum(cached)
+            if n_failed:
+                print(f"[WARN] {n_failed} scene(s) could not be decoded")
+
+        os.makedirs(os.path.dirname(os.path.abspath(index_path)), exist_ok=True)
+        with open(index_path, "w") as f:
+            json.dump(
+                {
+                    "images_dir": os.path.abspath(self.images_dir),
+                    "scene_cache_dir": os.path.abspath(self.scene_cache_dir),
+                    "tile_size": self.tile_size,
+                    "stride": self.stride,
+                    "tiles": tiles,
+                },
+                f,
+            )
+
+        print(f"[DONE] Indexed {len(tiles)} virtual tiles -> {index_path}")
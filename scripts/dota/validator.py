@@ -0,0 +1,406 @@
+import os
+import json
+import pickle
+import numpy as np
+import cv2
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from .profiling import profile_stage
+from .tilecodec import TILE_EXTS
+from .tiler import LABEL_FORMATS
+
+ISSUES = (
+    "decode",          # image does not decode
+    "truncated",       # JPEG without end-of-image marker
+    "missing_label",   # image without a label file
+    "malformed",       # label line with a wrong field count / non-numeric field
+    "bad_class",       # class id not an integer in [0, num_classes)
+    "out_of_bounds",   # coordinate outside [0, 1]
+    "degenerate",      # box / polygon below min_box_size px
+    "duplicate_box",   # the same row twice in one label file
+)
+
+
+def dhash(gray, hash_size: int = 8):
+    """
+    Difference hash of a grayscale image as a Python int of
+    hash_size ** 2 bits: brighter / darker between horizontal
+    neighbours of a (hash_size + 1) x hash_size thumbnail.
+    """
+    small = cv2.resize(gray, (hash_size + 1, hash_size), interpolation=cv2.INTER_AREA)
+    bits = (small[:, 1:] > small[:, :-1]).ravel()
+    return int.from_bytes(np.packbits(bits).tobytes(), "big")
+
+
+def _check_labels(text, img_w, img_h, num_classes, label_format, min_box_size):
+    """
+    (issues, number of boxes) of one label file's text.
+    """
+    n_cols = 9 if label_format == "obb" else 5
+    issues = set()
+    rows = []
+    for line in text.splitlines():
+        parts = line.split()
+        if not parts:
+            continue
+        if len(parts) != n_cols:
+            issues.add("malformed")
+            continue
+        try:
+            rows.append([float(p) for p in parts])
+        except ValueError:
+            issues.add("malformed")
+    if not rows:
+        return issues, 0
+
+    rows = np.array(rows, dtype=np.float64)
+    cls = rows[:, 0]
+    if ((cls != np.round(cls)) | (cls < 0) | (cls >= num_classes)).any():
+        issues.add("bad_class")
+
+    if label_format == "obb":
+        coords = rows[:, 1:]
+        xs, ys = coords[:, 0::2] * img_w, coords[:, 1::2] * img_h
+        # Shoelace area of the polygon in pixels, against a min_box_size square
+        area = np.abs(
+            (xs * np.roll(ys, -1, axis=1) - np.roll(xs, -1, axis=1) * ys).sum(axis=1)
+        ) / 2
+        small = area < min_box_size ** 2
+    else:
+        xc, yc, w, h = rows[:, 1:].T
+        coords = np.column_stack([xc - w / 2, yc - h / 2, xc + w / 2, yc + h / 2])
+        small = (w * img_w < min_box_size) | (h * img_h < min_box_size)
+
+    # Boxes written with 6 decimals may overshoot by rounding
+    if ((coords < -1e-6) | (coords > 1 + 1e-6)).any():
+        issues.add("out_of_bounds")
+    if small.any():
+        issues.add("degenerate")
+    if len(np.unique(rows, axis=0)) < len(rows):
+        issues.add("duplicate_box")
+    return issues, len(rows)
+
+
+def _check_chunk(jobs, num_classes, label_format, min_box_size, hash_size):
+    """
+    [(image_path, stamp, record)] for jobs of (image_path, label_path, stamp).
+    record: issues (sorted list), boxes, dhash (None if undecodable).
+    """
+    # One process per core already; keep OpenCV from oversubscribing it
+    cv2.setNumThreads(1)
+    results = []
+    for image_path, label_path, stamp in jobs:
+        issues = set()
+        gray = cv2.imread(image_path, cv2.IMREAD_GRAYSCALE)
+        if gray is None or gray.size == 0:
+            issues.add("decode")
+        elif image_path.lower().endswith((".jpg", ".jpeg")):
+            with open(image_path, "rb") as f:
+                f.seek(-2, os.SEEK_END)
+                if f.read() != b"\xff\xd9":
+                    issues.add("truncated")
+
+        n_boxes = 0
+        if label_path is None:
+            issues.add("missing_label")
+        elif gray is not None:
+            with open(label_path, "r") as f:
+                label_issues, n_boxes = _check_labels(
+                    f.read(), gray.shape[1], gray.shape[0], num_classes, label_format, min_box_size
+                )
+            issues |= label_issues
+
+        results.append((
+            image_path,
+            stamp,
+            {
+                "issues": sorted(issues),
+                "boxes": n_boxes,
+                "dhash": None if gray is None or gray.size == 0 else dhash(gray, hash_size),
+            },
+        ))
+    return results
+
+
+def _stamp(path):
+    if path is None:
+        return None
+    st = os.stat(path)
+    return st.st_size, st.st_mtime_ns
+
+
+class DatasetValidator:
+    """
+    Integrity checks over tiler / splitter outputs, before training.
+
+    splits maps a name to an (images_dir, labels_dir) pair, e.g.
+    {"tiles": (dataset_tiles/images, dataset_tiles/labels)} or
+    {"train": ..., "val": ...}. Every image is checked for:
+    - decode: it decodes; "truncated": JPEGs end with their EOI marker
+    - pairing: a label file exists (empty files are fine, e.g.
+      background tiles); label files without an image are reported as
+      orphans
+    - labels: field count, integer class ids below num_classes,
+      coordinates within [0, 1], boxes (or OBB polygon areas) of at least
+      min_box_size px, and no duplicated rows
+
+    Each image also gets a difference hash (dhash, hash_size ** 2 bits).
+    Near-duplicates, hashes at most max_distance bits apart, are found
+    through a banded index: the hash is cut into max_distance + 1 bands,
+    and two hashes that close share at least one band exactly, so only
+    images sharing a band are compared. Near-duplicates across splits
+    (e.g. train / val) are reported separately as leakage; prune()
+    removes all but one image of each duplicate group.
+
+    Checks run over a process pool in chunks. Results are cached in
+    cache_path per image path, with the size and mtime of the image and
+    its label, so a re-run only checks new or changed files.
+
+    With profiler (a RunProfiler), run() is recorded as a "validate"
+    stage with list / check / index sub-steps.
+    """
+    def __init__(
+        self,
+        splits: dict,
+        num_classes: int,
+        label_format: str = "hbb",
+        min_box_size: int = 2,
+        hash_size: int = 8,
+        max_distance: int = 3,
+        workers: int = 1,
+        chunk_size: int = 256,
+        cache_path: str = None,
+        profiler=None,
+    ):
+        assert label_format in LABEL_FORMATS, f"label_format must be one of {LABEL_FORMATS}"
+        assert splits, "no splits to validate"
+        self.splits = dict(splits)
+        self.num_classes = num_classes
+        self.label_format = label_format
+        self.min_box_size = min_box_size
+        self.hash_size = hash_size
+        self.max_distance = max_distance
+        self.workers = max(1, workers)
+        self.chunk_size = chunk_size
+        # Default: next to the folder holding every images / labels dir
+        # (e.g. beside dataset/), so the cache never lands in the
+        # validated tree and changes its fingerprint
+        self.cache_path = cache_path or os.path.join(
+            os.path.dirname(os.path.commonpath(
+                [os.path.abspath(d) for dirs in self.splits.values() for d in dirs]
+            )),
+            "validation_cache.pkl",
+        )
+        self.profiler = profiler
+
+    def _cache_key(self):
+        return {
+            "num_classes": self.num_classes,
+            "label_format": self.label_format,
+            "min_box_size": self.min_box_size,
+            "hash_size": self.hash_size,
+        }
+
+    def _load_cache(self):
+        if not os.path.exists(self.cache_path):
+            return {}
+        try:
+            with open(self.cache_path, "rb") as f:
+                cache = pickle.load(f)
+        except Exception:
+            print("[WARN] Unreadable validation cache, rebuilding")
+            return {}
+        if cache.get("key") != self._cache_key():
+            return {}
+        return cache["images"]
+
+    def _save_cache(self, images):
+        tmp_path = self.cache_path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            pickle.dump({"key": self._cache_key(), "images": images}, f)
+        os.replace(tmp_path, self.cache_path)
+
+    def _list(self):
+        """
+        ([(split, image_path, label_path or None, stamp)], orphan label paths).
+        """
+        jobs, orphans = [], []
+        for split, (images_dir, labels_dir) in self.splits.items():
+            images = sorted(f for f in os.listdir(images_dir) if f.lower().endswith(TILE_EXTS))
+            labels = {
+                os.path.splitext(f)[0]
+                for f in os.listdir(labels_dir) if f.endswith(".txt")
+            } if os.path.isdir(labels_dir) else set()
+            stems = set()
+            for f in images:
+                stem = os.path.splitext(f)[0]
+                stems.add(stem)
+                image_path = os.path.join(images_dir, f)
+                label_path = os.path.join(labels_dir, stem + ".txt") if stem in labels else None
+                jobs.append((split, image_path, label_path, (_stamp(image_path), _stamp(label_path))))
+            orphans.extend(os.path.join(labels_dir, s + ".txt") for s in sorted(labels - stems))
+        return jobs, orphans
+
+    def _check(self, todo):
+        chunks = [todo[i:i + self.chunk_size] for i in range(0, len(todo), self.chunk_size)]
+        args = (self.num_classes, self.label_format, self.min_box_size, self.hash_size)
+        if self.workers > 1 and len(chunks) > 1:
+            with ProcessPoolExecutor(max_workers=self.workers) as pool:
+                futures = [pool.submit(_check_chunk, chunk, *args) for chunk in chunks]
+                for future in futures:
+                    yield from future.result()
+        else:
+            for chunk in chunks:
+                yield from _check_chunk(chunk, *args)
+
+    def near_duplicates(self, paths, hashes):
+        """
+        Groups (lists of paths, sorted) of images whose hashes are at
+        most max_distance bits apart, joined transitively.
+
+        Images with equal hashes are grouped first, then only the distinct
+        hash values are compared pairwise inside each band bucket.
+        """
+        bits = self.hash_size ** 2
+        n_bands = self.max_distance + 1
+        edges = np.linspace(0, bits, n_bands + 1).astype(int).tolist()
+
+        by_hash = defaultdict(list)
+        for i, h in enumerate(hashes):
+            by_hash[h].append(i)
+        unique = list(by_hash)
+        parent = list(range(len(unique)))
+
+        def find(i):
+            while parent[i] != i:
+                parent[i] = parent[parent[i]]
+                i = parent[i]
+            return i
+
+        for lo, hi in zip(edges[:-1], edges[1:]):
+            buckets = defaultdict(list)
+            mask = (1 << (hi - lo)) - 1
+            for i, h in enumerate(unique):
+                buckets[(h >> lo) & mask].append(i)
+            for members in buckets.values():
+                for a, i in enumerate(members):
+                    for j in members[a + 1:]:
+                        if (unique[i] ^ unique[j]).bit_count() <= self.max_distance:
+                            parent[find(i)] = find(j)
+
+        groups = defaultdict(list)
+        for u, h in enumerate(unique):
+            groups[find(u)].extend(paths[i] for i in by_hash[h])
+        return sorted(sorted(g) for g in groups.values() if len(g) > 1)
+
+    def run(self, report_path: str = None):
+        with profile_stage(self.profiler, "validate") as stage:
+            return self._run(stage, report_path)
+
+    def _run(self, stage, report_path):
+        with stage.step("list"):
+            jobs, orphans = self._list()
+            cached = self._load_cache()
+        records = {}
+        todo = []
+        for _, image_path, label_path, stamp in jobs:
+            entry = cached.get(image_path)
+            if entry is not None and entry[0] == stamp:
+                records[image_path] = entry
+            else:
+                todo.append((image_path, label_path, stamp))
+
+        print(
+            f"[INFO] Validating {len(todo)} of {len(jobs)} images "
+            f"({len(jobs) - len(todo)} cached) with {self.workers} worker(s)"
+        )
+        with stage.step("check", len(todo)):
+            for image_path, stamp, record in self._check(todo):
+                records[image_path] = (stamp, record)
+        stage.items = len(jobs)
+        if todo or len(records) != len(cached):
+            self._save_cache(records)
+
+        issues = {name: [] for name in ISSUES}
+        empty = 0
+        for _, image_path, _, _ in jobs:
+            record = records[image_path][1]
+            for name in record["issues"]:
+                issues[name].append(image_path)
+            empty += record["boxes"] == 0 and not record["issues"]
+
+        with stage.step("index", len(jobs)):
+            hashed = [
+                (image_path, records[image_path][1]["dhash"])
+                for _, image_path, _, _ in jobs
+                if records[image_path][1]["dhash"] is not None
+            ]
+            groups = self.near_duplicates([p for p, _ in hashed], [h for _, h in hashed])
+
+        split_of = {image_path: split for split, image_path, _, _ in jobs}
+        cross_split = [g for g in groups if len({split_of[p] for p in g}) > 1]
+
+        report = {
+            "images": len(jobs),
+            "checked": len(todo),
+            "empty_labels": empty,
+            "issues": {name: paths for name, paths in issues.items() if paths},
+            "orphan_labels": orphans,
+            "duplicate_groups": groups,
+            "cross_split_groups": cross_split,
+        }
+        self._print(report)
+
+        if report_path:
+            with open(report_path, "w") as f:
+                json.dump(report, f, indent=2)
+            print(f"[DONE] Validation report saved: {report_path}")
+        return report
+
+    @staticmethod
+    def _print(report):
+        print("\n===== DATASET VALIDATION =====\n")
+        print(f"Images: {report['images']} ({report['checked']} checked, rest cached)")
+        print(f"Empty label files: {report['empty_labels']}")
+        for name, paths in report["issues"].items():
+            print(f"[WARN] {name}: {len(paths)} image(s), e.g. {paths[0]}")
+        if report["orphan_labels"]:
+            print(f"[WARN] orphan labels: {len(report['orphan_labels'])}, e.g. {report['orphan_labels'][0]}")
+        n_dupes = sum(len(g) - 1 for g in report["duplicate_groups"])
+        print(f"Near-duplicate groups: {len(report['duplicate_groups'])} ({n_dupes} redundant images)")
+        if report["cross_split_groups"]:
+            print(f"[WARN] {len(report['cross_split_groups'])} near-duplicate group(s) span splits")
+        if not report["issues"] and not report["orphan_labels"]:
+            print("[DONE] No integrity issues")
+
+    def prune(self, report, dry_run: bool = True):
+        """
+        Removes all but the first (sorted) image of each near-duplicate
+        group in report, with its label file. A group spanning splits
+        keeps one image per split: that is a train / val leak, to fix at
+        split time rather than by deleting. Returns the removed images.
+        """
+        labels_of = {
+            os.path.normpath(images_dir): labels_dir for images_dir, labels_dir in self.splits.values()
+        }
+        removed = []
+        for group in report["duplicate_groups"]:
+            kept_dirs = set()
+            for image_path in group:
+                images_dir = os.path.dirname(os.path.normpath(image_path))
+                if images_dir not in kept_dirs:
+                    kept_dirs.add(images_dir)
+                    continue
+                removed.append(image_path)
+                if dry_run:
+                    continue
+                os.remove(image_path)
+                label_path = os.path.join(
+                    labels_of[images_dir], os.path.splitext(os.path.basename(image_path))[0] + ".txt"
+                )
+                if os.path.exists(label_path):
+                    os.remove(label_path)
+
+        verb = "Would remove" if dry_run else "Removed"
+        print(f"[DONE] {verb} {len(removed)} near-duplicate image(s)")
+        return removed
@@ -1,6 +1,53 @@
 import os
+import re
+import json
+import time
 import random
 import cv2
+import numpy as np
+from PIL import Image
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from .labelstore import LabelStore
+
+IMAGE_EXTS = (".jpg", ".png", ".jpeg", ".webp")
+LABEL_COLOR = (0, 255, 0)
+PRED_COLOR = (0, 0, 255)
+# <stem>_x{xi}_y{yi}[_s{percent}].<ext>, as written by YoloTiler
+_TILE_POS = re.compile(r"^(.+)_x(\d+)_y(\d+)(_s\d+)?\.\w+$")
+_REDUCED_READ = ((8, cv2.IMREAD_REDUCED_COLOR_8), (4, cv2.IMREAD_REDUCED_COLOR_4), (2, cv2.IMREAD_REDUCED_COLOR_2))
+
+
+def _read_reduced(path, scale: float = None, max_side: int = None):
+    """
+    Image decoded at scale x its size, or scaled so its long side is at
+    most max_side (never upscaled). JPEG decodes straight to 1/2, 1/4 or
+    1/8 size, much cheaper than a full decode and resize; the rest is
+    resized with INTER_AREA.
+    Returns (pixels, (orig_w, orig_h)), or (None, None).
+    """
+    try:
+        with Image.open(path) as im:
+            w, h = im.size
+    except OSError:
+        return None, None
+    if scale is None:
+        scale = min(1.0, max_side / max(w, h))
+
+    flag = cv2.IMREAD_COLOR
+    for factor, reduced in _REDUCED_READ:
+        if scale * factor <= 1:
+            flag = reduced
+            break
+    image = cv2.imread(path, flag)
+    if image is None:
+        return None, None
+
+    size = (max(1, round(w * scale)), max(1, round(h * scale)))
+    if (image.shape[1], image.shape[0]) != size:
+        image = cv2.resize(image, size, interpolation=cv2.INTER_AREA)
+    return image, (w, h)
+
 
 class YoloVisualizer:
     """
@@ -9,39 +56,63 @@ class YoloVisualizer:
     - Loads images + YOLO labels
     - Draws bounding boxes
     - Lets you visually confirm correctness
+
+    visualize_random() needs a display. For headless servers,
+    render_contact_sheets() packs many annotated tiles into grid images
+    and render_scenes() reassembles tiles into downscaled full-scene
+    overlays; both render on a thread pool and can overlay predictions
+    (PredictionCache.detections()) next to the labels.
+
+    With label_store (a LabelStore directory), labels are read from the
+    packed store instead of labels_dir.
     """
-    def __init__(self, images_dir: str, labels_dir: str, class_names: dict, window_name: str = "YOLO Sanity Check"):
+    def __init__(self, images_dir: str, labels_dir: str, class_names: dict, window_name: str = "YOLO Sanity Check", label_store: str = None):
         self.images_dir = images_dir
         self.labels_dir = labels_dir
+        self.label_store = LabelStore.load(label_store) if label_store else None
         self.class_names = class_names
         self.window_name = window_name
     
-    def _load_yolo_labels(self, label_path, img_w, img_h):
-        boxes = []
+    def _load_label_rows(self, img_name):
+        """
+        (k, 5) array of class, xc, yc, w, h, or None if there is no label.
+        """
+        stem = os.path.splitext(img_name)[0]
+        if self.label_store is not None:
+            return self.label_store.get(stem)
+
+        label_path = os.path.join(self.labels_dir, stem + ".txt")
+        if not os.path.exists(label_path):
+            return None
 
+        rows = []
         with open(label_path, "r") as f:
             for line in f:
                 parts = line.strip().split()
                 if len(parts) != 5:
                     continue
+                rows.append(parts)
 
-                class_id, xc, yc, w, h = map(float, parts)
-                class_id = int(class_id)
+        return np.array(rows, dtype=np.float64).reshape(-1, 5)
 
-                # Convert YOLO → pixel coordinates
-                box_w = w * img_w
-                box_h = h * img_h
-                x_center = xc * img_w
-                y_center = yc * img_h
+    def _load_yolo_labels(self, rows, img_w, img_h):
+        class_id, xc, yc, w, h = np.asarray(rows, dtype=np.float64).T
 
-                xmin = int(x_center - box_w / 2)
-                ymin = int(y_center - box_h / 2)
-                xmax = int(x_center + box_w / 2)
-                ymax = int(y_center + box_h / 2)
+        # Convert YOLO → pixel coordinates
+        box_w = w * img_w
+        box_h = h * img_h
+        x_center = xc * img_w
+        y_center = yc * img_h
 
-                boxes.append((class_id, xmin, ymin, xmax, ymax))
+        xmin = (x_center - box_w / 2).astype(int)
+        ymin = (y_center - box_h / 2).astype(int)
+        xmax = (x_center + box_w / 2).astype(int)
+        ymax = (y_center + box_h / 2).astype(int)
 
-        return boxes
+        return list(zip(
+            class_id.astype(int).tolist(),
+            xmin.tolist(), ymin.tolist(), xmax.tolist(), ymax.tolist(),
+        ))
     
     def _draw_boxes(self, image, boxes):
         for class_id, xmin, ymin, xmax, ymax in boxes:
@@ -65,7 +136,7 @@ class YoloVisualizer:
     def visualize_random(self, num_images: int = 5):
         images = [
             f for f in os.listdir(self.images_dir)
-            if f.lower().endswith((".jpg", ".png", ".jpeg"))
+            if f.lower().endswith(IMAGE_EXTS)
         ]
 
         if not images:
@@ -75,11 +146,9 @@ class YoloVisualizer:
 
         for img_name in sample:
             img_path = os.path.join(self.images_dir, img_name)
-            label_path = os.path.join(
-                self.labels_dir, os.path.splitext(img_name)[0] + ".txt"
-            )
+            rows = self._load_label_rows(img_name)
 
-            if not os.path.exists(label_path):
+            if rows is None:
                 print(f"[WARN] No label for {img_name}")
                 continue
 
@@ -88,7 +157,7 @@ class YoloVisualizer:
                 continue
 
             img_h, img_w = image.shape[:2]
-            boxes = self._load_yolo_labels(label_path, img_w, img_h)
+            boxes = self._load_yolo_labels(rows, img_w, img_h)
             image = self._draw_boxes(image, boxes)
 
             cv2.imshow(self.window_name, image)
@@ -98,4 +167,194 @@ class YoloVisualizer:
             if key == 27:
                 break
 
-        cv2.destroyAllWindows()
\ No newline at end of file
+        cv2.destroyAllWindows()
+
+    def _tile_boxes(self, img_name, predictions):
+        """
+        Normalized xyxy label boxes (+ class ids) and predicted boxes of a
+        tile; predictions are looked up by file name.
+        """
+        rows = self._load_label_rows(img_name)
+        if rows is None or not len(rows):
+            labels = np.zeros((0, 4)), np.zeros(0, dtype=int)
+        else:
+            cls, xc, yc, w, h = np.asarray(rows, dtype=np.float64).T
+            labels = (
+                np.column_stack([xc - w / 2, yc - h / 2, xc + w / 2, yc + h / 2]),
+                cls.astype(int),
+            )
+
+        pred = (predictions or {}).get(img_name)
+        preds = np.zeros((0, 4)) if pred is None else np.asarray(pred[0], dtype=np.float64)
+        return labels, preds
+
+    def _draw_normalized(self, image, boxes, color, offset=(0, 0), size=None, class_ids=None):
+        """
+        Draws normalized xyxy boxes of an image of size (w, h) pasted at
+        offset, 1 px wide; class names only when class_ids are given.
+        """
+        w, h = size or (image.shape[1], image.shape[0])
+        pixels = (np.asarray(boxes, dtype=np.float64).reshape(-1, 4) * [w, h, w, h] + [*offset, *offset]).astype(int)
+        for i, (x0, y0, x1, y1) in enumerate(pixels.tolist()):
+            cv2.rectangle(image, (x0, y0), (x1, y1), color, 1)
+            if class_ids is not None:
+                label = self.class_names.get(int(class_ids[i]), str(class_ids[i]))
+                cv2.putText(image, label, (x0, max(y0 - 3, 8)), cv2.FONT_HERSHEY_SIMPLEX, 0.3, color, 1, cv2.LINE_AA)
+
+    def _render_thumb(self, img_name, thumb_size, predictions):
+        image, _ = _read_reduced(os.path.join(self.images_dir, img_name), max_side=thumb_size)
+        if image is None:
+            return None
+
+        (labels, class_ids), preds = self._tile_boxes(img_name, predictions)
+        self._draw_normalized(image, labels, LABEL_COLOR, class_ids=class_ids)
+        self._draw_normalized(image, preds, PRED_COLOR)
+
+        thumb = np.full((thumb_size, thumb_size, 3), 32, dtype=np.uint8)
+        thumb[:image.shape[0], :image.shape[1]] = image
+        cv2.putText(
+            thumb, f"{img_name} ({len(labels)}/{len(preds)})", (3, thumb_size - 5),
+            cv2.FONT_HERSHEY_SIMPLEX, 0.3, (255, 255, 255), 1, cv2.LINE_AA,
+        )
+        return thumb
+
+    def render_contact_sheets(
+        self,
+        out_dir: str,
+        images=None,
+        predictions: dict = None,
+        cols: int = 8,
+        rows: int = 6,
+        thumb_size: int = 256,
+        threads: int = 8,
+        quality: int = 85,
+    ):
+        """
+        Headless QA: draws labels (green) and predictions (red) on every
+        tile of images (default: all of images_dir, sorted) and packs
+        them into cols x rows grids, written as <out_dir>/sheet_NNNN.jpg.
+        Each thumbnail is captioned "name (labels/predictions)".
+
+        Tiles are decoded at thumbnail size (see _read_reduced) and
+        rendered on a thread pool; OpenCV releases the GIL while it
+        decodes, draws and resizes. predictions maps image path or file
+        name to (normalized xyxy boxes, scores, classes), e.g.
+        PredictionCache.detections(). sheets.json lists the tiles of
+        every sheet.
+        """
+        t0 = time.perf_counter()
+        if images is None:
+            images = sorted(f for f in os.listdir(self.images_dir) if f.lower().endswith(IMAGE_EXTS))
+        if predictions:
+            predictions = {os.path.basename(k): v for k, v in predictions.items()}
+        os.makedirs(out_dir, exist_ok=True)
+
+        per_sheet = cols * rows
+        index = {}
+        with ThreadPoolExecutor(max_workers=max(1, threads)) as pool:
+            thumbs = pool.map(lambda name: self._render_thumb(name, thumb_size, predictions), images)
+            for start in range(0, len(images), per_sheet):
+                sheet = np.zeros((rows * thumb_size, cols * thumb_size, 3), dtype=np.uint8)
+                names = images[start:start + per_sheet]
+                for i, name in enumerate(names):
+                    thumb = next(thumbs)
+                    if thumb is None:
+                        print(f"[WARN] cannot decode {name}")
+                        continue
+                    r, c = divmod(i, cols)
+                    sheet[r * thumb_size:(r + 1) * thumb_size, c * thumb_size:(c + 1) * thumb_size] = thumb
+
+                # The last sheet keeps only the rows it fills
+                used_rows = -(-len(names) // cols)
+                sheet_name = f"sheet_{start // per_sheet:04d}.jpg"
+                cv2.imwrite(
+                    os.path.join(out_dir, sheet_name),
+                    sheet[:used_rows * thumb_size],
+                    [cv2.IMWRITE_JPEG_QUALITY, quality],
+                )
+                index[sheet_name] = names
+
+        with open(os.path.join(out_dir, "sheets.json"), "w") as f:
+            json.dump(index, f, indent=2)
+        print(
+            f"[DONE] {len(index)} contact sheet(s) of {len(images)} tiles in "
+            f"{time.perf_counter() - t0:.1f}s: {out_dir}"
+        )
+        return index
+
+    def _render_scene(self, stem, tiles, stride, scale, predictions):
+        """
+        Pastes the tiles of one scene, downscaled, at their grid position
+        and draws their labels and predictions in scene coordinates.
+        Boxes cut by overlapping tiles are drawn once per tile.
+        """
+        placed = []
+        for name, xi, yi in tiles:
+            image, size = _read_reduced(os.path.join(self.images_dir, name), scale)
+            if image is None:
+                print(f"[WARN] cannot decode {name}")
+                continue
+            placed.append((name, round(xi * stride * scale), round(yi * stride * scale), image, size))
+        if not placed:
+            return None
+
+        canvas_w = max(x + image.shape[1] for _, x, _, image, _ in placed)
+        canvas_h = max(y + image.shape[0] for _, _, y, image, _ in placed)
+        canvas = np.full((canvas_h, canvas_w, 3), 32, dtype=np.uint8)
+        for _, x, y, image, _ in placed:
+            canvas[y:y + image.shape[0], x:x + image.shape[1]] = image
+
+        # Boxes after all pixels, so an overlapping tile does not paint over them
+        for name, x, y, _, (w, h) in placed:
+            (labels, _), preds = self._tile_boxes(name, predictions)
+            size = (w * scale, h * scale)
+            self._draw_normalized(canvas, labels, LABEL_COLOR, (x, y), size)
+            self._draw_normalized(canvas, preds, PRED_COLOR, (x, y), size)
+        return canvas
+
+    def render_scenes(
+        self,
+        out_dir: str,
+        tile_size: int = 1024,
+        overlap: int = 200,
+        scale: float = 0.25,
+        predictions: dict = None,
+        stems=None,
+        threads: int = 8,
+        quality: int = 85,
+    ):
+        """
+        Reassembles the tiles of each scene (from their _x{xi}_y{yi}
+        names and the tiling tile_size / overlap) into one overlay at
+        scale, written as <out_dir>/<stem>.jpg. Grid cells without a
+        tile stay dark grey; pyramid (_s) tiles are skipped. Scenes are
+        rendered on a thread pool. stems limits the scenes rendered.
+        """
+        t0 = time.perf_counter()
+        stride = tile_size - overlap
+        scenes = defaultdict(list)
+        for f in sorted(os.listdir(self.images_dir)):
+            match = _TILE_POS.match(f)
+            if match and not match.group(4) and f.lower().endswith(IMAGE_EXTS):
+                scenes[match.group(1)].append((f, int(match.group(2)), int(match.group(3))))
+        if stems is not None:
+            scenes = {stem: scenes[stem] for stem in stems if stem in scenes}
+        if predictions:
+            predictions = {os.path.basename(k): v for k, v in predictions.items()}
+        os.makedirs(out_dir, exist_ok=True)
+
+        def render(stem):
+            canvas = self._render_scene(stem, scenes[stem], stride, scale, predictions)
+            if canvas is None:
+                return False
+            cv2.imwrite(os.path.join(out_dir, f"{stem}.jpg"), canvas, [cv2.IMWRITE_JPEG_QUALITY, quality])
+            return True
+
+        with ThreadPoolExecutor(max_workers=max(1, threads)) as pool:
+            written = sum(pool.map(render, list(scenes)))
+
+        print(
+            f"[DONE] {written} scene overlay(s) from "
+            f"{sum(len(t) for t in scenes.values())} tiles in {time.perf_counter() - t0:.1f}s: {out_dir}"
+        )
+        return written
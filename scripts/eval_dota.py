@@ -6,4 +6,13 @@ evaluator = YoloEvaluator(
 )
 
 metrics = evaluator.evaluate(imgsz=640)
-print(metrics)
\ No newline at end of file
+print(metrics)
+
+# Threshold / NMS sweep from cached raw predictions (model runs once)
+evaluator.sweep(imgsz=640, confs=(0.001, 0.1, 0.25), ious=(0.5, 0.6, 0.7))
+
+scene_metrics = evaluator.evaluate_scenes(
+    images_dir="/home/royalbrothers/open_source_yolo_project/dataset_before_split/images",
+    labels_dir="/home/royalbrothers/open_source_yolo_project/dataset_before_split/labels",
+)
+print(scene_metrics)
@@ -0,0 +1,12 @@
+from train import ModelExporter
+
+exporter = ModelExporter(
+    model_path="/home/royalbrothers/open_source_yolo_project/scripts/runs/dota/baseline/weights/best.pt",
+    data_yaml="/home/royalbrothers/open_source_yolo_project/data/dataset.yaml",
+    imgsz=640,
+    formats=("torchscript", "onnx"),
+    int8=True,
+    n_images=200,
+)
+
+exporter.benchmark()
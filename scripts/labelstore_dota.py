@@ -0,0 +1,8 @@
+from dota.labelstore import LabelStore
+
+if __name__ == "__main__":
+    store = LabelStore.from_yolo_dir(
+        labels_dir="/home/royalbrothers/open_source_yolo_project/dataset_tiles/labels",
+        workers=8
+    )
+    store.save("/home/royalbrothers/open_source_yolo_project/dataset_tiles/labels.store")
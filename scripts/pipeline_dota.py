@@ -0,0 +1,104 @@
+import os
+from dota.converter import DotoYoloConverter
+from dota.tiler import YoloTiler
+from dota.splitter import TrainValSplitter
+from dota.datastats import DotaDatastats
+from dota.validator import DatasetValidator
+from dota.classes import CLASS_NAMES
+from dota.pipeline import Pipeline, PipelineStage
+
+ROOT = "/home/royalbrothers/open_source_yolo_project"
+
+IMAGES = f"{ROOT}/dataset_before_split/images"
+DOTA_LABELS = f"{ROOT}/dataset_before_split/labelTxt"  # raw DOTA annotations
+LABELS = f"{ROOT}/dataset_before_split/labels"  # YOLO labels written by convert
+TILE_IMAGES = f"{ROOT}/dataset_tiles/images"
+TILE_LABELS = f"{ROOT}/dataset_tiles/labels"
+DATASET = f"{ROOT}/dataset"
+# What split writes; DATASET itself also gets training's label caches
+SPLIT_DIRS = [f"{DATASET}/{kind}/{split}" for kind in ("images", "labels") for split in ("train", "val")]
+DATA_YAML = f"{ROOT}/data/dataset.yaml"
+VALIDATION_REPORT = f"{ROOT}/validation_report.json"
+
+CONVERT = {"ignore_difficult": True}
+TILE = {"tile_size": 1024, "overlap": 200, "min_box_size": 10}
+SPLIT = {"val_ratio": 0.2, "seed": 42, "mode": "hardlink"}
+WORKERS = 8
+
+TRAIN = {
+    "model": "yolov8s.pt",
+    "data": DATA_YAML,
+    "imgsz": 640,
+    "epochs": 50,
+    "batch": 16,
+    "seed": 42,
+    "project": f"{ROOT}/scripts/runs/dota",
+    "name": "baseline",
+    "tune_loader": True,
+    "decoded_cache_dir": f"{ROOT}/decoded_cache",
+}
+
+
+def stats():
+    DotaDatastats(image_dir=TILE_IMAGES, label_dir=TILE_LABELS, class_names=CLASS_NAMES, workers=WORKERS).print_summary()
+
+
+def validate():
+    splits = {split: (f"{DATASET}/images/{split}", f"{DATASET}/labels/{split}") for split in ("train", "val")}
+    # Cache kept outside the split folders, which are this stage's (and train's) inputs
+    DatasetValidator(
+        splits, num_classes=len(CLASS_NAMES), workers=WORKERS, cache_path=f"{ROOT}/validation_cache.pkl"
+    ).run(report_path=VALIDATION_REPORT)
+
+
+def train():
+    # Imported here so the preprocessing stages run without torch installed
+    from train import TrainConfig, YoloTrainer
+    YoloTrainer(TrainConfig(**TRAIN)).train()
+
+
+if __name__ == "__main__":
+    stages = [
+        PipelineStage(
+            "convert",
+            lambda: DotoYoloConverter(IMAGES, DOTA_LABELS, LABELS, workers=WORKERS, **CONVERT).convert(),
+            inputs=[IMAGES, DOTA_LABELS],
+            outputs=[LABELS],
+            params=CONVERT,
+        ),
+        PipelineStage(
+            "tile",
+            lambda: YoloTiler(IMAGES, LABELS, TILE_IMAGES, TILE_LABELS, workers=WORKERS, **TILE).tile_all(),
+            inputs=[IMAGES, LABELS],
+            outputs=[TILE_IMAGES, TILE_LABELS],
+            params=TILE,
+        ),
+        PipelineStage(
+            "split",
+            lambda: TrainValSplitter(TILE_IMAGES, TILE_LABELS, DATASET, workers=WORKERS, **SPLIT).split(),
+            inputs=[TILE_IMAGES, TILE_LABELS],
+            outputs=SPLIT_DIRS,
+            params=SPLIT,
+        ),
+        PipelineStage(
+            "stats",
+            stats,
+            inputs=[TILE_IMAGES, TILE_LABELS],
+            outputs=[os.path.join(os.path.dirname(TILE_LABELS), "stats_cache.pkl")],
+        ),
+        PipelineStage(
+            "validate",
+            validate,
+            inputs=SPLIT_DIRS,
+            outputs=[VALIDATION_REPORT],
+        ),
+        PipelineStage(
+            "train",
+            train,
+            inputs=SPLIT_DIRS + [DATA_YAML],
+            outputs=[os.path.join(TRAIN["project"], TRAIN["name"])],
+            params=TRAIN,
+        ),
+    ]
+
+    Pipeline(stages, state_path=f"{ROOT}/pipeline_state.json", max_parallel=2).run()
@@ -0,0 +1,15 @@
+from train import SlicedPredictor
+
+predictor = SlicedPredictor(
+    model_path="/home/royalbrothers/open_source_yolo_project/scripts/runs/dota/baseline/weights/best.pt",
+    tile_size=1024,
+    overlap=200,
+    imgsz=640,
+    batch=8,
+    merge="nms",
+)
+
+predictor.predict_dir(
+    images_dir="/home/royalbrothers/open_source_yolo_project/dataset_before_split/images",
+    output_dir="/home/royalbrothers/open_source_yolo_project/dataset_before_split/predictions",
+)
@@ -0,0 +1,20 @@
+from dota.visualizer import YoloVisualizer
+from dota.classes import CLASS_NAMES
+
+ROOT = "/home/royalbrothers/open_source_yolo_project"
+PREDICTIONS = None  # e.g. f"{ROOT}/scripts/runs/dota/baseline/weights/pred_cache/<hash>_640.npz"
+
+if __name__ == "__main__":
+    predictions = None
+    if PREDICTIONS:
+        # Imported here so labels-only QA runs without torch installed
+        from train.predcache import PredictionCache
+        predictions = PredictionCache.load(PREDICTIONS).detections(conf=0.25)
+
+    visualizer = YoloVisualizer(
+        images_dir=f"{ROOT}/dataset_tiles/images",
+        labels_dir=f"{ROOT}/dataset_tiles/labels",
+        class_names=CLASS_NAMES
+    )
+    visualizer.render_contact_sheets(f"{ROOT}/qa/sheets", predictions=predictions, threads=8)
+    visualizer.render_scenes(f"{ROOT}/qa/scenes", tile_size=1024, overlap=200, scale=0.25, predictions=predictions, threads=8)
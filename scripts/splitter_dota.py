@@ -1,9 +1,15 @@
 from dota.splitter import TrainValSplitter
+from dota.profiling import RunProfiler
 
 if __name__ == "__main__":
+    profiler = RunProfiler(report_path="/home/royalbrothers/open_source_yolo_project/run_report.jsonl")
     train_val_splitter = TrainValSplitter(
         images_dir="/home/royalbrothers/open_source_yolo_project/dataset_tiles/images",
         labels_dir="/home/royalbrothers/open_source_yolo_project/dataset_tiles/labels",
-        output_dir="/home/royalbrothers/open_source_yolo_project/dataset"
+        output_dir="/home/royalbrothers/open_source_yolo_project/dataset",
+        mode="hardlink",
+        workers=8,
+        profiler=profiler
     )
-    train_val_splitter.split()
\ No newline at end of file
+    train_val_splitter.split()
+    profiler.print_summary()
\ No newline at end of file
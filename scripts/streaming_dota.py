@@ -0,0 +1,20 @@
+from dota.streaming import StreamingPipeline
+from dota.profiling import RunProfiler
+
+if __name__ == "__main__":
+    profiler = RunProfiler(report_path="/home/royalbrothers/open_source_yolo_project/run_report.jsonl")
+    pipeline = StreamingPipeline(
+        images_dir="/home/royalbrothers/open_source_yolo_project/dataset_before_split/images",
+        dota_labels_dir="/home/royalbrothers/open_source_yolo_project/dataset_before_split/labelTxt",
+        output_dir="/home/royalbrothers/open_source_yolo_project/dataset",
+        tile_size=1024,
+        overlap=200,
+        min_box_size=10,
+        val_ratio=0.2,
+        seed=42,
+        workers=8,
+        encoder_threads=4,
+        profiler=profiler
+    )
+    pipeline.run()
+    profiler.print_summary()
@@ -1,6 +1,9 @@
 from dota.tiler import YoloTiler
+from dota.tilecodec import TileCodec
+from dota.profiling import RunProfiler
 
 if __name__ == "__main__":
+    profiler = RunProfiler(report_path="/home/royalbrothers/open_source_yolo_project/run_report.jsonl")
     tiler = YoloTiler(
         images_dir="/home/royalbrothers/open_source_yolo_project/dataset_before_split/images",
         labels_dir="/home/royalbrothers/open_source_yolo_project/dataset_before_split/labels",
@@ -8,6 +11,11 @@ if __name__ == "__main__":
         output_labels_dir="/home/royalbrothers/open_source_yolo_project/dataset_tiles/labels",
         tile_size=1024,
         overlap=200,
-        min_box_size=10
+        min_box_size=10,
+        workers=8,
+        codec=TileCodec("jpg"),
+        encoder_threads=2,
+        profiler=profiler
     )
-    tiler.tile_all()
\ No newline at end of file
+    tiler.tile_all()
+    profiler.print_summary()
\ No newline at end of file
@@ -1,4 +1,9 @@
 from .config import TrainConfig
 from .trainer import YoloTrainer
 from .evaluator import YoloEvaluator
-
+from .dataset import VirtualTileDataset, VirtualTileTrainer
+from .tilecache import DecodedTileCache, DecodedTileDataset, DecodedTileTrainer
+from .loadertune import LoaderTuner
+from .sliced import SlicedPredictor
+from .export import ModelExporter
+from .compare import CheckpointComparison
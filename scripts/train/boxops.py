@@ -0,0 +1,165 @@
+import numpy as np
+
+
+def box_iou(a, b):
+    """
+    Pairwise IoU of (N, 4) and (M, 4) xyxy boxes -> (N, M).
+    """
+    a = np.asarray(a, dtype=np.float64).reshape(-1, 4)
+    b = np.asarray(b, dtype=np.float64).reshape(-1, 4)
+
+    lt = np.maximum(a[:, None, :2], b[None, :, :2])
+    rb = np.minimum(a[:, None, 2:], b[None, :, 2:])
+    inter = np.clip(rb - lt, 0, None).prod(axis=2)
+
+    area_a = (a[:, 2] - a[:, 0]) * (a[:, 3] - a[:, 1])
+    area_b = (b[:, 2] - b[:, 0]) * (b[:, 3] - b[:, 1])
+    union = area_a[:, None] + area_b[None, :] - inter
+    return np.divide(inter, union, out=np.zeros_like(inter), where=union > 0)
+
+
+def _rowwise_iou(a, b):
+    lt = np.maximum(a[:, :2], b[:, :2])
+    rb = np.minimum(a[:, 2:], b[:, 2:])
+    inter = np.clip(rb - lt, 0, None).prod(axis=1)
+    union = (
+        (a[:, 2] - a[:, 0]) * (a[:, 3] - a[:, 1])
+        + (b[:, 2] - b[:, 0]) * (b[:, 3] - b[:, 1])
+        - inter
+    )
+    return np.divide(inter, union, out=np.zeros_like(inter), where=union > 0)
+
+
+def iou_pairs(a, b, min_iou: float = 0.0, chunk: int = 1 << 22):
+    """
+    Sparse IoU between xyxy boxes a (N, 4) and b (M, 4): every pair with
+    IoU > min_iou as (i, j, iou) arrays, without an N x M matrix.
+
+    b is sorted by x0, and each box of a is only compared with the boxes
+    of b whose x0 lies in (a.x0 - widest b box, a.x1). Candidates are
+    expanded at most chunk pairs at a time.
+    """
+    a = np.asarray(a, dtype=np.float64).reshape(-1, 4)
+    b = np.asarray(b, dtype=np.float64).reshape(-1, 4)
+    empty = (np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64), np.zeros(0))
+    if not len(a) or not len(b):
+        return empty
+
+    order = np.argsort(b[:, 0], kind="stable")
+    bx0 = b[order, 0]
+    widest = (b[:, 2] - b[:, 0]).max()
+    lo = np.searchsorted(bx0, a[:, 0] - widest, side="right")
+    hi = np.searchsorted(bx0, a[:, 2], side="left")
+    n = np.maximum(hi - lo, 0)
+
+    cum = np.cumsum(n)
+    if cum[-1] == 0:
+        return empty
+    cuts = np.searchsorted(cum, np.arange(chunk, cum[-1], chunk), side="right")
+    bounds = [0, *np.unique(cuts).tolist(), len(a)]
+
+    out_i, out_j, out_v = [], [], []
+    for s, e in zip(bounds[:-1], bounds[1:]):
+        counts = n[s:e]
+        if not counts.sum():
+            continue
+        ii = np.repeat(np.arange(s, e), counts)
+        jj = np.repeat(lo[s:e] - np.cumsum(counts) + counts, counts)
+        jj += np.arange(len(jj))
+        jj = order[jj]
+
+        iou = _rowwise_iou(a[ii], b[jj])
+        hit = iou > min_iou
+        out_i.append(ii[hit])
+        out_j.append(jj[hit])
+        out_v.append(iou[hit])
+
+    if not out_i:
+        return empty
+    return np.concatenate(out_i), np.concatenate(out_j), np.concatenate(out_v)
+
+
+def _greedy_clusters(boxes, scores, classes, iou_thr):
+    """
+    Greedy NMS that also records, for every box, the kept box that
+    suppressed it (the best scoring kept box overlapping it).
+
+    Boxes of different classes are shifted apart so they never overlap.
+    Instead of visiting boxes one by one, each round keeps every
+    undecided box whose better-scoring neighbours are all suppressed and
+    suppresses the neighbours of kept boxes; the result is identical to
+    the sequential loop and the number of rounds is the length of the
+    longest chain of overlaps, not the number of boxes.
+    """
+    n = len(boxes)
+    cluster = np.full(n, -1, dtype=np.int64)
+    if n == 0:
+        return np.empty(0, dtype=np.int64), cluster
+
+    boxes = np.asarray(boxes, dtype=np.float64)
+    shift = (np.abs(boxes).max() * 2 + 1) * np.asarray(classes, dtype=np.float64)
+    shifted = boxes + shift[:, None]
+
+    rank = np.empty(n, dtype=np.int64)
+    rank[np.argsort(-scores, kind="stable")] = np.arange(n)
+
+    i, j, _ = iou_pairs(shifted, shifted, iou_thr)
+    i, j = i[i != j], j[i != j]
+    first = rank[i] < rank[j]
+    hi, lo = i[first], j[first]
+
+    state = np.zeros(n, dtype=np.int8)  # 0 undecided, 1 kept, -1 suppressed
+    while True:
+        undecided = state == 0
+        if not undecided.any():
+            break
+        killed = np.zeros(n, dtype=bool)
+        killed[lo[state[hi] == 1]] = True
+        state[killed & undecided] = -1
+
+        blocked = np.zeros(n, dtype=bool)
+        blocked[lo[state[hi] == 0]] = True
+        state[(state == 0) & ~blocked] = 1
+
+    kept = state == 1
+    cluster[kept] = np.flatnonzero(kept)
+    winner = kept[hi]
+    best = np.full(n, n, dtype=np.int64)
+    np.minimum.at(best, lo[winner], rank[hi[winner]])
+    suppressed = state == -1
+    by_rank = np.argsort(rank)
+    cluster[suppressed] = by_rank[best[suppressed]]
+
+    keep = np.flatnonzero(kept)
+    return keep[np.argsort(rank[keep])], cluster
+
+
+def nms(boxes, scores, classes, iou_thr: float = 0.5):
+    """
+    Class-aware NMS; returns the kept indices, highest score first.
+    """
+    keep, _ = _greedy_clusters(boxes, scores, classes, iou_thr)
+    return keep
+
+
+def weighted_box_fusion(boxes, scores, classes, iou_thr: float = 0.55):
+    """
+    Class-aware box fusion: boxes clustered by greedy NMS are replaced by
+    their score-weighted mean; the cluster keeps its best score.
+    Returns (boxes, scores, classes) of the fused detections.
+    """
+    keep, cluster = _greedy_clusters(boxes, scores, classes, iou_thr)
+    if not len(keep):
+        return boxes[:0], scores[:0], classes[:0]
+
+    slot = np.zeros(len(boxes), dtype=np.int64)
+    slot[keep] = np.arange(len(keep))
+    members = slot[cluster]
+
+    weights = np.zeros(len(keep))
+    np.add.at(weights, members, scores)
+    fused = np.zeros((len(keep), 4))
+    np.add.at(fused, members, boxes * scores[:, None])
+    fused /= np.maximum(weights, 1e-12)[:, None]
+
+    return fused, scores[keep], classes[keep]
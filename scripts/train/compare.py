@@ -0,0 +1,219 @@
+import os
+import glob
+import json
+import time
+import multiprocessing
+from multiprocessing import shared_memory
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+import cv2
+import numpy as np
+from ultralytics import YOLO
+from ultralytics.data.augment import LetterBox
+from ultralytics.data.utils import check_det_dataset
+from .predcache import CONF_FLOOR, RAW_MAX_DET, PredictionCache, list_images
+
+
+def _letterbox(img_path, imgsz):
+    """
+    (3, imgsz, imgsz) RGB letterboxed pixels, original (h, w) and the
+    (ratio, left, top) needed to map boxes back.
+    """
+    img = cv2.imread(img_path)
+    h0, w0 = img.shape[:2]
+    padded = LetterBox((imgsz, imgsz), auto=False)(image=img)
+
+    # Same rounding as LetterBox
+    r = min(imgsz / h0, imgsz / w0)
+    left = round((imgsz - round(w0 * r)) / 2 - 0.1)
+    top = round((imgsz - round(h0 * r)) / 2 - 0.1)
+    return padded[..., ::-1].transpose(2, 0, 1), (h0, w0), (r, left, top)
+
+
+def _compare_worker(weights, shm_name, shape, letterbox, orig_shapes, batch, threads, warmup):
+    """
+    Runs in a spawned process: predicts on the shared letterboxed val
+    set and returns raw predictions in original image pixels.
+    """
+    import torch
+
+    if threads:
+        torch.set_num_threads(threads)
+
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        pixels = np.ndarray(shape, dtype=np.uint8, buffer=shm.buf)
+        model = YOLO(weights, task="detect")
+        predict = dict(imgsz=shape[2], conf=CONF_FLOOR, iou=1.0, max_det=RAW_MAX_DET, device="cpu", verbose=False)
+
+        for start in range(0, min(warmup, len(pixels)), batch):
+            model.predict(torch.from_numpy(pixels[start:start + batch]).float() / 255, **predict)
+
+        boxes, scores, classes, counts = [], [], [], []
+        elapsed = 0.0
+        for start in range(0, len(pixels), batch):
+            x = torch.from_numpy(pixels[start:start + batch]).float() / 255
+            t0 = time.perf_counter()
+            results = model.predict(x, **predict)
+            elapsed += time.perf_counter() - t0
+
+            for i, r in enumerate(results, start=start):
+                ratio, left, top = letterbox[i]
+                h0, w0 = orig_shapes[i]
+                xyxy = r.boxes.xyxy.cpu().numpy()
+                xyxy = (xyxy - [left, top, left, top]) / ratio
+                xyxy = np.clip(xyxy, 0, [w0, h0, w0, h0])
+                boxes.append(xyxy.astype(np.float32))
+                scores.append(r.boxes.conf.cpu().numpy().astype(np.float32))
+                classes.append(r.boxes.cls.cpu().numpy().astype(np.int32))
+                counts.append(len(r.boxes))
+        del pixels
+    finally:
+        shm.close()
+
+    return {
+        "boxes": np.concatenate(boxes) if boxes else np.zeros((0, 4), dtype=np.float32),
+        "scores": np.concatenate(scores) if scores else np.zeros(0, dtype=np.float32),
+        "classes": np.concatenate(classes) if classes else np.zeros(0, dtype=np.int32),
+        "counts": counts,
+        "throughput": len(counts) / elapsed if elapsed > 0 else 0.0,
+    }
+
+
+class CheckpointComparison:
+    """
+    Compares many checkpoints on one val split.
+
+    The val images are decoded and letterboxed to imgsz once, into one
+    shared memory block (n x 3 x imgsz x imgsz uint8, about 1.2 MB per
+    image at 640; max_images caps it). Each checkpoint then runs in its
+    own spawned worker process (workers at a time) that reads the block
+    without copying it, and its raw predictions are scored here through
+    PredictionCache.evaluate with the given conf / NMS IoU.
+
+    Throughput is CPU images / s of model.predict only (no decoding).
+    Workers running side by side share the CPU, so with workers > 1
+    throughput ranks checkpoints but is lower than a standalone run;
+    threads sets torch threads per worker (default: cpu count / workers).
+    """
+    def __init__(
+        self,
+        checkpoints,
+        data_yaml: str,
+        imgsz: int = 640,
+        batch: int = 16,
+        workers: int = 2,
+        threads: int = None,
+        conf: float = 0.001,
+        iou: float = 0.7,
+        max_images: int = None,
+        warmup: int = 16,
+    ):
+        if isinstance(checkpoints, str):
+            checkpoints = sorted(glob.glob(checkpoints))
+        assert checkpoints, "no checkpoints to compare"
+        self.checkpoints = list(checkpoints)
+        self.data = data_yaml
+        self.imgsz = imgsz
+        self.batch = batch
+        self.workers = max(1, min(workers, len(self.checkpoints)))
+        self.threads = threads or max(1, (os.cpu_count() or 1) // self.workers)
+        self.conf = conf
+        self.iou = iou
+        self.max_images = max_images
+        self.warmup = warmup
+
+    @staticmethod
+    def run_name(weights: str):
+        # runs/dota/<name>/weights/best.pt -> <name>, last.pt -> <name>/last.pt
+        parts = os.path.normpath(os.path.abspath(weights)).split(os.sep)
+        if len(parts) < 3 or parts[-2] != "weights":
+            return os.path.basename(weights)
+        return parts[-3] if parts[-1] == "best.pt" else f"{parts[-3]}/{parts[-1]}"
+
+    def _load_val(self, shm, images):
+        pixels = np.ndarray((len(images), 3, self.imgsz, self.imgsz), dtype=np.uint8, buffer=shm.buf)
+        orig_shapes = np.zeros((len(images), 2), dtype=np.int64)
+        letterbox = np.zeros((len(images), 3), dtype=np.float64)
+
+        def load(i):
+            pixels[i], orig_shapes[i], letterbox[i] = _letterbox(images[i], self.imgsz)
+
+        with ThreadPoolExecutor(max_workers=os.cpu_count() or 1) as pool:
+            list(pool.map(load, range(len(images))))
+        del pixels
+        return orig_shapes, letterbox
+
+    def run(self, report_path: str = None):
+        images = list_images(check_det_dataset(self.data)["val"])[:self.max_images]
+        n_images = len(images)
+        shape = (n_images, 3, self.imgsz, self.imgsz)
+        shm = shared_memory.SharedMemory(create=True, size=max(1, int(np.prod(shape))))
+        print(f"[INFO] Letterboxing {n_images} val images into {shm.size / 1e9:.2f} GB shared memory")
+
+        results = {}
+        try:
+            t0 = time.perf_counter()
+            orig_shapes, letterbox = self._load_val(shm, images)
+            print(f"[INFO] Val set ready in {time.perf_counter() - t0:.1f}s")
+
+            ctx = multiprocessing.get_context("spawn")
+            with ProcessPoolExecutor(max_workers=self.workers, mp_context=ctx) as pool:
+                futures = {
+                    pool.submit(
+                        _compare_worker,
+                        weights,
+                        shm.name,
+                        shape,
+                        letterbox,
+                        orig_shapes,
+                        self.batch,
+                        self.threads,
+                        self.warmup,
+                    ): weights
+                    for weights in self.checkpoints
+                }
+                for future in as_completed(futures):
+                    weights = futures[future]
+                    raw = future.result()
+                    offsets = np.zeros(len(images) + 1, dtype=np.int64)
+                    offsets[1:] = np.cumsum(raw["counts"])
+                    cache = PredictionCache(
+                        images, raw["boxes"], raw["scores"], raw["classes"], offsets, orig_shapes
+                    )
+                    m = cache.evaluate(conf=self.conf, iou=self.iou)
+                    results[self.run_name(weights)] = {
+                        "weights": weights,
+                        "mAP50": m["mAP50"],
+                        "mAP50_95": m["mAP50_95"],
+                        "precision": m["precision"],
+                        "recall": m["recall"],
+                        "throughput": raw["throughput"],
+                    }
+                    print(f"[INFO] Evaluated {weights}")
+        finally:
+            shm.close()
+            shm.unlink()
+
+        print(f"\n{'run':<24} {'mAP50':>7} {'mAP50-95':>9} {'recall':>7} {'img/s':>7}")
+        for name, r in sorted(results.items(), key=lambda kv: -kv[1]["mAP50_95"]):
+            print(f"{name:<24} {r['mAP50']:>7.4f} {r['mAP50_95']:>9.4f} {r['recall']:>7.4f} {r['throughput']:>7.2f}")
+
+        if report_path:
+            with open(report_path, "w") as f:
+                json.dump(
+                    {
+                        "data": self.data,
+                        "imgsz": self.imgsz,
+                        "n_images": n_images,
+                        "conf": self.conf,
+                        "iou": self.iou,
+                        "workers": self.workers,
+                        "threads": self.threads,
+                        "results": results,
+                    },
+                    f,
+                    indent=2,
+                )
+            print(f"[DONE] Comparison report saved: {report_path}")
+
+        return results
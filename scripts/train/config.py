@@ -22,4 +22,9 @@ class TrainConfig:
     workers: int = 0
 
     #optional
-    pretrained: bool = True
\ No newline at end of file
+    pretrained: bool = True
+    virtual_tiles: bool = False # data train/val are YoloTiler.build_index files
+    decoded_cache: bool = False # read tiles from a pre-decoded memmap cache (train.tilecache)
+    decoded_cache_dir: str = None # where decoded caches go (default: next to each split)
+    tune_loader: bool = False # pick workers by measured loader throughput
+    tune_batch: bool = False # let tune_loader change batch too (changes training dynamics)
\ No newline at end of file
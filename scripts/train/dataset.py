@@ -0,0 +1,154 @@
+import os
+import json
+import math
+from collections import OrderedDict
+
+import cv2
+import numpy as np
+from ultralytics.data.dataset import YOLODataset
+from ultralytics.models.yolo.detect import DetectionTrainer
+from ultralytics.utils import colorstr
+from ultralytics.utils.torch_utils import unwrap_model
+
+
+class VirtualTileDataset(YOLODataset):
+    """
+    YOLO dataset over a virtual tile index (see YoloTiler.build_index).
+
+    - img_path is the index .json instead of an image folder
+    - Labels come from the index, no label files are read
+    - Tiles are cropped at load time from the uncompressed scene cache
+      (memory-mapped), falling back to decoding the source scene
+
+    Open scenes are kept in an LRU per worker. Memory-mapped scenes only
+    cost page cache and are bounded by max_open_scenes; decoded scenes
+    are bounded by max_decoded_bytes (a 4k x 4k scene is ~48 MB, the
+    largest DOTA scenes are over 1 GB), always keeping the last one.
+    Build the scene cache (YoloTiler.build_index does) to avoid decoding.
+    """
+
+    max_open_scenes = 64
+    max_decoded_bytes = 256 << 20
+
+    def __init__(self, *args, **kwargs):
+        # Tiles have no files of their own to cache
+        kwargs["cache"] = None
+        self._scenes = OrderedDict()
+        self._decoded_bytes = 0
+        self._warned_decode = False
+        super().__init__(*args, **kwargs)
+
+    def get_img_files(self, img_path):
+        with open(img_path, "r") as f:
+            index = json.load(f)
+
+        self.images_dir = index["images_dir"]
+        self.scene_cache_dir = index["scene_cache_dir"]
+        self.tiles = index["tiles"]
+        if self.fraction < 1:
+            self.tiles = self.tiles[: round(len(self.tiles) * self.fraction)]
+
+        # Virtual paths: unique per tile, used only as ids by ultralytics
+        return [os.path.join(self.images_dir, t["name"]) for t in self.tiles]
+
+    def get_labels(self):
+        labels = []
+        for im_file, tile in zip(self.im_files, self.tiles):
+            x0, y0, x1, y1 = tile["window"]
+            boxes = np.array(tile["boxes"], dtype=np.float32).reshape(-1, 5)
+            labels.append({
+                "im_file": im_file,
+                "shape": (y1 - y0, x1 - x0),
+                "cls": boxes[:, :1],
+                "bboxes": boxes[:, 1:],
+                "segments": [],
+                "keypoints": None,
+                "normalized": True,
+                "bbox_format": "xywh",
+            })
+        return labels
+
+    def _scene(self, scene):
+        if scene in self._scenes:
+            self._scenes.move_to_end(scene)
+            return self._scenes[scene]
+
+        cache_path = os.path.join(
+            self.scene_cache_dir, os.path.splitext(scene)[0] + ".npy"
+        )
+        if os.path.exists(cache_path):
+            pixels = np.load(cache_path, mmap_mode="r")
+        else:
+            if not self._warned_decode:
+                print(f"[WARN] No scene cache for {scene} in {self.scene_cache_dir}, "
+                      f"decoding full scenes (slow, up to {self.max_decoded_bytes >> 20} MB held)")
+                self._warned_decode = True
+            pixels = cv2.imread(os.path.join(self.images_dir, scene))
+            if pixels is None:
+                raise FileNotFoundError(f"Scene not found: {scene}")
+            self._decoded_bytes += pixels.nbytes
+
+        self._scenes[scene] = pixels
+        while len(self._scenes) > 1 and (
+            len(self._scenes) > self.max_open_scenes
+            or self._decoded_bytes > self.max_decoded_bytes
+        ):
+            _, evicted = self._scenes.popitem(last=False)
+            if not isinstance(evicted, np.memmap):
+                self._decoded_bytes -= evicted.nbytes
+        return pixels
+
+    def load_image(self, i, rect_mode=True):
+        if self.ims[i] is not None:
+            return self.ims[i], self.im_hw0[i], self.im_hw[i]
+
+        tile = self.tiles[i]
+        x0, y0, x1, y1 = tile["window"]
+        im = np.ascontiguousarray(self._scene(tile["scene"])[y0:y1, x0:x1])
+
+        # Same resize / buffer handling as BaseDataset.load_image
+        h0, w0 = im.shape[:2]
+        if rect_mode:
+            r = self.imgsz / max(h0, w0)
+            if r != 1:
+                w, h = (min(math.ceil(w0 * r), self.imgsz), min(math.ceil(h0 * r), self.imgsz))
+                im = cv2.resize(im, (w, h), interpolation=cv2.INTER_LINEAR)
+        elif not (h0 == w0 == self.imgsz):
+            im = cv2.resize(im, (self.imgsz, self.imgsz), interpolation=cv2.INTER_LINEAR)
+
+        if self.augment:
+            self.ims[i], self.im_hw0[i], self.im_hw[i] = im, (h0, w0), im.shape[:2]
+            self.buffer.append(i)
+            if 1 < len(self.buffer) >= self.max_buffer_length:
+                j = self.buffer.pop(0)
+                self.ims[j], self.im_hw0[j], self.im_hw[j] = None, None, None
+
+        return im, (h0, w0), im.shape[:2]
+
+
+class VirtualTileTrainer(DetectionTrainer):
+    """
+    DetectionTrainer whose train / val splits are virtual tile indexes.
+    Subclasses swap the dataset through dataset_class.
+    """
+
+    dataset_class = VirtualTileDataset
+
+    def build_dataset(self, img_path, mode="train", batch=None):
+        gs = max(int(unwrap_model(self.model).stride.max() if self.model else 0), 32)
+        return self.dataset_class(
+            img_path=img_path,
+            imgsz=self.args.imgsz,
+            batch_size=batch,
+            augment=mode == "train",
+            hyp=self.args,
+            rect=self.args.rect or mode == "val",
+            single_cls=self.args.single_cls or False,
+            stride=gs,
+            pad=0.0 if mode == "train" else 0.5,
+            prefix=colorstr(f"{mode}: "),
+            task=self.args.task,
+            classes=self.args.classes,
+            data=self.data,
+            fraction=self.args.fraction if mode == "train" else 1.0,
+        )
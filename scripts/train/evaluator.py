@@ -1,10 +1,29 @@
+import os
+import numpy as np
 from ultralytics import YOLO
+from ultralytics.data.utils import check_det_dataset
+from dota.labelstore import read_yolo_files
+from .sliced import SlicedPredictor
+from .metrics import yolo_to_xyxy, match_scene, detection_metrics
+from .predcache import PredictionCache, list_images
 
 class YoloEvaluator:
-    def __init__(self, model_path: str, data_yaml: str):
+    """
+    Evaluates a trained checkpoint:
+    - evaluate(): ultralytics val on the tile val split
+    - evaluate_cached() / sweep(): the same split scored from a
+      PredictionCache, for any conf / NMS IoU / class subset without
+      re-running the model (cache_dir defaults to <weights dir>/pred_cache)
+    - evaluate_scenes(): sliced inference over full scenes
+    """
+    def __init__(self, model_path: str, data_yaml: str, cache_dir: str = None):
         self.model = YOLO(model_path)
+        self.model_path = model_path
         self.data = data_yaml
-    
+        self.cache_dir = cache_dir or os.path.join(
+            os.path.dirname(os.path.abspath(model_path)), "pred_cache"
+        )
+
     def evaluate(self, imgsz: int = 640):
         print("[INFO] Running evaluation")
         metrics = self.model.val(
@@ -16,4 +35,117 @@ class YoloEvaluator:
             "mAP50_95":metrics.box.map,
             "mAP50": metrics.box.map50,
             "recall":metrics.box.mr,
-        }
\ No newline at end of file
+        }
+
+    def _val_images(self):
+        return list_images(check_det_dataset(self.data)["val"])
+
+    def predictions(self, imgsz: int = 640, batch: int = 16, refresh: bool = False):
+        """
+        Raw val predictions for this checkpoint and imgsz, from the cache
+        when it matches the current val image list.
+        """
+        images = self._val_images()
+        path = PredictionCache.cache_path(self.cache_dir, self.model_path, imgsz)
+
+        if os.path.exists(path) and not refresh:
+            cache = PredictionCache.load(path)
+            if cache.meta.get("images") == PredictionCache.images_fingerprint(images):
+                print(f"[INFO] Loaded cached predictions: {path}")
+                return cache
+            print("[INFO] Val images changed, rebuilding prediction cache")
+
+        print(f"[INFO] Predicting {len(images)} val images (imgsz={imgsz})")
+        cache = PredictionCache.build(self.model, images, imgsz, batch)
+        cache.save(path)
+        print(f"[INFO] Saved prediction cache: {path}")
+        return cache
+
+    def evaluate_cached(
+        self,
+        imgsz: int = 640,
+        conf: float = 0.001,
+        iou: float = 0.7,
+        classes=None,
+        agnostic_nms: bool = False,
+        curves: bool = False,
+    ):
+        return self.predictions(imgsz).evaluate(
+            conf=conf, iou=iou, classes=classes, agnostic_nms=agnostic_nms, curves=curves
+        )
+
+    def sweep(self, imgsz: int = 640, confs=(0.001, 0.1, 0.25), ious=(0.5, 0.6, 0.7), classes=None):
+        """
+        Grid of conf x NMS IoU settings scored from one prediction cache.
+        """
+        cache = self.predictions(imgsz)
+        results = []
+
+        print(f"\n{'conf':>6} {'iou':>5} {'mAP50-95':>9} {'mAP50':>7} {'P':>7} {'R':>7}")
+        for conf in confs:
+            for iou in ious:
+                m = cache.evaluate(conf=conf, iou=iou, classes=classes)
+                results.append({"conf": conf, "iou": iou, **m})
+                print(
+                    f"{conf:>6.3f} {iou:>5.2f} {m['mAP50_95']:>9.4f} {m['mAP50']:>7.4f} "
+                    f"{m['precision']:>7.4f} {m['recall']:>7.4f}"
+                )
+        return results
+
+    def evaluate_scenes(
+        self,
+        images_dir: str,
+        labels_dir: str,
+        tile_size: int = 1024,
+        overlap: int = 200,
+        imgsz: int = 640,
+        conf: float = 0.001,
+        merge: str = "nms",
+        merge_iou: float = 0.5,
+    ):
+        """
+        Scene-level evaluation: full scenes go through SlicedPredictor and
+        the merged detections are scored against the full-scene YOLO
+        labels written by DotoYoloConverter (labels_dir), so border splits
+        and overlap duplicates count as they do in production.
+        """
+        print("[INFO] Running scene-level evaluation")
+        predictor = SlicedPredictor(
+            self.model_path,
+            tile_size=tile_size,
+            overlap=overlap,
+            imgsz=imgsz,
+            conf=conf,
+            merge=merge,
+            merge_iou=merge_iou,
+        )
+        preds = predictor.predict_dir(images_dir)
+
+        stems = list(preds)
+        rows, counts, _ = read_yolo_files(
+            [os.path.join(labels_dir, stem + ".txt") for stem in stems]
+        )
+        offsets = np.concatenate([[0], np.cumsum(counts)])
+
+        tps, confs, pred_cls, gt_cls = [], [], [], []
+        for i, stem in enumerate(stems):
+            pred = preds[stem]
+            img_h, img_w = pred["shape"]
+            gt_boxes, gt_c = yolo_to_xyxy(rows[offsets[i]:offsets[i + 1]], img_w, img_h)
+
+            tps.append(match_scene(pred["boxes"], pred["classes"], gt_boxes, gt_c))
+            confs.append(pred["scores"])
+            pred_cls.append(pred["classes"])
+            gt_cls.append(gt_c)
+
+        metrics = detection_metrics(
+            np.concatenate(tps) if tps else np.zeros((0, 10), dtype=bool),
+            np.concatenate(confs) if confs else np.zeros(0),
+            np.concatenate(pred_cls) if pred_cls else np.zeros(0, dtype=np.int64),
+            np.concatenate(gt_cls) if gt_cls else np.zeros(0, dtype=np.int64),
+        )
+        print(
+            f"[INFO] Scenes: {len(stems)} | mAP50-95={metrics['mAP50_95']:.4f} "
+            f"mAP50={metrics['mAP50']:.4f} recall={metrics['recall']:.4f}"
+        )
+        return metrics
@@ -0,0 +1,158 @@
+import os
+import json
+import time
+import random
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from ultralytics import YOLO
+from ultralytics.data.utils import check_det_dataset
+from dota.profiling import proc_status_kb
+from .predcache import list_images
+
+EXPORT_FORMATS = ("torchscript", "onnx")
+
+
+def _bench_worker(weights, images, imgsz, warmup, data, threads):
+    """
+    Runs in a fresh spawned process so VmHWM only covers one variant.
+    """
+    import torch
+
+    if threads:
+        torch.set_num_threads(threads)
+
+    model = YOLO(weights, task="detect")
+    for img in images[:warmup]:
+        model.predict(img, imgsz=imgsz, device="cpu", verbose=False)
+
+    latencies = []
+    start = time.perf_counter()
+    for img in images:
+        t0 = time.perf_counter()
+        model.predict(img, imgsz=imgsz, device="cpu", verbose=False)
+        latencies.append(time.perf_counter() - t0)
+    elapsed = time.perf_counter() - start
+
+    result = {
+        "throughput": len(images) / elapsed,
+        "p50_ms": float(np.percentile(latencies, 50) * 1000),
+        "p95_ms": float(np.percentile(latencies, 95) * 1000),
+        "p99_ms": float(np.percentile(latencies, 99) * 1000),
+        "peak_rss_mb": proc_status_kb("VmHWM") / 1024,
+    }
+
+    if data:
+        metrics = model.val(data=data, imgsz=imgsz, device="cpu", plots=False, verbose=False)
+        result["mAP50_95"] = float(metrics.box.map)
+        result["mAP50"] = float(metrics.box.map50)
+
+    return result
+
+
+class ModelExporter:
+    """
+    Exports a trained .pt checkpoint to CPU runtimes and benchmarks them.
+
+    - formats: ultralytics export formats ("torchscript", "onnx")
+    - int8: also writes a dynamically quantized (INT8 weights) copy of the
+      ONNX model with onnxruntime.quantization, when onnxruntime is
+      installed
+
+    benchmark() runs every variant, including the .pt baseline, on
+    n_images real val tiles in its own spawned process and reports
+    throughput, p50 / p95 / p99 latency, peak RSS and, with
+    validate=True, mAP and its drift from the .pt baseline.
+    """
+    def __init__(
+        self,
+        model_path: str,
+        data_yaml: str,
+        imgsz: int = 640,
+        formats=EXPORT_FORMATS,
+        int8: bool = False,
+        n_images: int = 200,
+        warmup: int = 10,
+        threads: int = None,
+        seed: int = 42,
+    ):
+        for fmt in formats:
+            assert fmt in EXPORT_FORMATS, f"format must be one of {EXPORT_FORMATS}"
+        self.model_path = model_path
+        self.data = data_yaml
+        self.imgsz = imgsz
+        self.formats = tuple(formats)
+        self.int8 = int8
+        self.n_images = n_images
+        self.warmup = warmup
+        self.threads = threads
+        self.seed = seed
+
+    def export(self):
+        """
+        Returns {variant name: weights path}, the .pt baseline first.
+        """
+        variants = {"pytorch": self.model_path}
+        model = YOLO(self.model_path)
+
+        for fmt in self.formats:
+            print(f"[INFO] Exporting {fmt} (imgsz={self.imgsz})")
+            variants[fmt] = str(model.export(format=fmt, imgsz=self.imgsz, device="cpu"))
+
+        if self.int8 and "onnx" in variants:
+            try:
+                from onnxruntime.quantization import QuantType, quantize_dynamic
+            except ImportError:
+                print("[WARN] onnxruntime not installed, skipping INT8 quantization")
+            else:
+                int8_path = variants["onnx"].replace(".onnx", "_int8.onnx")
+                quantize_dynamic(variants["onnx"], int8_path, weight_type=QuantType.QInt8)
+                variants["onnx_int8"] = int8_path
+                print(f"[INFO] Quantized ONNX: {int8_path}")
+
+        return variants
+
+    def _sample_tiles(self):
+        images = list_images(check_det_dataset(self.data)["val"])
+        random.Random(self.seed).shuffle(images)
+        return images[:self.n_images]
+
+    def benchmark(self, variants: dict = None, validate: bool = True, report_path: str = None):
+        variants = variants or self.export()
+        images = self._sample_tiles()
+        print(f"[INFO] Benchmarking {len(variants)} variants on {len(images)} val tiles")
+
+        results = {}
+        ctx = multiprocessing.get_context("spawn")
+        for name, weights in variants.items():
+            with ProcessPoolExecutor(max_workers=1, mp_context=ctx) as pool:
+                results[name] = pool.submit(
+                    _bench_worker,
+                    weights,
+                    images,
+                    self.imgsz,
+                    self.warmup,
+                    self.data if validate else None,
+                    self.threads,
+                ).result()
+            results[name]["size_mb"] = os.path.getsize(weights) / 1e6 if os.path.isfile(weights) else None
+
+        base = results.get("pytorch", {}).get("mAP50_95")
+        print(f"\n{'variant':<12} {'img/s':>7} {'p50':>7} {'p95':>7} {'p99':>7} {'RSS MB':>8} {'mAP50-95':>9} {'drift':>8}")
+        for name, r in results.items():
+            if base is not None and "mAP50_95" in r:
+                r["mAP_drift"] = r["mAP50_95"] - base
+            print(
+                f"{name:<12} {r['throughput']:>7.2f} {r['p50_ms']:>7.1f} {r['p95_ms']:>7.1f} "
+                f"{r['p99_ms']:>7.1f} {r['peak_rss_mb']:>8.0f} "
+                f"{r.get('mAP50_95', float('nan')):>9.4f} {r.get('mAP_drift', float('nan')):>+8.4f}"
+            )
+
+        report_path = report_path or os.path.join(
+            os.path.dirname(os.path.abspath(self.model_path)), "export_benchmark.json"
+        )
+        with open(report_path, "w") as f:
+            json.dump({"imgsz": self.imgsz, "n_images": len(images), "variants": variants, "results": results}, f, indent=2)
+        print(f"[DONE] Benchmark report saved: {report_path}")
+
+        return results
@@ -0,0 +1,103 @@
+import time
+from ultralytics.cfg import get_cfg
+from ultralytics.data.build import build_dataloader
+from ultralytics.data.dataset import YOLODataset
+from ultralytics.data.utils import check_det_dataset
+from ultralytics.utils import colorstr
+from .config import TrainConfig
+from .tilecache import DecodedTileDataset
+
+
+class LoaderTuner:
+    """
+    Measures train dataloader throughput (images/s, augmentation
+    included) and writes the fastest setting into the TrainConfig.
+
+    - baseline: JPEG tiles with the config's own workers / batch
+    - candidates: every workers_grid value over the DecodedTileCache
+      (built on first use), at the config's batch; with tune_batch, every
+      workers_grid x batch_grid combination (the batch size changes
+      training dynamics, so it is only tuned when asked for)
+
+    Each setting is measured over warmup + n_batches batches, capped at
+    the number of batches the train split has.
+
+    The epoch time reported is the time the loader alone needs to
+    produce one epoch of the train split, before and after tuning.
+    """
+    def __init__(
+        self,
+        cfg: TrainConfig,
+        workers_grid=(0, 2, 4, 8),
+        batch_grid=(8, 16, 32),
+        n_batches: int = 20,
+        warmup: int = 2,
+        tune_batch: bool = False,
+    ):
+        self.cfg = cfg
+        self.workers_grid = workers_grid
+        self.batch_grid = batch_grid if tune_batch else (cfg.batch,)
+        self.n_batches = n_batches
+        self.warmup = warmup
+
+    def _dataset(self, dataset_class):
+        args = get_cfg(overrides={"data": self.cfg.data, "imgsz": self.cfg.imgsz, "mode": "train"})
+        data = check_det_dataset(self.cfg.data)
+        return dataset_class(
+            img_path=data["train"],
+            imgsz=self.cfg.imgsz,
+            batch_size=max(self.batch_grid),
+            augment=True,
+            hyp=args,
+            rect=False,
+            stride=32,
+            pad=0.0,
+            prefix=colorstr("tune: "),
+            task="detect",
+            data=data,
+        )
+
+    def _throughput(self, dataset, batch, workers):
+        loader = build_dataloader(dataset, batch, workers, shuffle=True)
+        assert len(loader), "train split has no images to tune on"
+        # Small splits have fewer batches than warmup + n_batches
+        n_batches = min(self.n_batches, len(loader) - 1) if len(loader) > 1 else len(loader)
+        warmup = min(self.warmup, len(loader) - n_batches)
+        if n_batches < self.n_batches:
+            print(f"[WARN] Only {len(loader)} batches of {batch}, measuring {n_batches}")
+
+        it = iter(loader)
+        for _ in range(warmup):
+            next(it)
+
+        start = time.perf_counter()
+        n = 0
+        for _ in range(n_batches):
+            n += len(next(it)["img"])
+        return n / (time.perf_counter() - start)
+
+    def tune(self):
+        jpeg = self._dataset(YOLODataset)
+        n_train = len(jpeg)
+        before = self._throughput(jpeg, self.cfg.batch, self.cfg.workers)
+        print(
+            f"[INFO] Baseline (jpeg, workers={self.cfg.workers}, batch={self.cfg.batch}): "
+            f"{before:.1f} img/s, epoch ~{n_train / before:.0f}s"
+        )
+
+        decoded = self._dataset(DecodedTileDataset)
+        results = {}
+        for workers in self.workers_grid:
+            for batch in self.batch_grid:
+                results[(workers, batch)] = self._throughput(decoded, batch, workers)
+                print(f"[INFO] decoded, workers={workers}, batch={batch}: {results[(workers, batch)]:.1f} img/s")
+
+        (workers, batch), after = max(results.items(), key=lambda kv: kv[1])
+        self.cfg.workers, self.cfg.batch = workers, batch
+        self.cfg.decoded_cache = True
+
+        print(
+            f"[DONE] Tuned loader (decoded, workers={workers}, batch={batch}): {after:.1f} img/s, "
+            f"epoch ~{n_train / after:.0f}s (was ~{n_train / before:.0f}s, {after / before:.1f}x)"
+        )
+        return {"before": before, "after": after, "workers": workers, "batch": batch}
@@ -0,0 +1,121 @@
+import numpy as np
+from .boxops import iou_pairs
+
+# COCO IoU thresholds 0.50:0.05:0.95 and 101-point recall grid
+IOU_THRESHOLDS = np.linspace(0.5, 0.95, 10)
+RECALL_POINTS = np.linspace(0, 1, 101)
+
+
+def yolo_to_xyxy(rows, img_w, img_h):
+    """
+    (N, 5) class, xc, yc, w, h normalized rows -> (xyxy pixel boxes, classes).
+    """
+    rows = np.asarray(rows, dtype=np.float64).reshape(-1, 5)
+    xc, yc = rows[:, 1] * img_w, rows[:, 2] * img_h
+    w, h = rows[:, 3] * img_w, rows[:, 4] * img_h
+    boxes = np.column_stack([xc - w / 2, yc - h / 2, xc + w / 2, yc + h / 2])
+    return boxes, rows[:, 0].astype(np.int64)
+
+
+def match_scene(pred_boxes, pred_cls, gt_boxes, gt_cls, iou_thresholds=IOU_THRESHOLDS):
+    """
+    True-positive matrix (n_pred, n_thresholds) for one scene.
+
+    Candidate pairs come from the sparse iou_pairs (classes are shifted
+    apart, so only same-class pairs overlap). At each threshold pairs are
+    taken by descending IoU, every prediction and every ground truth box
+    being used at most once.
+    """
+    tp = np.zeros((len(pred_boxes), len(iou_thresholds)), dtype=bool)
+    if not len(pred_boxes) or not len(gt_boxes):
+        return tp
+
+    extent = max(np.abs(pred_boxes).max(), np.abs(gt_boxes).max()) * 2 + 1
+    pi, gi, iou = iou_pairs(
+        pred_boxes + (extent * pred_cls)[:, None],
+        gt_boxes + (extent * gt_cls)[:, None],
+        np.nextafter(iou_thresholds.min(), 0),
+    )
+    order = np.argsort(-iou, kind="stable")
+    pi, gi, iou = pi[order], gi[order], iou[order]
+
+    for k, thr in enumerate(iou_thresholds):
+        hit = iou >= thr
+        p, g = pi[hit], gi[hit]
+        first = np.sort(np.unique(p, return_index=True)[1])
+        p, g = p[first], g[first]
+        first = np.unique(g, return_index=True)[1]
+        tp[p[first], k] = True
+
+    return tp
+
+
+def _average_precision(tp, n_gt):
+    """
+    101-point interpolated AP per IoU threshold for one class, plus the
+    interpolated PR curve at the first threshold (IoU 0.5).
+    tp: (n, T) true positives sorted by descending confidence.
+    """
+    tpc = np.cumsum(tp, axis=0)
+    fpc = np.cumsum(~tp, axis=0)
+    recall = tpc / max(n_gt, 1)
+    precision = tpc / np.maximum(tpc + fpc, 1)
+
+    # Precision envelope: best precision at this recall or higher
+    envelope = np.flip(np.maximum.accumulate(np.flip(precision, 0), axis=0), 0)
+
+    curves = np.zeros((tp.shape[1], len(RECALL_POINTS)))
+    for k in range(tp.shape[1]):
+        idx = np.searchsorted(recall[:, k], RECALL_POINTS, side="left")
+        valid = idx < len(recall)
+        curves[k] = np.where(valid, envelope[np.minimum(idx, len(recall) - 1), k], 0)
+    return curves.mean(axis=1), precision[-1], recall[-1], curves[0]
+
+
+def detection_metrics(tp, conf, pred_cls, gt_cls, curves: bool = False):
+    """
+    Dataset-level metrics from stacked per-scene matches.
+
+    tp: (n_pred, T), conf / pred_cls: (n_pred,), gt_cls: (n_gt,).
+    Returns mAP50_95, mAP50, precision and recall (at IoU 0.5 over all
+    kept predictions), averaged over classes with ground truth, plus the
+    same numbers per class. With curves, also the per-class precision
+    at each of the 101 RECALL_POINTS (IoU 0.5).
+    """
+    classes, n_gt = np.unique(gt_cls, return_counts=True)
+    order = np.argsort(-conf, kind="stable")
+    tp, pred_cls = tp[order], pred_cls[order]
+
+    ap = np.zeros((len(classes), tp.shape[1]))
+    precision = np.zeros(len(classes))
+    recall = np.zeros(len(classes))
+    pr = np.zeros((len(classes), len(RECALL_POINTS)))
+    for i, (c, n) in enumerate(zip(classes.tolist(), n_gt.tolist())):
+        tp_c = tp[pred_cls == c]
+        if not len(tp_c):
+            continue
+        ap[i], p, r, pr[i] = _average_precision(tp_c, n)
+        precision[i], recall[i] = p[0], r[0]
+
+    metrics = {
+        "mAP50_95": float(ap.mean()) if len(classes) else 0.0,
+        "mAP50": float(ap[:, 0].mean()) if len(classes) else 0.0,
+        "precision": float(precision.mean()) if len(classes) else 0.0,
+        "recall": float(recall.mean()) if len(classes) else 0.0,
+        "per_class": {
+            int(c): {
+                "instances": int(n),
+                "mAP50_95": float(ap[i].mean()),
+                "mAP50": float(ap[i, 0]),
+                "precision": float(precision[i]),
+                "recall": float(recall[i]),
+            }
+            for i, (c, n) in enumerate(zip(classes, n_gt))
+        },
+    }
+    if curves:
+        metrics["pr_curves"] = {
+            "recall": RECALL_POINTS.tolist(),
+            "precision": {int(c): pr[i].tolist() for i, c in enumerate(classes)},
+        }
+    return metrics
@@ -0,0 +1,212 @@
+import os
+import json
+import hashlib
+import numpy as np
+from ultralytics.data.utils import IMG_FORMATS, img2label_paths
+from dota.labelstore import read_yolo_files
+from dota.manifest import file_hash
+from .boxops import nms
+from .metrics import yolo_to_xyxy, match_scene, detection_metrics
+
+# Raw predictions are kept down to this confidence, without NMS
+CONF_FLOOR = 0.001
+RAW_MAX_DET = 3000
+
+
+def list_images(source):
+    """
+    Image paths of an ultralytics split: a directory (searched
+    recursively), a .txt list of paths, or a list of either.
+    """
+    images = []
+    for src in source if isinstance(source, (list, tuple)) else [source]:
+        src = str(src)
+        if os.path.isdir(src):
+            for root, _, files in sorted(os.walk(src)):
+                images.extend(
+                    os.path.join(root, f) for f in sorted(files)
+                    if f.rsplit(".", 1)[-1].lower() in IMG_FORMATS
+                )
+        elif src.endswith(".txt"):
+            parent = os.path.dirname(src)
+            with open(src, "r") as f:
+                images.extend(
+                    line if os.path.isabs(line) else os.path.join(parent, line)
+                    for line in f.read().splitlines() if line.strip()
+                )
+    return images
+
+
+class PredictionCache:
+    """
+    Raw model predictions for a fixed list of images.
+
+    - boxes: (N, 4) float32 xyxy in original image pixels
+    - scores / classes: (N,) float32 / int32
+    - offsets: (n_images + 1,) int64, image i owns rows offsets[i]:offsets[i + 1]
+    - shapes: (n_images, 2) original (h, w)
+
+    Predictions are stored down to CONF_FLOOR and with NMS disabled, so
+    any confidence threshold, NMS IoU or class subset can be applied
+    afterwards with evaluate().
+
+    Saved as one .npz per checkpoint hash + imgsz; the image list is
+    fingerprinted so a changed val split invalidates it.
+    """
+    def __init__(self, images, boxes, scores, classes, offsets, shapes, meta: dict = None):
+        self.images = list(images)
+        self.boxes = boxes
+        self.scores = scores
+        self.classes = classes
+        self.offsets = offsets
+        self.shapes = shapes
+        self.meta = meta or {}
+
+    @staticmethod
+    def images_fingerprint(images):
+        return hashlib.sha1("\n".join(images).encode()).hexdigest()
+
+    @staticmethod
+    def cache_path(cache_dir: str, model_path: str, imgsz: int):
+        return os.path.join(cache_dir, f"{file_hash(model_path)[:16]}_{imgsz}.npz")
+
+    @classmethod
+    def build(cls, model, images, imgsz: int = 640, batch: int = 16, device: str = None):
+        boxes, scores, classes, counts, shapes = [], [], [], [], []
+        for start in range(0, len(images), batch):
+            results = model.predict(
+                images[start:start + batch],
+                imgsz=imgsz,
+                conf=CONF_FLOOR,
+                iou=1.0,
+                max_det=RAW_MAX_DET,
+                device=device,
+                verbose=False,
+            )
+            for r in results:
+                boxes.append(r.boxes.xyxy.cpu().numpy().astype(np.float32))
+                scores.append(r.boxes.conf.cpu().numpy().astype(np.float32))
+                classes.append(r.boxes.cls.cpu().numpy().astype(np.int32))
+                counts.append(len(r.boxes))
+                shapes.append(r.orig_shape)
+            print(f"[INFO] Cached predictions for {min(start + batch, len(images))}/{len(images)} images")
+
+        offsets = np.zeros(len(images) + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum(counts)
+        return cls(
+            images,
+            np.concatenate(boxes) if boxes else np.zeros((0, 4), dtype=np.float32),
+            np.concatenate(scores) if scores else np.zeros(0, dtype=np.float32),
+            np.concatenate(classes) if classes else np.zeros(0, dtype=np.int32),
+            offsets,
+            np.array(shapes, dtype=np.int64).reshape(-1, 2),
+            {"imgsz": imgsz, "images": cls.images_fingerprint(images)},
+        )
+
+    def save(self, path: str):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp_path = path + ".tmp.npz"
+        np.savez_compressed(
+            tmp_path,
+            boxes=self.boxes,
+            scores=self.scores,
+            classes=self.classes,
+            offsets=self.offsets,
+            shapes=self.shapes,
+            images=np.array(json.dumps(self.images)),
+            meta=np.array(json.dumps(self.meta)),
+        )
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str):
+        with np.load(path) as data:
+            return cls(
+                json.loads(str(data["images"])),
+                data["boxes"],
+                data["scores"],
+                data["classes"],
+                data["offsets"],
+                data["shapes"],
+                json.loads(str(data["meta"])),
+            )
+
+    def _ground_truth(self):
+        rows, counts, _ = read_yolo_files(img2label_paths(self.images))
+        image_ids = np.repeat(np.arange(len(self.images)), counts)
+        h, w = self.shapes[image_ids, 0], self.shapes[image_ids, 1]
+        boxes, classes = yolo_to_xyxy(rows, 1, 1)
+        return image_ids, boxes * np.column_stack([w, h, w, h]), classes
+
+    def evaluate(
+        self,
+        conf: float = 0.001,
+        iou: float = 0.7,
+        classes=None,
+        agnostic_nms: bool = False,
+        max_det: int = 300,
+        curves: bool = False,
+    ):
+        """
+        Metrics for one threshold / NMS setting, computed from the cache.
+
+        All images are processed in one pass: boxes are keyed by
+        (image, class) for the vectorized NMS and matching, so nothing
+        loops over images or boxes in Python.
+        """
+        p_img, p_box, p_score, p_cls = self._filter(conf, iou, classes, agnostic_nms, max_det)
+
+        g_img, g_box, g_cls = self._ground_truth()
+        if classes is not None:
+            sel = np.isin(g_cls, classes)
+            g_img, g_box, g_cls = g_img[sel], g_box[sel], g_cls[sel]
+
+        n_cls = int(max(self.classes.max(initial=0), 0)) + 1
+        n_cls = max(n_cls, int(g_cls.max(initial=0)) + 1)
+        tp = match_scene(p_box, p_img * n_cls + p_cls, g_box, g_img * n_cls + g_cls)
+        return detection_metrics(tp, p_score, p_cls, g_cls, curves=curves)
+
+    def detections(self, conf: float = 0.25, iou: float = 0.7, max_det: int = 300):
+        """
+        {image path: (boxes, scores, classes)} after conf / NMS, boxes as
+        xyxy normalized to the image size, e.g. for the predictions
+        overlay of YoloVisualizer.render_contact_sheets.
+        """
+        p_img, p_box, p_score, p_cls = self._filter(conf, iou, None, False, max_det)
+        h, w = self.shapes[p_img, 0], self.shapes[p_img, 1]
+        p_box = p_box / np.column_stack([w, h, w, h])
+
+        order = np.argsort(p_img, kind="stable")
+        bounds = np.searchsorted(p_img[order], np.arange(len(self.images) + 1))
+        out = {}
+        for i, img in enumerate(self.images):
+            rows = order[bounds[i]:bounds[i + 1]]
+            out[img] = (
+                p_box[rows].astype(np.float32),
+                p_score[rows].astype(np.float32),
+                p_cls[rows].astype(np.int32),
+            )
+        return out
+
+    def _filter(self, conf, iou, classes, agnostic_nms, max_det):
+        """
+        Image ids, boxes, scores and classes of the predictions kept at
+        conf, after per-class (or agnostic) NMS and the per-image max_det.
+        """
+        image_ids = np.repeat(np.arange(len(self.images)), np.diff(self.offsets))
+        keep = self.scores >= conf
+        if classes is not None:
+            keep &= np.isin(self.classes, classes)
+        p_img, p_box = image_ids[keep], self.boxes[keep].astype(np.float64)
+        p_score, p_cls = self.scores[keep].astype(np.float64), self.classes[keep].astype(np.int64)
+
+        kept = np.arange(len(p_box))
+        if iou < 1.0 and len(p_box):
+            n_cls = int(max(self.classes.max(initial=0), 0)) + 1
+            group = p_img if agnostic_nms else p_img * n_cls + p_cls
+            kept = nms(p_box, p_score, group, iou)
+        # Per-image max_det over the survivors, best first (also without NMS)
+        kept = kept[np.lexsort((-p_score[kept], p_img[kept]))]
+        first = np.searchsorted(p_img[kept], p_img[kept], side="left")
+        kept = kept[np.arange(len(kept)) - first < max_det]
+        return p_img[kept], p_box[kept], p_score[kept], p_cls[kept]
@@ -0,0 +1,174 @@
+import os
+import time
+import cv2
+import numpy as np
+from ultralytics import YOLO
+from dota.tilegrid import tile_windows
+from .boxops import nms, weighted_box_fusion
+
+MERGE_MODES = ("nms", "wbf")
+
+
+class SlicedPredictor:
+    """
+    Runs a tile-trained YOLO model over full-resolution scenes.
+
+    - scenes are cut with the same tile_size / overlap grid as YoloTiler
+    - tiles go through the model batch at a time
+    - detections are shifted back to scene pixels and duplicates from
+      overlapping tiles are merged with class-aware NMS ("nms") or
+      weighted box fusion ("wbf")
+
+    predict_scene returns a dict of xyxy boxes (N, 4) in scene pixels,
+    scores (N,) and classes (N,).
+    """
+    def __init__(
+        self,
+        model_path: str,
+        tile_size: int = 1024,
+        overlap: int = 200,
+        imgsz: int = 640,
+        batch: int = 8,
+        conf: float = 0.25,
+        iou: float = 0.7,
+        merge: str = "nms",
+        merge_iou: float = 0.5,
+        max_det: int = 300,
+        device: str = "cpu",
+    ):
+        assert merge in MERGE_MODES, f"merge must be one of {MERGE_MODES}"
+        self.model = YOLO(model_path)
+        self.model_path = model_path
+        self.tile_size = tile_size
+        self.stride = tile_size - overlap
+        self.imgsz = imgsz
+        self.batch = max(1, batch)
+        self.conf = conf
+        self.iou = iou
+        self.merge = merge
+        self.merge_iou = merge_iou
+        self.max_det = max_det
+        self.device = device
+
+    def _windows(self, img_w, img_h):
+        windows = [w[2:] for w in tile_windows(img_w, img_h, self.tile_size, self.stride)]
+        # Scenes narrower than the overlap get no grid steps
+        return windows or [(0, 0, img_w, img_h)]
+
+    def predict_tiles(self, image, windows, conf=None, iou=None, max_det=None):
+        """
+        Raw per-tile detections shifted to scene pixels, before merging:
+        (boxes (N, 4), scores (N,), classes (N,)).
+        """
+        boxes, scores, classes = [], [], []
+
+        for start in range(0, len(windows), self.batch):
+            chunk = windows[start:start + self.batch]
+            results = self.model.predict(
+                [image[y0:y1, x0:x1] for x0, y0, x1, y1 in chunk],
+                imgsz=self.imgsz,
+                conf=self.conf if conf is None else conf,
+                iou=self.iou if iou is None else iou,
+                max_det=self.max_det if max_det is None else max_det,
+                device=self.device,
+                verbose=False,
+            )
+            for (x0, y0, _, _), r in zip(chunk, results):
+                if not len(r.boxes):
+                    continue
+                boxes.append(r.boxes.xyxy.cpu().numpy() + np.array([x0, y0, x0, y0]))
+                scores.append(r.boxes.conf.cpu().numpy())
+                classes.append(r.boxes.cls.cpu().numpy().astype(np.int64))
+
+        if not boxes:
+            return np.zeros((0, 4)), np.zeros(0), np.zeros(0, dtype=np.int64)
+        return (
+            np.concatenate(boxes).astype(np.float64),
+            np.concatenate(scores).astype(np.float64),
+            np.concatenate(classes),
+        )
+
+    def merge_boxes(self, boxes, scores, classes):
+        if self.merge == "wbf":
+            return weighted_box_fusion(boxes, scores, classes, self.merge_iou)
+        keep = nms(boxes, scores, classes, self.merge_iou)
+        return boxes[keep], scores[keep], classes[keep]
+
+    def predict_scene(self, img_path: str):
+        image = cv2.imread(img_path)
+        if image is None:
+            raise FileNotFoundError(f"Could not read image: {img_path}")
+
+        img_h, img_w = image.shape[:2]
+        windows = self._windows(img_w, img_h)
+        boxes, scores, classes = self.merge_boxes(*self.predict_tiles(image, windows))
+
+        return {
+            "boxes": boxes,
+            "scores": scores,
+            "classes": classes,
+            "shape": (img_h, img_w),
+            "n_tiles": len(windows),
+        }
+
+    @staticmethod
+    def write_yolo(pred, out_path):
+        """
+        Writes scene predictions as normalized "class xc yc w h conf" lines.
+        """
+        img_h, img_w = pred["shape"]
+        b = pred["boxes"]
+        xc = (b[:, 0] + b[:, 2]) / 2 / img_w
+        yc = (b[:, 1] + b[:, 3]) / 2 / img_h
+        w = (b[:, 2] - b[:, 0]) / img_w
+        h = (b[:, 3] - b[:, 1]) / img_h
+
+        lines = [
+            f"{c} {x:.6f} {y:.6f} {bw:.6f} {bh:.6f} {s:.4f}"
+            for c, x, y, bw, bh, s in zip(
+                pred["classes"].tolist(), xc.tolist(), yc.tolist(),
+                w.tolist(), h.tolist(), pred["scores"].tolist(),
+            )
+        ]
+        with open(out_path, "w") as f:
+            f.write("\n".join(lines))
+
+    def predict_dir(self, images_dir: str, output_dir: str = None):
+        """
+        Predicts every scene in images_dir, optionally writing one
+        prediction file per scene to output_dir, and reports throughput.
+        """
+        images = sorted(
+            f for f in os.listdir(images_dir)
+            if f.lower().endswith((".png", ".jpg", ".jpeg"))
+        )
+        if output_dir:
+            os.makedirs(output_dir, exist_ok=True)
+
+        print(f"[INFO] Sliced inference on {len(images)} scenes ({self.merge} merge)")
+
+        preds, latencies = {}, []
+        start = time.perf_counter()
+        for img_name in images:
+            t0 = time.perf_counter()
+            pred = self.predict_scene(os.path.join(images_dir, img_name))
+            latencies.append(time.perf_counter() - t0)
+
+            stem = os.path.splitext(img_name)[0]
+            preds[stem] = pred
+            if output_dir:
+                self.write_yolo(pred, os.path.join(output_dir, stem + ".txt"))
+
+        elapsed = time.perf_counter() - start
+        if latencies:
+            lat = np.array(latencies) * 1000
+            print(
+                f"[INFO] {len(images) / elapsed:.3f} scenes/s | latency ms: "
+                f"mean={lat.mean():.0f}, p50={np.percentile(lat, 50):.0f}, "
+                f"p95={np.percentile(lat, 95):.0f}, max={lat.max():.0f}"
+            )
+            print(f"[INFO] {sum(p['n_tiles'] for p in preds.values())} tiles, "
+                  f"{sum(len(p['boxes']) for p in preds.values())} detections")
+
+        print("[DONE] Sliced inference completed")
+        return preds
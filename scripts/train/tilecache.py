@@ -0,0 +1,223 @@
+import os
+import json
+import math
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+import numpy as np
+from PIL import Image
+from ultralytics.data.dataset import YOLODataset
+from ultralytics.data.utils import img2label_paths
+from dota.labelstore import LabelStore, read_yolo_files
+from .dataset import VirtualTileTrainer
+
+
+def resized_shape(h0, w0, imgsz):
+    """
+    (h, w) after BaseDataset's rect-mode resize (long side -> imgsz).
+    """
+    r = imgsz / max(h0, w0)
+    if r == 1:
+        return h0, w0
+    return min(math.ceil(h0 * r), imgsz), min(math.ceil(w0 * r), imgsz)
+
+
+def tile_cache_dir(img_path, imgsz, root: str = None):
+    """
+    Cache location: <root>/decoded_train_640, or by default next to the
+    split: images/train -> images/decoded_train_640, train.txt ->
+    decoded_train_640.
+    """
+    path = os.path.normpath(str(img_path[0] if isinstance(img_path, (list, tuple)) else img_path))
+    stem = os.path.splitext(os.path.basename(path))[0]
+    return os.path.join(root or os.path.dirname(path), f"decoded_{stem}_{imgsz}")
+
+
+def _files_fingerprint(paths):
+    h = hashlib.sha1()
+    for p in paths:
+        try:
+            st = os.stat(p)
+            stamp = (st.st_size, st.st_mtime_ns)
+        except FileNotFoundError:
+            stamp = None
+        h.update(f"{p}:{stamp}\n".encode())
+    return h.hexdigest()
+
+
+class DecodedTileCache:
+    """
+    Resized, pre-decoded tiles and their labels for one split.
+
+    - pixels.npy: flat uint8 memory map, tile i is
+      pixels[offsets[i]:offsets[i + 1]] viewed as (h, w, 3) BGR, already
+      resized the way BaseDataset.load_image does it (long side -> imgsz)
+    - shapes.npy: (n, 4) resized h, w and original h0, w0
+    - labels/: LabelStore of the split's YOLO labels
+    - meta.json: imgsz and a fingerprint of the image / label files,
+      written last, so an interrupted build is never used
+
+    Pickling only sends the path; dataloader workers re-open the map.
+    """
+    def __init__(self, path: str):
+        self.path = path
+        with open(os.path.join(path, "meta.json"), "r") as f:
+            self.meta = json.load(f)
+        self.pixels = np.load(os.path.join(path, "pixels.npy"), mmap_mode="r")
+        self.offsets = np.load(os.path.join(path, "offsets.npy"))
+        self.shapes = np.load(os.path.join(path, "shapes.npy"))
+        self.labels = LabelStore.load(os.path.join(path, "labels"))
+
+    def __getstate__(self):
+        return {"path": self.path}
+
+    def __setstate__(self, state):
+        self.__init__(state["path"])
+
+    @staticmethod
+    def fingerprint(images):
+        return _files_fingerprint(list(images) + img2label_paths(images))
+
+    @classmethod
+    def open(cls, images, imgsz: int, path: str, workers: int = 8):
+        """
+        Loads the cache at path if it matches images and imgsz,
+        (re)building it otherwise.
+        """
+        fingerprint = cls.fingerprint(images)
+        meta_path = os.path.join(path, "meta.json")
+        if os.path.exists(meta_path):
+            with open(meta_path, "r") as f:
+                meta = json.load(f)
+            if meta.get("imgsz") == imgsz and meta.get("fingerprint") == fingerprint:
+                return cls(path)
+            os.remove(meta_path)
+
+        cls.build(images, imgsz, path, fingerprint, workers)
+        return cls(path)
+
+    @staticmethod
+    def build(images, imgsz: int, path: str, fingerprint: str, workers: int = 8):
+        os.makedirs(path, exist_ok=True)
+        print(f"[INFO] Building decoded tile cache ({len(images)} tiles, imgsz={imgsz}): {path}")
+
+        # Sizes come from the headers, so the map can be laid out up front
+        shapes = np.zeros((len(images), 4), dtype=np.int64)
+        for i, img in enumerate(images):
+            with Image.open(img) as im:
+                w0, h0 = im.size
+            shapes[i] = (*resized_shape(h0, w0, imgsz), h0, w0)
+
+        offsets = np.zeros(len(images) + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum(shapes[:, 0] * shapes[:, 1] * 3)
+        pixels = np.lib.format.open_memmap(
+            os.path.join(path, "pixels.npy"), mode="w+", dtype=np.uint8, shape=(int(offsets[-1]),)
+        )
+
+        def decode(i):
+            im = cv2.imread(images[i])
+            if im is None:
+                raise FileNotFoundError(f"Image Not Found {images[i]}")
+            h, w = shapes[i, :2]
+            if im.shape[:2] != (h, w):
+                im = cv2.resize(im, (int(w), int(h)), interpolation=cv2.INTER_LINEAR)
+            pixels[offsets[i]:offsets[i + 1]] = im.reshape(-1)
+
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            list(pool.map(decode, range(len(images))))
+        pixels.flush()
+        del pixels
+
+        rows, counts, _ = read_yolo_files(img2label_paths(images), workers)
+        label_offsets = np.zeros(len(images) + 1, dtype=np.int64)
+        label_offsets[1:] = np.cumsum(counts)
+        image_ids = np.repeat(np.arange(len(images)), counts).astype(np.float64)
+        LabelStore(
+            [str(i) for i in range(len(images))],
+            np.column_stack([image_ids, rows]),
+            label_offsets,
+        ).save(os.path.join(path, "labels"))
+
+        np.save(os.path.join(path, "offsets.npy"), offsets)
+        np.save(os.path.join(path, "shapes.npy"), shapes)
+        with open(os.path.join(path, "meta.json"), "w") as f:
+            json.dump({"imgsz": imgsz, "n_images": len(images), "fingerprint": fingerprint}, f)
+        print(f"[DONE] Decoded tile cache: {offsets[-1] / 1e9:.2f} GB")
+
+    def image(self, i):
+        h, w = self.shapes[i, :2]
+        return self.pixels[self.offsets[i]:self.offsets[i + 1]].reshape(h, w, 3)
+
+    def boxes(self, i):
+        return self.labels.get(str(i))
+
+
+class DecodedTileDataset(YOLODataset):
+    """
+    YOLO dataset that reads tiles from a DecodedTileCache instead of
+    decoding JPEGs every epoch. The cache is built (or refreshed) for the
+    split on first use, in cache_root or next to the split (see
+    tile_cache_dir).
+    """
+
+    cache_workers = 8
+    cache_root = None
+
+    def __init__(self, *args, **kwargs):
+        # The decoded cache replaces ultralytics' ram / disk caches
+        kwargs["cache"] = None
+        super().__init__(*args, **kwargs)
+
+    def get_img_files(self, img_path):
+        im_files = super().get_img_files(img_path)
+        self.tile_cache = DecodedTileCache.open(
+            im_files,
+            self.imgsz,
+            tile_cache_dir(img_path, self.imgsz, self.cache_root),
+            self.cache_workers,
+        )
+        return im_files
+
+    def get_labels(self):
+        labels = []
+        for i, im_file in enumerate(self.im_files):
+            boxes = np.asarray(self.tile_cache.boxes(i), dtype=np.float32).reshape(-1, 5)
+            labels.append({
+                "im_file": im_file,
+                "shape": tuple(int(v) for v in self.tile_cache.shapes[i, 2:]),
+                "cls": boxes[:, :1],
+                "bboxes": boxes[:, 1:],
+                "segments": [],
+                "keypoints": None,
+                "normalized": True,
+                "bbox_format": "xywh",
+            })
+        return labels
+
+    def load_image(self, i, rect_mode=True):
+        if self.ims[i] is not None:
+            return self.ims[i], self.im_hw0[i], self.im_hw[i]
+
+        # Copy out of the read-only map: some transforms work in place
+        im = np.array(self.tile_cache.image(i))
+        h0, w0 = (int(v) for v in self.tile_cache.shapes[i, 2:])
+        if not rect_mode and not (im.shape[0] == im.shape[1] == self.imgsz):
+            im = cv2.resize(im, (self.imgsz, self.imgsz), interpolation=cv2.INTER_LINEAR)
+
+        if self.augment:
+            self.ims[i], self.im_hw0[i], self.im_hw[i] = im, (h0, w0), im.shape[:2]
+            self.buffer.append(i)
+            if 1 < len(self.buffer) >= self.max_buffer_length:
+                j = self.buffer.pop(0)
+                self.ims[j], self.im_hw0[j], self.im_hw[j] = None, None, None
+
+        return im, (h0, w0), im.shape[:2]
+
+
+class DecodedTileTrainer(VirtualTileTrainer):
+    """
+    DetectionTrainer whose train / val splits read a DecodedTileCache.
+    """
+
+    dataset_class = DecodedTileDataset
@@ -1,6 +1,9 @@
 from ultralytics import YOLO
 from .config import TrainConfig
 from .utils import set_seed
+from .dataset import VirtualTileTrainer
+from .tilecache import DecodedTileDataset, DecodedTileTrainer
+from .loadertune import LoaderTuner
 import torch
 
 class YoloTrainer:
@@ -9,12 +12,25 @@ class YoloTrainer:
         set_seed(cfg.seed)
         if cfg.device == "auto":
             cfg.device = "0" if torch.cuda.is_available() else "cpu"
+        DecodedTileDataset.cache_root = cfg.decoded_cache_dir
         self.model = YOLO(cfg.model)
 
+    def _trainer_class(self):
+        if self.cfg.virtual_tiles:
+            return VirtualTileTrainer
+        if self.cfg.decoded_cache:
+            return DecodedTileTrainer
+        return None
+
     def train(self):
+        if self.cfg.tune_loader and not self.cfg.virtual_tiles:
+            LoaderTuner(self.cfg, tune_batch=self.cfg.tune_batch).tune()
+
         print("[INFO] Starting YOLO training")
         self.model.train(
+            trainer=self._trainer_class(),
             data=self.cfg.data,
+            imgsz=self.cfg.imgsz,
             epochs=self.cfg.epochs,
             batch=self.cfg.batch,
             seed=self.cfg.seed,
@@ -9,7 +9,7 @@ def main():
         batch=16,
         seed=42,
         project="runs/dota",
-        name="baseline"
+        name="baseline",
     )
 
     trainer = YoloTrainer(cfg)
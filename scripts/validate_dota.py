@@ -0,0 +1,23 @@
+from dota.validator import DatasetValidator
+from dota.classes import CLASS_NAMES
+from dota.profiling import RunProfiler
+
+ROOT = "/home/royalbrothers/open_source_yolo_project"
+
+if __name__ == "__main__":
+    profiler = RunProfiler(report_path=f"{ROOT}/run_report.jsonl")
+    validator = DatasetValidator(
+        splits={
+            "train": (f"{ROOT}/dataset/images/train", f"{ROOT}/dataset/labels/train"),
+            "val": (f"{ROOT}/dataset/images/val", f"{ROOT}/dataset/labels/val"),
+        },
+        num_classes=len(CLASS_NAMES),
+        min_box_size=2,
+        max_distance=3,
+        workers=8,
+        cache_path=f"{ROOT}/validation_cache.pkl",
+        profiler=profiler
+    )
+    report = validator.run(report_path=f"{ROOT}/validation_report.json")
+    validator.prune(report, dry_run=True)
+    profiler.print_summary()
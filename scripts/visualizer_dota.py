@@ -1,10 +1,10 @@
 from dota.visualizer import YoloVisualizer
-from dota.classes import DOTA_CLASSES
+from dota.classes import CLASS_NAMES
 
 if __name__ == "__main__":
     visualizer = YoloVisualizer(
         images_dir="/home/royalbrothers/open_source_yolo_project/dataset_tiles/images",
         labels_dir="/home/royalbrothers/open_source_yolo_project/dataset_tiles/labels",
-        class_names=DOTA_CLASSES
+        class_names=CLASS_NAMES
     )
     visualizer.visualize_random(num_images=10)
\ No newline at end of file